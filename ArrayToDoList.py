@@ -0,0 +1,181 @@
+#Same algorithm as ToDoList, but the nodes are not Python objects anymore: a node is an integer handle (an index)
+#into preallocated typed arrays, so a list with millions of keys is a handful of buffers instead of millions of objects
+from array import array
+from typing import List, Optional
+from Tracing import VERBOSE_EVENTS, Hook, Tracer, print_hook
+
+NIL: int = -1  # Null handle (plays the role of None)
+SENTINEL: int = 0  # The sentinel always takes the first slot
+
+
+class ArrayToDoList:
+    def __init__(self, h: int, epsilon: float, capacity: int = 1024, verbose: bool = False) -> None:
+        self.h: int = h  # Height of the ToDoList (Maximum level)
+        self.epsilon: float = epsilon  # Arbitrary value
+        self.verbose: bool = verbose  # Verbose mode (prints the operations, not the rebuilds)
+        self.width: int = h + 1  # Number of pointer slots of each node
+        self.capacity: int = max(capacity, 1) + 1  # Number of allocated slots (sentinel included)
+
+        # keys[node] is the key of node, next_nodes[node * width + lvl] is the handle of its successor in Llvl
+        self.keys: array = array('q', [0]) * self.capacity
+        self.next_nodes: array = array('q', [NIL]) * (self.capacity * self.width)
+        self.free: array = array('q')  # Stack of the handles released by delete
+        self.top: int = SENTINEL + 1  # First handle that has never been used
+
+        self.level_sizes: List[int] = [0] * (self.h + 1)  # Number of nodes in each level L0, ..., Lh
+        self.thresholds: List[float] = [(2 - self.epsilon) ** lvl for lvl in range(self.h + 1)]  # Size bounds (2 - epsilon) ** lvl
+
+        # Tracing hooks, None while there are none so that the operations only pay a None check
+        self.tracer: Optional[Tracer] = None
+        if verbose:
+            for event in VERBOSE_EVENTS:
+                self.add_hook(event, print_hook)
+
+    def add_hook(self, event: str, hook: Hook) -> None:
+        # hook(event, data) is called on every event of this list (see Tracing.EVENTS)
+        if self.tracer is None:
+            self.tracer = Tracer()
+        self.tracer.add(event, hook)
+
+    def remove_hook(self, event: str, hook: Hook) -> None:
+        if self.tracer is None:
+            raise ValueError(f"Hook not registered for {event!r}")
+        self.tracer.remove(event, hook)
+        if not self.tracer.hooks:
+            self.tracer = None  # Back to the plain path
+
+    def __len__(self) -> int:
+        return self.level_sizes[self.h]
+
+    def __allocate(self, key: int) -> int:
+        if self.free:
+            node: int = self.free.pop()
+        else:
+            if self.top == self.capacity:
+                # Double the buffers, the existing handles stay valid
+                self.keys.extend(array('q', [0]) * self.capacity)
+                self.next_nodes.extend(array('q', [NIL]) * (self.capacity * self.width))
+                self.capacity *= 2
+            node = self.top
+            self.top += 1
+        self.keys[node] = key
+        return node
+
+    def __release(self, node: int) -> None:
+        base: int = node * self.width
+        self.next_nodes[base:base + self.width] = array('q', [NIL]) * self.width
+        self.free.append(node)
+
+    def __find_predecessors(self, key: int) -> List[int]:
+        keys: array = self.keys
+        next_nodes: array = self.next_nodes
+        width: int = self.width
+        predecessors: List[int] = [SENTINEL] * (self.h + 1)
+        current: int = SENTINEL
+
+        # For the top level only: L0 can hold more than one node once n exceeds (2 - epsilon) ** h
+        while (nxt := next_nodes[current * width]) != NIL and keys[nxt] < key:
+            current = nxt
+        predecessors[0] = current
+
+        for lvl in range(1, self.h + 1):
+            # A single comparison is sufficient to determine the predecessor at each level (see ToDoList)
+            if (nxt := next_nodes[current * width + lvl]) != NIL and keys[nxt] < key:
+                current = nxt
+            predecessors[lvl] = current
+
+        return predecessors
+
+    def __check_rebuilding(self) -> None:
+        if self.level_sizes[0] > 1:
+            self.__partial_rebuilding()
+
+    def __partial_rebuilding(self) -> None:
+        next_nodes: array = self.next_nodes
+        width: int = self.width
+
+        index: int = self.h
+        for lvl in range(self.h + 1):
+            if self.level_sizes[lvl] <= self.thresholds[lvl]:
+                index = lvl
+                break
+
+        # Lindex-1 gets every second element from Lindex (starting with the second), and so on down to L0
+        for lvl in range(index, 0, -1):
+            current: int = SENTINEL
+            while (nxt := next_nodes[current * width + lvl]) != NIL and (nxt_nxt := next_nodes[nxt * width + lvl]) != NIL:
+                next_nodes[current * width + lvl - 1] = nxt_nxt
+                current = nxt_nxt
+            next_nodes[current * width + lvl - 1] = NIL
+            self.level_sizes[lvl - 1] = self.level_sizes[lvl] // 2
+
+        if self.tracer is not None:
+            self.tracer.emit("rebuild", {"index": index})
+
+    def insert(self, key: int) -> None:
+        predecessors: List[int] = self.__find_predecessors(key)
+        new_node: int = self.__allocate(key)
+
+        next_nodes: array = self.next_nodes
+        width: int = self.width
+        base: int = new_node * width
+        for lvl in range(self.h + 1):
+            next_nodes[base + lvl] = next_nodes[predecessors[lvl] * width + lvl]
+            next_nodes[predecessors[lvl] * width + lvl] = new_node
+            self.level_sizes[lvl] += 1
+
+        self.__check_rebuilding()
+
+        if self.tracer is not None:
+            self.tracer.emit("insert", {"key": key})
+
+    def delete(self, key: int) -> None:
+        predecessors: List[int] = self.__find_predecessors(key)
+        keys: array = self.keys
+        next_nodes: array = self.next_nodes
+        width: int = self.width
+
+        candidate: int = next_nodes[predecessors[self.h] * width + self.h]
+        if candidate == NIL or keys[candidate] != key:
+            if self.tracer is not None:
+                self.tracer.emit("delete", {"key": key, "found": False})
+            return
+
+        # The one to be promoted in place of the element to be deleted
+        substitute: int = next_nodes[candidate * width + self.h]
+
+        for lvl in range(self.h + 1):
+            if next_nodes[predecessors[lvl] * width + lvl] == candidate:
+                next_nodes[predecessors[lvl] * width + lvl] = substitute
+                successor: int = next_nodes[candidate * width + lvl]
+                if successor != substitute:
+                    # The substitute is promoted to this level, so the level keeps its size
+                    next_nodes[substitute * width + lvl] = successor
+                else:
+                    self.level_sizes[lvl] -= 1
+
+        self.__release(candidate)
+        self.__check_rebuilding()
+
+        if self.tracer is not None:
+            self.tracer.emit("delete", {"key": key, "found": True})
+
+    def search(self, key: int) -> bool:
+        predecessors: List[int] = self.__find_predecessors(key)
+        candidate: int = self.next_nodes[predecessors[self.h] * self.width + self.h]
+        found: bool = candidate != NIL and self.keys[candidate] == key
+        if self.tracer is not None:
+            self.tracer.emit("search_hit" if found else "search_miss", {"key": key})
+        return found
+
+    def __str__(self) -> str:
+        output: str = "\nArray ToDo List:\n"
+        for lvl in range(self.h + 1):
+            current: int = self.next_nodes[SENTINEL * self.width + lvl]
+            level_str: str = f"Level {lvl}: "
+            while current != NIL:
+                level_str += f"{self.keys[current]} -> "
+                current = self.next_nodes[current * self.width + lvl]
+            level_str += "None"
+            output += level_str + "\n"
+        return output
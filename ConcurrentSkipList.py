@@ -0,0 +1,180 @@
+#Thread-safe SkipList, after the lazy lock-based skip list of Herlihy, Lev, Luchangco and Shavit:
+#searches take no lock at all, insert and delete only lock the predecessors of the key (and the deleted node) and
+#validate them before linking, retrying from scratch if another thread got there first.
+#A node is logically in the set once fully_linked is set and until marked is set; it is then unlinked physically
+#while its predecessors are locked, so a reader that is standing on it still finds its way through next_nodes
+import time
+from math import inf
+from threading import Lock
+from typing import Callable, Iterator, List, Optional
+
+from SkipList import LevelGenerator
+
+
+class CSLNode:
+    __slots__ = ("key", "next_nodes", "top_level", "lock", "marked", "fully_linked")
+
+    def __init__(self, key: float, level: int) -> None:
+        self.key: float = key
+        self.next_nodes: List[Optional[CSLNode]] = [None] * (level + 1)
+        self.top_level: int = level
+        self.lock: Lock = Lock()
+        self.marked: bool = False  # Logically deleted
+        self.fully_linked: bool = False  # Linked at every level (before that, the key is not in the set yet)
+
+
+class ConcurrentSkipList:
+    def __init__(self, max_level: int, p: float = 0.5, seed: Optional[int] = None,
+                 level_generator: Optional[Callable[[int], int]] = None) -> None:
+        self.max_level_limit: int = max_level  # Maximum level of the SkipList
+        self.p: float = p  # Promotion probability
+        self.level_generator: Callable[[int], int] = level_generator if level_generator is not None \
+            else LevelGenerator(p, seed).draw
+        self.sentinel: CSLNode = CSLNode(-inf, self.max_level_limit)  # Header node (dummy node)
+        self.sentinel.fully_linked = True
+
+    def __find(self, key: int, predecessors: List[CSLNode], successors: List[Optional[CSLNode]]) -> int:
+        # Fills the predecessors and successors of key at every level without locking anything, and returns the
+        # highest level where key was found (-1 if it was not)
+        found_level: int = -1
+        current: CSLNode = self.sentinel
+        for lvl in range(self.max_level_limit, -1, -1):
+            nxt: Optional[CSLNode] = current.next_nodes[lvl]
+            while nxt is not None and nxt.key < key:
+                current = nxt
+                nxt = current.next_nodes[lvl]
+            if found_level == -1 and nxt is not None and nxt.key == key:
+                found_level = lvl
+            predecessors[lvl] = current
+            successors[lvl] = nxt
+        return found_level
+
+    def insert(self, key: int) -> bool:
+        # Returns False if key was already there
+        top_level: int = self.level_generator(self.max_level_limit)
+        predecessors: List[CSLNode] = [self.sentinel] * (self.max_level_limit + 1)
+        successors: List[Optional[CSLNode]] = [None] * (self.max_level_limit + 1)
+        while True:
+            found_level: int = self.__find(key, predecessors, successors)
+            if found_level != -1:
+                found: CSLNode = successors[found_level]
+                if not found.marked:
+                    # Being inserted by another thread: the key is there as soon as it is fully linked. The wait
+                    # gives the GIL away at every turn, or it would hold it for a whole switch interval while the
+                    # inserting thread cannot run
+                    while not found.fully_linked:
+                        time.sleep(0)
+                    return False
+                time.sleep(0)  # Being deleted: let the deleting thread unlink it, then try again
+                continue
+
+            locked: List[CSLNode] = []
+            try:
+                # Lock the predecessors bottom up and check that nothing changed between them and the key
+                valid: bool = True
+                for lvl in range(top_level + 1):
+                    predecessor: CSLNode = predecessors[lvl]
+                    successor: Optional[CSLNode] = successors[lvl]
+                    if not locked or locked[-1] is not predecessor:
+                        predecessor.lock.acquire()
+                        locked.append(predecessor)
+                    valid = not predecessor.marked and (successor is None or not successor.marked) \
+                        and predecessor.next_nodes[lvl] is successor
+                    if not valid:
+                        break
+                if not valid:
+                    continue
+
+                new_node: CSLNode = CSLNode(key, top_level)
+                for lvl in range(top_level + 1):
+                    new_node.next_nodes[lvl] = successors[lvl]
+                for lvl in range(top_level + 1):
+                    predecessors[lvl].next_nodes[lvl] = new_node
+                new_node.fully_linked = True  # Linearization point
+                return True
+            finally:
+                for node in locked:
+                    node.lock.release()
+
+    def delete(self, key: int) -> bool:
+        # Returns False if key was not there
+        predecessors: List[CSLNode] = [self.sentinel] * (self.max_level_limit + 1)
+        successors: List[Optional[CSLNode]] = [None] * (self.max_level_limit + 1)
+        victim: Optional[CSLNode] = None
+        while True:
+            found_level: int = self.__find(key, predecessors, successors)
+            if victim is None:
+                if found_level == -1:
+                    return False
+                candidate: CSLNode = successors[found_level]
+                # Only a node found at its own top level is fully linked and not on its way in or out
+                if not candidate.fully_linked or candidate.top_level != found_level or candidate.marked:
+                    return False
+                candidate.lock.acquire()
+                if candidate.marked:
+                    candidate.lock.release()
+                    return False
+                candidate.marked = True  # Linearization point, the node stays locked until it is unlinked
+                victim = candidate
+
+            locked: List[CSLNode] = []
+            try:
+                valid: bool = True
+                for lvl in range(victim.top_level + 1):
+                    predecessor: CSLNode = predecessors[lvl]
+                    if not locked or locked[-1] is not predecessor:
+                        predecessor.lock.acquire()
+                        locked.append(predecessor)
+                    valid = not predecessor.marked and predecessor.next_nodes[lvl] is victim
+                    if not valid:
+                        break
+                if not valid:
+                    continue
+
+                for lvl in range(victim.top_level, -1, -1):
+                    predecessors[lvl].next_nodes[lvl] = victim.next_nodes[lvl]
+                victim.lock.release()
+                return True
+            finally:
+                for node in locked:
+                    node.lock.release()
+
+    def search(self, key: int) -> bool:
+        # Wait free: a single descent, without any lock
+        current: CSLNode = self.sentinel
+        for lvl in range(self.max_level_limit, -1, -1):
+            nxt: Optional[CSLNode] = current.next_nodes[lvl]
+            while nxt is not None and nxt.key < key:
+                current = nxt
+                nxt = current.next_nodes[lvl]
+            if nxt is not None and nxt.key == key:
+                return nxt.fully_linked and not nxt.marked
+        return False
+
+    def __contains__(self, key: int) -> bool:
+        return self.search(key)
+
+    def __iter__(self) -> Iterator[int]:
+        # Weakly consistent: the keys present all along are yielded in order, the ones inserted or deleted
+        # meanwhile may or may not be
+        node: Optional[CSLNode] = self.sentinel.next_nodes[0]
+        while node is not None:
+            if node.fully_linked and not node.marked:
+                yield node.key
+            node = node.next_nodes[0]
+
+    def __len__(self) -> int:
+        # O(n), and only a snapshot while other threads write
+        return sum(1 for _ in self)
+
+    def __str__(self) -> str:
+        output: str = "\nConcurrent Skip List:\n"
+        for lvl in range(self.max_level_limit, -1, -1):
+            current: Optional[CSLNode] = self.sentinel.next_nodes[lvl]
+            level_str: str = f"Level {lvl}: "
+            while current is not None:
+                level_str += f"{current.key} -> "
+                current = current.next_nodes[lvl]
+            level_str += "None"
+            output += level_str + "\n"
+        return output
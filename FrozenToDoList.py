@@ -0,0 +1,95 @@
+#Read-only ToDoList served straight from a snapshot written by ToDoList.save: the file is memory-mapped and the
+#queries read the mapped key array, so opening costs no parsing and no per-node objects, and every process that
+#opens the same file shares its pages.
+#Without next pointers in the file the levels cannot be walked, so the descent is a binary search over the sorted
+#keys (the bisect module works on the mapped memoryview directly): O(log n) like the ToDoList one
+import mmap
+import sys
+from bisect import bisect_left, bisect_right
+from typing import Iterator, Optional, Tuple
+
+from Snapshot import HEADER, TODOLIST, SnapshotHeader, parse_header
+
+
+class FrozenToDoList:
+    def __init__(self, path: str) -> None:
+        with open(path, "rb") as file:
+            self.__map: mmap.mmap = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            header: SnapshotHeader = parse_header(self.__map, TODOLIST)
+            if sys.byteorder == "big":
+                raise ValueError("Snapshots are little endian, use ToDoList.load on this machine")
+        except Exception:
+            self.__map.close()  # Not a usable snapshot: the map would otherwise stay open until collected
+            raise
+        self.h: int = header.height  # Height of the saved ToDoList
+        self.epsilon: float = header.parameter
+        self.size: int = header.count
+        view: memoryview = memoryview(self.__map)
+        self.keys: memoryview = view[HEADER.size:HEADER.size + 8 * self.size].cast('q')  # Sorted keys
+        self.levels: memoryview = view[HEADER.size + 8 * self.size:HEADER.size + 9 * self.size]  # Levels above Lh of each key
+        view.release()
+
+    @classmethod
+    def open(cls, path: str) -> "FrozenToDoList":
+        return cls(path)
+
+    def close(self) -> None:
+        # The views must go before the map can be closed
+        self.keys.release()
+        self.levels.release()
+        self.__map.close()
+
+    def __enter__(self) -> "FrozenToDoList":
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.close()
+
+    def __len__(self) -> int:
+        return self.size
+
+    def search(self, key: int) -> bool:
+        position: int = bisect_left(self.keys, key)
+        return position < self.size and self.keys[position] == key
+
+    def __contains__(self, key: int) -> bool:
+        return self.search(key)
+
+    def __iter__(self) -> Iterator[int]:
+        return iter(self.keys)
+
+    def irange(self, lo: Optional[int] = None, hi: Optional[int] = None,
+               inclusive: Tuple[bool, bool] = (True, True)) -> Iterator[int]:
+        # Lazily yields the keys between lo and hi (None meaning unbounded)
+        start: int = 0 if lo is None else (bisect_left if inclusive[0] else bisect_right)(self.keys, lo)
+        stop: int = self.size if hi is None else (bisect_right if inclusive[1] else bisect_left)(self.keys, hi)
+        for position in range(start, stop):
+            yield self.keys[position]
+
+    def successor(self, key: int) -> Optional[int]:
+        # Smallest key strictly greater than key, None if there is none
+        position: int = bisect_right(self.keys, key)
+        return self.keys[position] if position < self.size else None
+
+    def predecessor(self, key: int) -> Optional[int]:
+        # Largest key strictly smaller than key, None if there is none
+        position: int = bisect_left(self.keys, key)
+        return self.keys[position - 1] if position > 0 else None
+
+    def min(self) -> Optional[int]:
+        return self.keys[0] if self.size else None
+
+    def max(self) -> Optional[int]:
+        return self.keys[-1] if self.size else None
+
+    def rank(self, key: int) -> int:
+        # Index of key in sorted order (where it would go if it is not there)
+        return bisect_left(self.keys, key)
+
+    def select(self, index: int) -> int:
+        if index < 0:
+            index += self.size
+        if not 0 <= index < self.size:
+            raise IndexError(f"Index {index} out of range for {self.size} keys")
+        return self.keys[index]
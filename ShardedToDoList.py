@@ -0,0 +1,242 @@
+#ToDoList split by key ranges over worker processes, so that the shards run on as many cores: shard i holds the keys k
+#with boundaries[i - 1] <= k < boundaries[i], in a ToDoList of its own process, which gets its requests over a pipe.
+#The batch methods send the keys of every shard before waiting for any answer, so the shards work in parallel, and a
+#range query goes to the shards it overlaps, whose answers are already in order from one shard to the next.
+#rebalance() splits the shards that hold more than split_factor times their share of the keys (at their median key,
+#in a new process) and merges the smallest neighbours back until there are max_shards shards again
+import multiprocessing
+from bisect import bisect_right
+from multiprocessing.connection import Connection
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from ToDoList import ToDoList
+
+
+def _serve_shard(connection: Connection, keys: List[int], h: int, epsilon: float) -> None:
+    # Body of a worker process: answers (command, argument) requests with (True, result) or (False, exception)
+    todolist: ToDoList = ToDoList.from_sorted(keys, h, epsilon, auto_height=True)
+    while True:
+        command, argument = connection.recv()
+        try:
+            if command == "insert":
+                result: Any = todolist.insert_many(argument)
+            elif command == "delete":
+                result = todolist.delete_many(argument)
+            elif command == "search":
+                result = todolist.search_many(argument)
+            elif command == "irange":
+                result = list(todolist.irange(*argument))
+            elif command == "len":
+                result = len(todolist)
+            elif command == "split":
+                # Keeps the keys below the median one, and hands over the others. When the median key is also the
+                # smallest one, the pivot is the next greater key so that both sides get keys; None (no split) if
+                # there is none, the keys being all equal
+                result = None
+                if len(todolist) >= 2:
+                    pivot: Optional[int] = todolist.select(len(todolist) // 2)
+                    if pivot == todolist.min():
+                        pivot = todolist.successor(pivot)
+                    if pivot is not None:
+                        result = (pivot, list(todolist.irange(pivot)))
+                        todolist = ToDoList.from_sorted(todolist.irange(None, pivot, (True, False)), h, epsilon,
+                                                        auto_height=True)
+            elif command == "append":
+                # Keys all greater than the ones of the shard (those of its right neighbour)
+                todolist = ToDoList.from_sorted(list(todolist) + argument, h, epsilon, auto_height=True)
+                result = None
+            elif command == "close":
+                connection.send((True, list(todolist) if argument else None))
+                break
+            else:
+                raise ValueError(f"Unknown command {command!r}")
+        except Exception as error:
+            connection.send((False, error))
+        else:
+            connection.send((True, result))
+    connection.close()
+
+
+class Shard:
+    """Handle on a worker process and its end of the pipe"""
+
+    def __init__(self, context: Any, keys: List[int], h: int, epsilon: float) -> None:
+        self.connection, worker_end = context.Pipe()
+        self.process: multiprocessing.Process = context.Process(target=_serve_shard, args=(worker_end, keys, h, epsilon),
+                                                                daemon=True)
+        self.process.start()
+        worker_end.close()
+
+    def send(self, command: str, argument: Any = None) -> None:
+        self.connection.send((command, argument))
+
+    def receive(self) -> Any:
+        ok, result = self.connection.recv()
+        if not ok:
+            raise result
+        return result
+
+    def call(self, command: str, argument: Any = None) -> Any:
+        self.send(command, argument)
+        return self.receive()
+
+    def close(self, drain: bool = False) -> Optional[List[int]]:
+        # Stops the worker; with drain, returns its keys first
+        keys: Optional[List[int]] = self.call("close", drain)
+        self.process.join()
+        self.connection.close()
+        return keys
+
+
+class ShardedToDoList:
+    def __init__(self, shards: int = 4, boundaries: Optional[List[int]] = None, key_range: Tuple[int, int] = (0, 1 << 32),
+                 h: int = 4, epsilon: float = 0.2, split_factor: float = 1.5, max_shards: Optional[int] = None,
+                 start_method: Optional[str] = None) -> None:
+        # The shards split key_range evenly unless boundaries (sorted, one less than the shards) are given; keys out
+        # of key_range are fine, they go to the first or the last shard
+        if boundaries is None:
+            lo, hi = key_range
+            boundaries = [lo + (hi - lo) * i // shards for i in range(1, shards)]
+        if any(boundaries[i] >= boundaries[i + 1] for i in range(len(boundaries) - 1)):
+            raise ValueError("Shard boundaries must be strictly increasing")
+        self.h: int = h  # Starting height of the ToDoList of every shard (they all adjust it)
+        self.epsilon: float = epsilon
+        self.split_factor: float = split_factor  # Shards above split_factor times the mean size are split
+        self.max_shards: int = max_shards if max_shards is not None else len(boundaries) + 1
+        self.boundaries: List[int] = list(boundaries)
+        self.__context: Any = multiprocessing.get_context(start_method)
+        self.shards: List[Shard] = [Shard(self.__context, [], h, epsilon) for _ in range(len(self.boundaries) + 1)]
+
+    def close(self) -> None:
+        for shard in self.shards:
+            shard.close()
+        self.shards = []
+
+    def __enter__(self) -> "ShardedToDoList":
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.close()
+
+    def __shard_of(self, key: int) -> int:
+        return bisect_right(self.boundaries, key)
+
+    def __scatter(self, command: str, keys: Iterable[int]) -> Dict[int, List[int]]:
+        # Sends the keys of each shard to it, and returns the positions of the keys of each shard
+        positions: Dict[int, List[int]] = {}
+        batches: Dict[int, List[int]] = {}
+        for position, key in enumerate(keys):
+            index: int = self.__shard_of(key)
+            positions.setdefault(index, []).append(position)
+            batches.setdefault(index, []).append(key)
+        for index, batch in batches.items():
+            self.shards[index].send(command, batch)
+        return positions
+
+    def __gather(self, positions: Dict[int, List[int]]) -> Dict[int, Any]:
+        # The answers of the shards a batch was sent to; every answer is read even if one of them is an error, so
+        # that the pipes stay in step
+        answers: Dict[int, Any] = {}
+        error: Optional[Exception] = None
+        for index in positions:
+            try:
+                answers[index] = self.shards[index].receive()
+            except Exception as exception:
+                error = exception if error is None else error
+        if error is not None:
+            raise error
+        return answers
+
+    def insert(self, key: int) -> None:
+        self.shards[self.__shard_of(key)].call("insert", [key])
+
+    def insert_many(self, keys: Iterable[int]) -> None:
+        self.__gather(self.__scatter("insert", keys))
+
+    def delete(self, key: int) -> None:
+        self.shards[self.__shard_of(key)].call("delete", [key])
+
+    def delete_many(self, keys: Iterable[int]) -> None:
+        self.__gather(self.__scatter("delete", keys))
+
+    def search(self, key: int) -> bool:
+        return self.shards[self.__shard_of(key)].call("search", [key])[0]
+
+    def search_many(self, keys: Iterable[int]) -> List[bool]:
+        # The answers come back in the order of the queries
+        keys = list(keys)
+        positions: Dict[int, List[int]] = self.__scatter("search", keys)
+        answers: Dict[int, Any] = self.__gather(positions)
+        found: List[bool] = [False] * len(keys)
+        for index, shard_positions in positions.items():
+            for position, hit in zip(shard_positions, answers[index]):
+                found[position] = hit
+        return found
+
+    def __contains__(self, key: int) -> bool:
+        return self.search(key)
+
+    def irange(self, lo: Optional[int] = None, hi: Optional[int] = None,
+               inclusive: Tuple[bool, bool] = (True, True)) -> Iterator[int]:
+        # Keys between lo and hi (None meaning unbounded), from every shard the range overlaps at once
+        first: int = 0 if lo is None else self.__shard_of(lo)
+        last: int = len(self.shards) - 1 if hi is None else self.__shard_of(hi)
+        for index in range(first, last + 1):
+            self.shards[index].send("irange", (lo, hi, inclusive))
+        answers: Dict[int, Any] = self.__gather({index: [] for index in range(first, last + 1)})
+        for index in range(first, last + 1):
+            yield from answers[index]
+
+    def __iter__(self) -> Iterator[int]:
+        return self.irange()
+
+    def shard_sizes(self) -> List[int]:
+        for shard in self.shards:
+            shard.send("len")
+        answers: Dict[int, Any] = self.__gather({index: [] for index in range(len(self.shards))})
+        return [answers[index] for index in range(len(self.shards))]
+
+    def __len__(self) -> int:
+        return sum(self.shard_sizes())
+
+    def __split(self, index: int) -> bool:
+        # Shard index keeps the keys below its median one, a new shard right after it takes the others. The pivot is
+        # greater than the smallest key of the shard, so the boundaries stay strictly increasing; False if the shard
+        # cannot be split (fewer than two distinct keys)
+        answer: Optional[Tuple[int, List[int]]] = self.shards[index].call("split")
+        if answer is None:
+            return False
+        pivot, keys = answer
+        self.shards.insert(index + 1, Shard(self.__context, keys, self.h, self.epsilon))
+        self.boundaries.insert(index, pivot)
+        return True
+
+    def __merge(self, index: int) -> None:
+        # Shard index + 1 hands its keys over to shard index and stops
+        keys: List[int] = self.shards.pop(index + 1).close(drain=True)
+        self.shards[index].call("append", keys)
+        del self.boundaries[index]
+
+    def rebalance(self) -> bool:
+        # Returns whether any boundary moved. A shard is split when it holds more than split_factor times the mean
+        # number of keys; each split is paid back by merging the two neighbours with the fewest keys together once
+        # there are more than max_shards shards. It stops at a largest shard whose keys are all equal, which no
+        # boundary can split
+        initial: List[int] = list(self.boundaries)
+        sizes: List[int] = self.shard_sizes()
+        for _ in range(2 * self.max_shards):  # Every round halves the largest shard, a few rounds are always enough
+            before: List[int] = list(self.boundaries)
+            mean: float = sum(sizes) / self.max_shards
+            largest: int = max(range(len(sizes)), key=sizes.__getitem__)
+            if sizes[largest] <= self.split_factor * mean or sizes[largest] < 2:
+                break
+            if not self.__split(largest):
+                break
+            sizes = self.shard_sizes()
+            while len(self.shards) > self.max_shards:
+                pair: int = min(range(len(sizes) - 1), key=lambda i: sizes[i] + sizes[i + 1])
+                self.__merge(pair)
+                sizes[pair:pair + 2] = [sizes[pair] + sizes[pair + 1]]
+            if self.boundaries == before:  # The merge undid the split
+                break
+        return self.boundaries != initial
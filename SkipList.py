@@ -1,61 +1,377 @@
-from random import random
-from typing import List, Optional
+from math import inf, log
+from random import Random
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+from Stats import OperationStats
+from Tracing import VERBOSE_EVENTS, Hook, Tracer, print_hook
+from Snapshot import SKIPLIST, read_snapshot, write_snapshot
+
+_MISSING: Any = object()  # Default of pop, so that None can still be a default value
+
+
+class LevelGenerator:
+    """Draws geometric levels (level >= k with probability p ** k) from its own seeded generator, with a single
+    draw per level: the trailing zeros of 64 random bits when p is a power of 1/2, the inverse of the
+    distribution function otherwise. draw(max_level) is what SkipList calls"""
+
+    def __init__(self, p: float = 0.5, seed: Optional[int] = None) -> None:
+        self.p: float = p
+        self.random: Random = Random(seed)  # Private state, so that a seed gives the same structure every time
+        self.getrandbits: Callable[[int], int] = self.random.getrandbits
+        # p = 2 ** -bits_per_level: a level is bits_per_level trailing zeros
+        bits_per_level: float = -log(p, 2)
+        self.bits_per_level: int = round(bits_per_level)
+        self.log_p: float = log(p)
+        self.draw: Callable[[int], int] = self.__draw_bits if abs(bits_per_level - self.bits_per_level) < 1e-12 \
+            else self.__draw_inverse
+
+    def __draw_bits(self, max_level: int) -> int:
+        # The bit set at position max_level * bits_per_level caps the level without a comparison
+        bits: int = self.getrandbits(64) | (1 << (max_level * self.bits_per_level))
+        return ((bits & -bits).bit_length() - 1) // self.bits_per_level
+
+    def __draw_inverse(self, max_level: int) -> int:
+        # P(log(u) / log(p) >= k) = P(u <= p ** k) = p ** k, for u uniform in (0, 1]
+        level: int = int(log(1.0 - self.random.random()) / self.log_p)
+        return level if level < max_level else max_level
+
 
 class SLNode:
-    def __init__(self, key: int, level: int) -> None:
+    __slots__ = ("key", "value", "next_nodes", "widths")
+
+    def __init__(self, key: int, level: int, value: Any = None) -> None:
         self.key: int = key
+        self.value: Any = value  # Payload of the key (map mode)
         self.next_nodes: List[Optional[SLNode]] = [None] * (level + 1)
+        # widths[i] is the number of level 0 steps covered by next_nodes[i] (up to one past the last key if None)
+        self.widths: List[int] = [1] * (level + 1)
 
 class SkipList:
-    def __init__(self, max_level: int, p: float = 0.5, verbose: bool = False) -> None:
-        self.max_level_limit: int = max_level  # Maximum level of the SkipList
+    def __init__(self, max_level: int, p: float = 0.5, verbose: bool = False, finger: bool = False,
+                 adaptive: bool = False, seed: Optional[int] = None,
+                 level_generator: Optional[Callable[[int], int]] = None, stats: bool = False) -> None:
+        self.max_level_limit: int = max_level  # Maximum level of the SkipList (the initial one if adaptive)
         self.p: float = p  # Promotion probability
-        self.verbose: bool = verbose  # Verbose mode
+        self.verbose: bool = verbose  # Verbose mode (prints every event, and the raises of the maximum level)
+        # Gives the level of each new node from the current maximum level, LevelGenerator(p, seed).draw by default
+        self.level_generator: Callable[[int], int] = level_generator if level_generator is not None \
+            else LevelGenerator(p, seed).draw
+        # Adaptive mode: the maximum level follows log_{1/p}(n), it is raised by one each time n goes past (1/p) ** max_level
+        self.adaptive: bool = adaptive
+        self.next_growth: float = (1 / p) ** max_level
         self.sentinel: SLNode = SLNode(-1, self.max_level_limit)  # Header node (dummy node)
         self.current_level_number: int = 0  # Current level number in the SkipList
+        self.size: int = 0  # Number of keys
+        # Finger mode: predecessors of the last key accessed, searches start from there instead of the sentinel
+        self.finger: Optional[List[SLNode]] = [self.sentinel] * (self.max_level_limit + 1) if finger else None
+        self.finger_ranks: List[int] = [0] * (self.max_level_limit + 1)  # Positions of the finger nodes (sentinel is 0)
+        # Opt-in statistics: the descents are swapped for counting copies, so that the plain ones stay branch free
+        self.stats: Optional[OperationStats] = OperationStats() if stats else None
+        if stats:
+            self.__find_predecessors = self.__counted_find_predecessors
+            self.__finger_predecessors = self.__counted_finger_predecessors
+            self.__find_node = self.__counted_find_node
+            self.__count_below = self.__counted_count_below
+            self.__select_node = self.__counted_select_node
+            self.__range_nodes = self.__counted_range_nodes
+            self.search_many = self.__counted_search_many
+        # Tracing hooks, None while there are none so that the operations only pay a None check
+        self.tracer: Optional[Tracer] = None
+        if verbose:
+            for event in VERBOSE_EVENTS:
+                self.add_hook(event, print_hook)
+
+    def add_hook(self, event: str, hook: Hook) -> None:
+        # hook(event, data) is called on every event of this list (see Tracing.EVENTS)
+        if self.tracer is None:
+            self.tracer = Tracer()
+        self.tracer.add(event, hook)
+
+    def remove_hook(self, event: str, hook: Hook) -> None:
+        if self.tracer is None:
+            raise ValueError(f"Hook not registered for {event!r}")
+        self.tracer.remove(event, hook)
+        if not self.tracer.hooks:
+            self.tracer = None  # Back to the plain path
+
+    def stats_snapshot(self) -> Dict[str, Any]:
+        if self.stats is None:
+            raise ValueError("Stats are disabled, build the list with stats=True")
+        return self.stats.snapshot()
+
+    def reset_stats(self) -> None:
+        if self.stats is None:
+            raise ValueError("Stats are disabled, build the list with stats=True")
+        self.stats.reset()
+
+    def __len__(self) -> int:
+        return self.size
+
+    @classmethod
+    def from_sorted(cls, keys: Iterable[int], max_level: int, p: float = 0.5, verbose: bool = False,
+                    finger: bool = False, adaptive: bool = False, seed: Optional[int] = None,
+                    level_generator: Optional[Callable[[int], int]] = None, stats: bool = False) -> "SkipList":
+        # Builds the whole list in a single pass over the sorted keys: every node gets its usual geometric level
+        # and is appended after the last node of each level it occupies, without any search
+        skiplist: SkipList = cls(max_level, p, verbose, finger, adaptive, seed, level_generator, stats)
+        count: int = skiplist.__link_sorted(keys)
+
+        if verbose:
+            print(f"Loaded {count} keys")
+        return skiplist
+
+    def __link_sorted(self, keys: Iterable[int], levels: Optional[Iterator[int]] = None) -> int:
+        # Appends the sorted keys to the empty list, with the given levels (drawn as usual if not given);
+        # returns the number of keys
+        tails: List[SLNode] = [self.sentinel] * (self.max_level_limit + 1)  # Last node of each level
+        tail_positions: List[int] = [0] * (self.max_level_limit + 1)
+        count: int = 0
+        previous: Optional[int] = None
+        for key in keys:
+            if previous is not None and key < previous:
+                raise ValueError(f"Keys must be sorted, got {key} after {previous}")
+            previous = key
+            count += 1
+            if self.adaptive and count > self.next_growth:
+                self.__raise_max_level()
+                tails.append(self.sentinel)
+                tail_positions.append(0)
+            new_level: int = self.__random_promotion() if levels is None else min(next(levels), self.max_level_limit)
+            node: SLNode = SLNode(key, new_level)
+            for i in range(new_level + 1):
+                tails[i].next_nodes[i] = node
+                tails[i].widths[i] = count - tail_positions[i]
+                tails[i] = node
+                tail_positions[i] = count
+            if new_level > self.current_level_number:
+                self.current_level_number = new_level
+
+        for i in range(self.max_level_limit + 1):
+            tails[i].widths[i] = count + 1 - tail_positions[i]
+        self.size = count
+        return count
+
+    def save(self, path: str) -> None:
+        # Versioned binary snapshot (see Snapshot.py): the sorted keys and the levels of their nodes, which load
+        # gives back as they are. The values of map mode are not saved
+        def nodes() -> Iterator[Tuple[int, int]]:
+            node: Optional[SLNode] = self.sentinel.next_nodes[0]
+            while node is not None:
+                yield node.key, len(node.next_nodes) - 1
+                node = node.next_nodes[0]
+
+        count: int = write_snapshot(path, SKIPLIST, self.max_level_limit, self.p, nodes())
+        if self.verbose:
+            print(f"Saved {count} keys")
+
+    @classmethod
+    def load(cls, path: str, verbose: bool = False, finger: bool = False, adaptive: bool = False,
+             seed: Optional[int] = None, level_generator: Optional[Callable[[int], int]] = None,
+             stats: bool = False) -> "SkipList":
+        # The list written by save, with the same maximum level, p and levels (new keys get theirs from the
+        # level generator as usual)
+        header, keys, levels = read_snapshot(path, SKIPLIST)
+        skiplist: SkipList = cls(header.height, header.parameter, verbose, finger, adaptive, seed, level_generator, stats)
+        count: int = skiplist.__link_sorted(keys, iter(levels))
+
+        if verbose:
+            print(f"Loaded {count} keys")
+        return skiplist
+
+    def __raise_max_level(self) -> None:
+        # The sentinel gets one more (empty) level in place, so do the finger and its ranks; nodes already
+        # in the list keep their level
+        self.max_level_limit += 1
+        self.next_growth /= self.p
+        self.sentinel.next_nodes.append(None)
+        self.sentinel.widths.append(self.size + 1)
+        if self.finger is not None:
+            self.finger.append(self.sentinel)
+            self.finger_ranks.append(0)
+
+        if self.verbose:
+            print(f"Maximum level raised to {self.max_level_limit}")
 
     def __random_promotion(self) -> int:
-        for lvl in range(self.max_level_limit):
-            if random() >= self.p:
-                return lvl
-        return self.max_level_limit
+        return self.level_generator(self.max_level_limit)
+
+    def __find_predecessors(self, key: int, ranks: Optional[List[int]] = None) -> List[Optional[SLNode]]:
+        """Search for all the predecessors of the key to be inserted (and their positions, if ranks is given)"""
+        if self.finger is not None:
+            finger: List[Optional[SLNode]] = self.__finger_predecessors(key)
+            if ranks is not None:
+                ranks[:] = self.finger_ranks
+            return finger
 
-    def __find_predecessors(self, key: int) -> List[Optional[SLNode]]:
-        """Search for all the predecessors of the key to be inserted"""
         previous_nodes: List[Optional[SLNode]] = [None] * (self.max_level_limit + 1)
         current: SLNode = self.sentinel
+        position: int = 0
 
         # Move forward to find the correct insertion position
         for i in range(self.current_level_number, -1, -1):
             while current.next_nodes[i] and current.next_nodes[i].key < key:
+                position += current.widths[i]
                 current = current.next_nodes[i]
             previous_nodes[i] = current
+            if ranks is not None:
+                ranks[i] = position
 
         return previous_nodes
 
-    def insert(self, key: int) -> None:
+    def __finger_predecessors(self, key: int) -> List[Optional[SLNode]]:
+        """Search for all the predecessors of the key, starting from those of the last key accessed"""
+        finger: List[SLNode] = self.finger
+        finger_ranks: List[int] = self.finger_ranks
+        sentinel: SLNode = self.sentinel
+
+        # Climb until the finger is also the predecessor of key: the levels above are then shared by both keys
+        # and stay as they are, so the search costs O(log d) where d is the distance from the last key
+        lvl: int = 0
+        current: SLNode = finger[0]
+        while lvl < self.current_level_number:
+            if (current is sentinel or current.key < key) and ((nxt := current.next_nodes[lvl]) is None or nxt.key >= key):
+                break
+            lvl += 1
+            current = finger[lvl]
+
+        # At the top level the finger may lie past the key, in which case we start over from the sentinel
+        position: int = finger_ranks[lvl]
+        if current is not sentinel and current.key >= key:
+            current = sentinel
+            position = 0
+        for i in range(lvl, -1, -1):
+            while (nxt := current.next_nodes[i]) is not None and nxt.key < key:
+                position += current.widths[i]
+                current = nxt
+            finger[i] = current
+            finger_ranks[i] = position
+
+        # The finger itself is returned: insert and delete only read it (or add the sentinel on new levels),
+        # so it remains the predecessors of key afterwards
+        return finger
+
+    # Counting copies of the descents (stats=True): pointers followed and key comparisons
+
+    def __counted_find_predecessors(self, key: int, ranks: Optional[List[int]] = None) -> List[Optional[SLNode]]:
+        if self.finger is not None:
+            finger: List[Optional[SLNode]] = self.__finger_predecessors(key)
+            if ranks is not None:
+                ranks[:] = self.finger_ranks
+            return finger
+
+        previous_nodes: List[Optional[SLNode]] = [None] * (self.max_level_limit + 1)
+        current: SLNode = self.sentinel
+        position: int = 0
+        hops: int = 0
+        comparisons: int = 0
+        for i in range(self.current_level_number, -1, -1):
+            while (nxt := current.next_nodes[i]) is not None:
+                comparisons += 1
+                if nxt.key >= key:
+                    break
+                position += current.widths[i]
+                current = nxt
+                hops += 1
+            previous_nodes[i] = current
+            if ranks is not None:
+                ranks[i] = position
+
+        self.stats.record_descent(hops, comparisons)
+        return previous_nodes
+
+    def __counted_finger_predecessors(self, key: int) -> List[Optional[SLNode]]:
+        finger: List[SLNode] = self.finger
+        finger_ranks: List[int] = self.finger_ranks
+        sentinel: SLNode = self.sentinel
+        hops: int = 0
+        comparisons: int = 0
+
+        lvl: int = 0
+        current: SLNode = finger[0]
+        while lvl < self.current_level_number:
+            comparisons += current is not sentinel
+            if current is sentinel or current.key < key:
+                if (nxt := current.next_nodes[lvl]) is None:
+                    break
+                comparisons += 1
+                if nxt.key >= key:
+                    break
+            lvl += 1
+            current = finger[lvl]
+
+        position: int = finger_ranks[lvl]
+        if current is not sentinel:
+            comparisons += 1
+            if current.key >= key:
+                current = sentinel
+                position = 0
+        for i in range(lvl, -1, -1):
+            while (nxt := current.next_nodes[i]) is not None:
+                comparisons += 1
+                if nxt.key >= key:
+                    break
+                position += current.widths[i]
+                current = nxt
+                hops += 1
+            finger[i] = current
+            finger_ranks[i] = position
+
+        self.stats.record_descent(hops, comparisons)
+        return finger
+
+    def __add_node(self, key: int, value: Any, predecessors: List[Optional[SLNode]], ranks: List[int]) -> int:
         # Promotion of the new node
         new_level: int = self.__random_promotion()
 
-        # Find the correct positions to insert the new node
-        predecessors: List[Optional[SLNode]] = self.__find_predecessors(key)
-
         # If new level is higher than the current list level, update header links
         if new_level > self.current_level_number:
             for i in range(self.current_level_number + 1, new_level + 1):
                 predecessors[i] = self.sentinel
+                ranks[i] = 0
+                self.sentinel.widths[i] = self.size + 1
             self.current_level_number = new_level
 
-        # Create the new node and adjust the next node references
-        new_node: SLNode = SLNode(key, new_level)
+        # Create the new node and adjust the next node references (and the widths: the new node sits right after
+        # the level 0 predecessor, every pointer jumping over it gets one step longer)
+        new_node: SLNode = SLNode(key, new_level, value)
         for i in range(new_level + 1):
             new_node.next_nodes[i] = predecessors[i].next_nodes[i]
             predecessors[i].next_nodes[i] = new_node
+            new_node.widths[i] = predecessors[i].widths[i] - (ranks[0] - ranks[i])
+            predecessors[i].widths[i] = ranks[0] - ranks[i] + 1
+        for i in range(new_level + 1, self.current_level_number + 1):
+            predecessors[i].widths[i] += 1
+        self.size += 1
 
-        if self.verbose:
-            print(f"Inserted key {key} at level {new_level}")
+        # Done last, the predecessors and ranks of the caller being sized for the previous maximum level
+        if self.adaptive and self.size > self.next_growth:
+            self.__raise_max_level()
+
+        return new_level
 
+    def __remove_node(self, candidate_node: SLNode, predecessors: List[Optional[SLNode]]) -> None:
+        # Update 'next nodes' pointers on the levels the candidate node occupies, the pointers above jump
+        # over one step less
+        for i in range(self.current_level_number + 1):
+            if predecessors[i].next_nodes[i] is candidate_node:
+                predecessors[i].next_nodes[i] = candidate_node.next_nodes[i]
+                predecessors[i].widths[i] += candidate_node.widths[i] - 1
+            else:
+                predecessors[i].widths[i] -= 1
+        self.size -= 1
+
+        # Adjust the level of the skip list if needed
+        while self.current_level_number > 0 and self.sentinel.next_nodes[self.current_level_number] is None:
+            self.current_level_number -= 1
 
+    def insert(self, key: int, value: Any = None) -> None:
+        # Find the correct positions to insert the new node
+        ranks: List[int] = [0] * (self.max_level_limit + 1)
+        predecessors: List[Optional[SLNode]] = self.__find_predecessors(key, ranks)
+
+        new_level: int = self.__add_node(key, value, predecessors, ranks)
+
+        if self.tracer is not None:
+            self.tracer.emit("insert", {"key": key, "level": new_level})
 
     def delete(self, key: int) -> None:
         # Find the correct positions where the key should be located
@@ -64,39 +380,287 @@ class SkipList:
         # Retrieve the candidate node to be deleted
         candidate_node: Optional[SLNode] = predecessors[0].next_nodes[0] if predecessors and predecessors[0].next_nodes else None
 
-        if candidate_node and candidate_node.key == key:  # If the candidate node has the right key
-            # Update 'next nodes' pointers
-            for i in range(self.current_level_number + 1):
-                if predecessors[i].next_nodes[i].key != candidate_node.key:
+        found: bool = candidate_node is not None and candidate_node.key == key  # If the candidate node has the right key
+        if found:
+            self.__remove_node(candidate_node, predecessors)
+
+        if self.tracer is not None:
+            self.tracer.emit("delete", {"key": key, "found": found})
+
+    def search(self, key: int) -> bool:
+        # Same descent as the map accesses (stopping at the first level where the key shows up)
+        found: bool = self.__find_node(key) is not None
+        if self.tracer is not None:
+            self.tracer.emit("search_hit" if found else "search_miss", {"key": key})
+        return found
+
+    def search_many(self, keys: Iterable[int]) -> List[bool]:
+        # The queries are answered in sorted order, each one starting from the predecessors of the previous one:
+        # we climb while those predecessors fall short of the key, then go back down as in a normal search,
+        # so a query costs O(log d) where d is the distance from the previous one.
+        # The answers come back in the order of the queries.
+        keys = list(keys)
+        found: List[bool] = [False] * len(keys)
+        path: List[SLNode] = [self.sentinel] * (self.current_level_number + 1)  # Predecessors of the previous query
+        for position in sorted(range(len(keys)), key=keys.__getitem__):
+            key = keys[position]
+            top: int = 0
+            while top < self.current_level_number and (nxt := path[top].next_nodes[top]) is not None and nxt.key < key:
+                top += 1
+
+            current: SLNode = path[top]
+            for lvl in range(top, -1, -1):
+                while (nxt := current.next_nodes[lvl]) is not None and nxt.key < key:
+                    current = nxt
+                path[lvl] = current
+
+            found[position] = (nxt := current.next_nodes[0]) is not None and nxt.key == key
+
+        if self.tracer is not None:
+            for key, hit in zip(keys, found):
+                self.tracer.emit("search_hit" if hit else "search_miss", {"key": key})
+        return found
+
+    def __counted_search_many(self, keys: Iterable[int]) -> List[bool]:
+        # Counting copy of search_many: every query is one descent, starting where the climb stops
+        keys = list(keys)
+        found: List[bool] = [False] * len(keys)
+        path: List[SLNode] = [self.sentinel] * (self.current_level_number + 1)
+        for position in sorted(range(len(keys)), key=keys.__getitem__):
+            key = keys[position]
+            hops: int = 0
+            comparisons: int = 0
+            top: int = 0
+            while top < self.current_level_number and (nxt := path[top].next_nodes[top]) is not None:
+                comparisons += 1
+                if nxt.key >= key:
                     break
-                predecessors[i].next_nodes[i] = candidate_node.next_nodes[i]
+                top += 1
 
-            # Adjust the level of the skip list if needed
-            while self.current_level_number > 0 and self.sentinel.next_nodes[self.current_level_number] is None:
-                self.current_level_number -= 1
+            current: SLNode = path[top]
+            for lvl in range(top, -1, -1):
+                while (nxt := current.next_nodes[lvl]) is not None:
+                    comparisons += 1
+                    if nxt.key >= key:
+                        break
+                    current = nxt
+                    hops += 1
+                path[lvl] = current
 
-            if self.verbose:
-                print(f"Deleted key {key}")
-        else:
-            if self.verbose:
-                print(f"key {key} not found")
+            if (nxt := current.next_nodes[0]) is not None:
+                comparisons += 1
+                found[position] = nxt.key == key
+            self.stats.record_descent(hops, comparisons)
+
+        if self.tracer is not None:
+            for key, hit in zip(keys, found):
+                self.tracer.emit("search_hit" if hit else "search_miss", {"key": key})
+        return found
+
+    # Map mode: every key carries a value, stored in its node, so a single descent answers both
+    # the membership and the value
+
+    def __find_node(self, key: int) -> Optional[SLNode]:
+        if self.finger is not None:
+            node: Optional[SLNode] = self.__finger_predecessors(key)[0].next_nodes[0]
+            return node if node is not None and node.key == key else None
 
-    def search(self, key: int) -> bool:
         current: SLNode = self.sentinel
         for lvl in range(self.current_level_number, -1, -1):
-            while True:
-                next_node: Optional[SLNode] = current.next_nodes[lvl]
-                if next_node is None or next_node.key >= key:
+            while (node := current.next_nodes[lvl]) is not None and node.key < key:
+                current = node
+            if node is not None and node.key == key:
+                return node
+        return None
+
+    def __counted_find_node(self, key: int) -> Optional[SLNode]:
+        if self.finger is not None:
+            node: Optional[SLNode] = self.__finger_predecessors(key)[0].next_nodes[0]
+            return node if node is not None and node.key == key else None
+
+        current: SLNode = self.sentinel
+        hops: int = 0
+        comparisons: int = 0
+        for lvl in range(self.current_level_number, -1, -1):
+            while (node := current.next_nodes[lvl]) is not None:
+                comparisons += 1
+                if node.key >= key:
                     break
-                current = next_node
-            if next_node is not None and next_node.key == key:
-                if self.verbose:
-                    print(f"Found key {key} at level {lvl}")
-                return True
+                current = node
+                hops += 1
+            if node is not None:
+                comparisons += 1
+                if node.key == key:
+                    self.stats.record_descent(hops + 1, comparisons)
+                    return node
+        self.stats.record_descent(hops, comparisons)
+        return None
 
-        if self.verbose:
-            print(f"Key {key} not found")
-        return False
+    def __contains__(self, key: int) -> bool:
+        return self.__find_node(key) is not None
+
+    def __getitem__(self, key: int) -> Any:
+        if (node := self.__find_node(key)) is None:
+            raise KeyError(key)
+        return node.value
+
+    def get(self, key: int, default: Any = None) -> Any:
+        node: Optional[SLNode] = self.__find_node(key)
+        return node.value if node is not None else default
+
+    def __setitem__(self, key: int, value: Any) -> None:
+        ranks: List[int] = [0] * (self.max_level_limit + 1)
+        predecessors: List[Optional[SLNode]] = self.__find_predecessors(key, ranks)
+        if (node := predecessors[0].next_nodes[0]) is not None and node.key == key:
+            node.value = value
+        else:
+            new_level: int = self.__add_node(key, value, predecessors, ranks)
+            if self.tracer is not None:
+                self.tracer.emit("insert", {"key": key, "level": new_level})
+
+    def setdefault(self, key: int, default: Any = None) -> Any:
+        ranks: List[int] = [0] * (self.max_level_limit + 1)
+        predecessors: List[Optional[SLNode]] = self.__find_predecessors(key, ranks)
+        if (node := predecessors[0].next_nodes[0]) is not None and node.key == key:
+            return node.value
+        new_level: int = self.__add_node(key, default, predecessors, ranks)
+        if self.tracer is not None:
+            self.tracer.emit("insert", {"key": key, "level": new_level})
+        return default
+
+    def pop(self, key: int, default: Any = _MISSING) -> Any:
+        predecessors: List[Optional[SLNode]] = self.__find_predecessors(key)
+        if (node := predecessors[0].next_nodes[0]) is None or node.key != key:
+            if default is _MISSING:
+                raise KeyError(key)
+            return default
+        self.__remove_node(node, predecessors)
+        if self.tracer is not None:
+            self.tracer.emit("delete", {"key": key, "found": True})
+        return node.value
+
+    def items(self, lo: Optional[int] = None, hi: Optional[int] = None,
+              inclusive: Tuple[bool, bool] = (True, True)) -> Iterator[Tuple[int, Any]]:
+        # Lazily yields the (key, value) pairs between lo and hi, like irange
+        for node in self.__range_nodes(lo, hi, inclusive):
+            yield node.key, node.value
+
+    def __iter__(self) -> Iterator[int]:
+        node: Optional[SLNode] = self.sentinel.next_nodes[0]
+        while node is not None:
+            yield node.key
+            node = node.next_nodes[0]
+
+    def __range_nodes(self, lo: Optional[int], hi: Optional[int], inclusive: Tuple[bool, bool]) -> Iterator[SLNode]:
+        # Lazily yields the nodes between lo and hi (None meaning unbounded): one descent to find lo, then level 0 is streamed
+        node: Optional[SLNode] = self.sentinel.next_nodes[0] if lo is None \
+            else self.__find_predecessors(lo)[0].next_nodes[0]
+        if lo is not None and not inclusive[0]:
+            while node is not None and node.key <= lo:
+                node = node.next_nodes[0]
+        while node is not None and (hi is None or node.key < hi or (inclusive[1] and node.key == hi)):
+            yield node
+            node = node.next_nodes[0]
+
+    def __counted_range_nodes(self, lo: Optional[int], hi: Optional[int],
+                              inclusive: Tuple[bool, bool]) -> Iterator[SLNode]:
+        # Counting copy of __range_nodes: the descent to lo is counted by __find_predecessors, the nodes streamed here
+        for node in SkipList.__range_nodes(self, lo, hi, inclusive):
+            self.stats.scanned += 1
+            yield node
+
+    def irange(self, lo: Optional[int] = None, hi: Optional[int] = None,
+               inclusive: Tuple[bool, bool] = (True, True)) -> Iterator[int]:
+        for node in self.__range_nodes(lo, hi, inclusive):
+            yield node.key
+
+    def successor(self, key: int) -> Optional[int]:
+        # Smallest key strictly greater than key, None if there is none
+        node: Optional[SLNode] = self.__find_predecessors(key)[0].next_nodes[0]
+        while node is not None and node.key <= key:
+            node = node.next_nodes[0]
+        return node.key if node is not None else None
+
+    def predecessor(self, key: int) -> Optional[int]:
+        # Largest key strictly smaller than key, None if there is none
+        node: SLNode = self.__find_predecessors(key)[0]
+        return node.key if node is not self.sentinel else None
+
+    def min(self) -> Optional[int]:
+        node: Optional[SLNode] = self.sentinel.next_nodes[0]
+        return node.key if node is not None else None
+
+    def max(self) -> Optional[int]:
+        node: SLNode = self.__find_predecessors(inf)[0]
+        return node.key if node is not self.sentinel else None
+
+    def __count_below(self, key: int, strict: bool = True) -> int:
+        # Number of keys smaller than key (or equal to it if not strict): the widths of the descent add up
+        current: SLNode = self.sentinel
+        position: int = 0
+        for i in range(self.current_level_number, -1, -1):
+            while (nxt := current.next_nodes[i]) is not None and (nxt.key < key or not strict and nxt.key == key):
+                position += current.widths[i]
+                current = nxt
+        return position
+
+    def __counted_count_below(self, key: int, strict: bool = True) -> int:
+        current: SLNode = self.sentinel
+        position: int = 0
+        hops: int = 0
+        comparisons: int = 0
+        for i in range(self.current_level_number, -1, -1):
+            while (nxt := current.next_nodes[i]) is not None:
+                comparisons += 1
+                if nxt.key > key or strict and nxt.key == key:
+                    break
+                position += current.widths[i]
+                current = nxt
+                hops += 1
+        self.stats.record_descent(hops, comparisons)
+        return position
+
+    def rank(self, key: int) -> int:
+        # Index of key in sorted order (where it would go if it is not there)
+        return self.__count_below(key)
+
+    def select(self, index: int) -> int:
+        # Key of the given index in sorted order, negative indexes count from the end
+        if index < 0:
+            index += self.size
+        if not 0 <= index < self.size:
+            raise IndexError(f"Index {index} out of range for {self.size} keys")
+        return self.__select_node(index).key
+
+    def __select_node(self, index: int) -> SLNode:
+        # Node of the given (valid) index: the widths of the descent add up to index + 1
+        current: SLNode = self.sentinel
+        position: int = 0
+        for i in range(self.current_level_number, -1, -1):
+            while (nxt := current.next_nodes[i]) is not None and position + current.widths[i] <= index + 1:
+                position += current.widths[i]
+                current = nxt
+        return current
+
+    def __counted_select_node(self, index: int) -> SLNode:
+        current: SLNode = self.sentinel
+        position: int = 0
+        hops: int = 0
+        comparisons: int = 0
+        for i in range(self.current_level_number, -1, -1):
+            while (nxt := current.next_nodes[i]) is not None:
+                comparisons += 1
+                if position + current.widths[i] > index + 1:
+                    break
+                position += current.widths[i]
+                current = nxt
+                hops += 1
+        self.stats.record_descent(hops, comparisons)
+        return current
+
+    def count_range(self, lo: int, hi: int, inclusive: Tuple[bool, bool] = (True, True)) -> int:
+        # Number of keys irange(lo, hi, inclusive) would yield, in two descents
+        return max(0, self.__count_below(hi, strict=not inclusive[1]) - self.__count_below(lo, strict=inclusive[0]))
 
     def __str__(self) -> str:
         output = "\nSkip List:"
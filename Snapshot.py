@@ -0,0 +1,72 @@
+#Binary snapshot of a ToDoList or a SkipList (save/load, and FrozenToDoList.open), little endian:
+#    header (32 bytes): magic b"TDLS", format version (u16), kind (u8), reserved (u8), height (u32),
+#                       parameter (f64: epsilon of a ToDoList, p of a SkipList), number of keys n (u64), padding
+#    keys: n signed 64-bit integers, sorted
+#    levels: n unsigned bytes, the number of levels above the bottom one each node reaches
+#The keys come first so that they stay 8-byte aligned when the file is memory-mapped
+import struct
+import sys
+from array import array
+from typing import Iterable, NamedTuple, Tuple
+
+MAGIC: bytes = b"TDLS"
+VERSION: int = 1
+TODOLIST: int = 0
+SKIPLIST: int = 1
+KINDS: Tuple[str, ...] = ("ToDoList", "SkipList")  # Name of every kind, by number
+
+HEADER: struct.Struct = struct.Struct("<4sHBBIdQ4x")
+
+
+class SnapshotHeader(NamedTuple):
+    kind: int
+    height: int
+    parameter: float
+    count: int
+
+
+def write_snapshot(path: str, kind: int, height: int, parameter: float, nodes: Iterable[Tuple[int, int]]) -> int:
+    # nodes are the (key, levels above the bottom one) pairs in sorted order; returns their number
+    keys: array = array('q')
+    levels: array = array('B')
+    for key, level in nodes:
+        keys.append(key)  # OverflowError / TypeError if the key is not a 64-bit integer
+        levels.append(level)
+    if sys.byteorder == "big":
+        keys.byteswap()
+    with open(path, "wb") as file:
+        file.write(HEADER.pack(MAGIC, VERSION, kind, 0, height, parameter, len(keys)))
+        keys.tofile(file)
+        levels.tofile(file)
+    return len(keys)
+
+
+def parse_header(buffer: bytes, kind: int) -> SnapshotHeader:
+    if len(buffer) < HEADER.size:
+        raise ValueError("Not a snapshot: file too short")
+    magic, version, file_kind, _, height, parameter, count = HEADER.unpack_from(buffer)
+    if magic != MAGIC:
+        raise ValueError("Not a snapshot: bad magic number")
+    if version != VERSION:
+        raise ValueError(f"Unsupported snapshot version {version} (expected {VERSION})")
+    if file_kind >= len(KINDS):
+        raise ValueError(f"Unknown snapshot kind {file_kind}")
+    if file_kind != kind:
+        raise ValueError(f"Snapshot of a {KINDS[file_kind]}, not of a {KINDS[kind]}")
+    if len(buffer) < HEADER.size + 9 * count:
+        raise ValueError("Truncated snapshot")
+    return SnapshotHeader(file_kind, height, parameter, count)
+
+
+def read_snapshot(path: str, kind: int) -> Tuple[SnapshotHeader, array, array]:
+    # Header, keys and levels of a snapshot, read in full (FrozenToDoList maps the file instead)
+    with open(path, "rb") as file:
+        buffer: bytes = file.read()
+    header: SnapshotHeader = parse_header(buffer, kind)
+    keys: array = array('q')
+    keys.frombytes(buffer[HEADER.size:HEADER.size + 8 * header.count])
+    if sys.byteorder == "big":
+        keys.byteswap()
+    levels: array = array('B')
+    levels.frombytes(buffer[HEADER.size + 8 * header.count:HEADER.size + 9 * header.count])
+    return header, keys, levels
@@ -0,0 +1,57 @@
+#Opt-in statistics of SkipList, ToDoList and WorkingToDoList (built with stats=True).
+#The structures never test whether stats are on inside their search loops: when they are, the descents are replaced
+#at construction by counting copies, which report here once per descent
+from typing import Any, Dict, Optional
+
+
+class OperationStats:
+    def __init__(self) -> None:
+        self.reset()
+
+    def reset(self) -> None:
+        self.descents: int = 0  # Number of searches from the top (one per insert, delete, search, map access, rank or select)
+        self.hops: int = 0  # Pointers followed over all the descents
+        self.comparisons: int = 0  # Key comparisons over all the descents
+        self.max_hops: int = 0  # Longest descent
+        self.max_comparisons: int = 0
+        self.scanned: int = 0  # Nodes streamed along the bottom level by irange and items, after their descent
+        self.rebuilds: int = 0  # Number of partial rebuildings
+        self.special_indexes: Dict[int, int] = {}  # Number of rebuildings by special index
+        self.last_special_index: Optional[int] = None
+        self.relinked: int = 0  # Pointers rewritten over all the rebuildings
+        self.max_relinked: int = 0  # Largest rebuilding
+
+    def record_descent(self, hops: int, comparisons: int) -> None:
+        self.descents += 1
+        self.hops += hops
+        self.comparisons += comparisons
+        if hops > self.max_hops:
+            self.max_hops = hops
+        if comparisons > self.max_comparisons:
+            self.max_comparisons = comparisons
+
+    def record_rebuild(self, index: int, relinked: int) -> None:
+        self.rebuilds += 1
+        self.special_indexes[index] = self.special_indexes.get(index, 0) + 1
+        self.last_special_index = index
+        self.relinked += relinked
+        if relinked > self.max_relinked:
+            self.max_relinked = relinked
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "descents": self.descents,
+            "hops": self.hops,
+            "comparisons": self.comparisons,
+            "hops_per_descent": self.hops / self.descents if self.descents else 0.0,
+            "comparisons_per_descent": self.comparisons / self.descents if self.descents else 0.0,
+            "max_hops": self.max_hops,
+            "max_comparisons": self.max_comparisons,
+            "scanned": self.scanned,
+            "rebuilds": self.rebuilds,
+            "special_indexes": dict(self.special_indexes),
+            "last_special_index": self.last_special_index,
+            "relinked": self.relinked,
+            "relinked_per_rebuild": self.relinked / self.rebuilds if self.rebuilds else 0.0,
+            "max_relinked": self.max_relinked,
+        }
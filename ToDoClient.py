@@ -0,0 +1,104 @@
+#asyncio client of ToDoServer. Calls do not wait for each other: every one writes its request straight away and gets
+#a future that the reader task resolves when its answer arrives (the server answers in order), so the coroutines
+#sharing a connection pipeline their requests, e.g.
+#    client = await ToDoClient.connect(port=7070)
+#    found = await asyncio.gather(*(client.search("users", key) for key in keys))
+#A failed request raises ValueError with the message of the server
+import asyncio
+from collections import deque
+from typing import Deque, List, Optional
+
+from ToDoServer import MAX_LINE
+
+
+class ToDoClient:
+    def __init__(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        self.__reader: asyncio.StreamReader = reader
+        self.__writer: asyncio.StreamWriter = writer
+        self.__waiting: Deque[asyncio.Future] = deque()  # One future per request sent and not answered yet
+        self.__receiver: asyncio.Task = asyncio.create_task(self.__receive())
+
+    @classmethod
+    async def connect(cls, host: str = "127.0.0.1", port: int = 7070, path: Optional[str] = None) -> "ToDoClient":
+        # Connects to path (Unix socket) if it is given, to host:port otherwise
+        if path is not None:
+            reader, writer = await asyncio.open_unix_connection(path, limit=MAX_LINE)
+        else:
+            reader, writer = await asyncio.open_connection(host, port, limit=MAX_LINE)
+        return cls(reader, writer)
+
+    async def close(self) -> None:
+        self.__writer.close()
+        await self.__writer.wait_closed()
+        await self.__receiver
+
+    async def __aenter__(self) -> "ToDoClient":
+        return self
+
+    async def __aexit__(self, *exc_info: object) -> None:
+        await self.close()
+
+    async def __receive(self) -> None:
+        try:
+            while line := await self.__reader.readline():
+                # The answer still has to be consumed when its caller gave up on it (cancelled, timed out), so that
+                # the next answers go to their own futures
+                future: asyncio.Future = self.__waiting.popleft()
+                if not future.done():
+                    future.set_result(line.decode().rstrip("\n"))
+        except ConnectionError:
+            pass
+        error: ConnectionError = ConnectionError("Connection closed by the server")
+        while self.__waiting:
+            future = self.__waiting.popleft()
+            if not future.done():
+                future.set_exception(error)
+
+    def __send(self, request: str) -> "asyncio.Future[str]":
+        if self.__receiver.done():
+            raise ConnectionError("Connection closed")
+        future: asyncio.Future = asyncio.get_running_loop().create_future()
+        self.__waiting.append(future)
+        self.__writer.write(request.encode() + b"\n")
+        return future
+
+    async def __call(self, request: str) -> List[str]:
+        # Fields of the answer after OK
+        answer: str = await self.__send(request)
+        if not answer.startswith("OK"):
+            raise ValueError(answer[4:] if answer.startswith("ERR ") else answer)
+        return answer.split()[1:]
+
+    async def drain(self) -> None:
+        # Waits until the socket buffer has room again, for callers that send a lot without awaiting the answers
+        await self.__writer.drain()
+
+    async def insert(self, name: str, key: int) -> None:
+        await self.__call(f"INSERT {name} {key:d}")
+
+    async def insert_many(self, name: str, keys: List[int]) -> None:
+        if keys:
+            await self.__call(f"INSERT {name} " + " ".join(f"{key:d}" for key in keys))
+
+    async def delete(self, name: str, key: int) -> None:
+        await self.__call(f"DELETE {name} {key:d}")
+
+    async def delete_many(self, name: str, keys: List[int]) -> None:
+        if keys:
+            await self.__call(f"DELETE {name} " + " ".join(f"{key:d}" for key in keys))
+
+    async def search(self, name: str, key: int) -> bool:
+        return (await self.__call(f"SEARCH {name} {key:d}")) == ["1"]
+
+    async def search_many(self, name: str, keys: List[int]) -> List[bool]:
+        if not keys:
+            return []
+        return [field == "1" for field in await self.__call(f"SEARCH {name} " + " ".join(f"{key:d}" for key in keys))]
+
+    async def irange(self, name: str, lo: Optional[int] = None, hi: Optional[int] = None) -> List[int]:
+        # Keys between lo and hi, both inclusive (None meaning unbounded)
+        bounds: str = " ".join("-" if bound is None else f"{bound:d}" for bound in (lo, hi))
+        return [int(field) for field in await self.__call(f"IRANGE {name} {bounds}")]
+
+    async def length(self, name: str) -> int:
+        return int((await self.__call(f"LEN {name}"))[0])
@@ -1,122 +1,696 @@
 
 #main difference between skiplist and todolist is that in skiplist the promotion is randomi while in skiplist everything is controlled by 
 #respecting the third rule?--> if not respected I have to partial rebuild 
-from typing import List, Optional
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
 from math import inf
+from Stats import OperationStats
+from Tracing import VERBOSE_EVENTS, Hook, Tracer, print_hook
+from Snapshot import TODOLIST, read_snapshot, write_snapshot
+
+_MISSING: Any = object()  # Default of pop, so that None can still be a default value
 
 
 class TDLNode:
-    def __init__(self, key: float, h: int) -> None:
+    __slots__ = ("key", "value", "next_nodes", "widths")
+
+    def __init__(self, key: float, h: int, value: Any = None) -> None:
         self.key: float = key
-        #This is a type hint indicating that the variable will be a list containing elements that can either be of type TDLNode or None
+        self.value: Any = value  # Payload of the key (map mode)
+        #The levels are nested (L0 ⊆ L1 ⊆ ... ⊆ Lh), so a node occupies Lh up to its highest level: next_nodes only
+        #covers those levels, bottom first, i.e. next_nodes[h - lvl] is the successor in Llvl.
+        #A new node starts in every level, partial rebuilding then shrinks or grows the list.
         self.next_nodes: List[Optional[TDLNode]] = [None] * (h + 1) #This creates a list with h + 1 elements, all initialized to None
+        #widths[h - lvl] is the number of Lh steps covered by next_nodes[h - lvl] (up to one past the last key if None)
+        self.widths: List[int] = [1] * (h + 1)
 
 
 class ToDoList:
-    def __init__(self, h: int, epsilon: float, verbose: bool = False) -> None:
-        self.h: int = h  # Height of the ToDoList (Maximum level)
+    def __init__(self, h: int, epsilon: float, verbose: bool = False, auto_height: bool = False, stats: bool = False) -> None:
+        self.h: int = h  # Height of the ToDoList (Maximum level), the initial one if auto_height
         self.epsilon: float = epsilon  # Arbitrary value
-        self.verbose: bool = verbose  # Verbose mode
+        self.verbose: bool = verbose  # Verbose mode (prints the operations and the changes of height, not the rebuilds)
+        self.auto_height: bool = auto_height  # If set, h follows log_{2 - epsilon}(n) as the list grows and shrinks
         #self.sentinel has type TDLNode nad is the first node of L0
         self.sentinel: TDLNode = TDLNode(-inf, self.h)  # Header node (dummy node)--> the node from where i start everything
+        self.level_sizes: List[int] = [0] * (self.h + 1)  # Number of nodes in each level L0, ..., Lh (kept up to date incrementally)
+        self.thresholds: List[float] = [(2 - self.epsilon) ** lvl for lvl in range(self.h + 1)]  # Size bounds (2 - epsilon) ** lvl
+        # Opt-in statistics: the descents are swapped for counting copies, so that the plain ones stay branch free
+        self.stats: Optional[OperationStats] = OperationStats() if stats else None
+        if stats:
+            self.__find_predecessors = self.__counted_find_predecessors
+            self.__find_node = self.__counted_find_node
+            self.__count_below = self.__counted_count_below
+            self.__select_node = self.__counted_select_node
+            self.__range_nodes = self.__counted_range_nodes
+            self.search_many = self.__counted_search_many
+        # Tracing hooks, None while there are none so that the operations only pay a None check
+        self.tracer: Optional[Tracer] = None
+        if verbose:
+            for event in VERBOSE_EVENTS:
+                self.add_hook(event, print_hook)
+
+    def add_hook(self, event: str, hook: Hook) -> None:
+        # hook(event, data) is called on every event of this list (see Tracing.EVENTS)
+        if self.tracer is None:
+            self.tracer = Tracer()
+        self.tracer.add(event, hook)
+
+    def remove_hook(self, event: str, hook: Hook) -> None:
+        if self.tracer is None:
+            raise ValueError(f"Hook not registered for {event!r}")
+        self.tracer.remove(event, hook)
+        if not self.tracer.hooks:
+            self.tracer = None  # Back to the plain path
+
+    def stats_snapshot(self) -> Dict[str, Any]:
+        if self.stats is None:
+            raise ValueError("Stats are disabled, build the list with stats=True")
+        return self.stats.snapshot()
+
+    def reset_stats(self) -> None:
+        if self.stats is None:
+            raise ValueError("Stats are disabled, build the list with stats=True")
+        self.stats.reset()
+
+    def __len__(self) -> int:
+        # Every key lives in the bottom level Lh
+        return self.level_sizes[self.h]
+
+    @classmethod
+    def from_sorted(cls, keys: Iterable[int], h: int, epsilon: float, verbose: bool = False,
+                    auto_height: bool = False, stats: bool = False) -> "ToDoList":
+        # Builds the whole list in a single pass over the sorted keys, with the shape a full partial rebuilding gives:
+        # Lh-1 holds every second key of Lh, Lh-2 every fourth one, and so on, so the i-th key (counting from 1)
+        # sits in Lh, ..., Lh-t where 2 ** t is the largest power of two dividing i
+        todolist: ToDoList = cls(h, epsilon, verbose, auto_height, stats)
+        count: int = todolist.__link_sorted(keys)
+
+        if auto_height:
+            todolist.__check_height()
+
+        print(f"Loaded {count} keys") if verbose else None
+        return todolist
+
+    def __link_sorted(self, keys: Iterable[int], depths: Optional[Iterator[int]] = None) -> int:
+        # Appends the sorted keys to the empty list, each one reaching depths (levels above Lh, the from_sorted
+        # shape if not given); returns the number of keys
+        h: int = self.h
+        tails: List[TDLNode] = [self.sentinel] * (h + 1)  # Last node of each level, bottom first
+        tail_positions: List[int] = [0] * (h + 1)
+        count: int = 0
+        previous: float = -inf
+        for key in keys:
+            if key < previous:
+                raise ValueError(f"Keys must be sorted, got {key} after {previous}")
+            previous = key
+            count += 1
+            depth: int = min((count & -count).bit_length() - 1 if depths is None else next(depths), h)
+            node: TDLNode = TDLNode(key, depth)
+            for d in range(depth + 1):
+                tails[d].next_nodes[d] = node
+                tails[d].widths[d] = count - tail_positions[d]
+                tails[d] = node
+                tail_positions[d] = count
+                self.level_sizes[h - d] += 1
+
+        for d in range(h + 1):
+            tails[d].widths[d] = count + 1 - tail_positions[d]
+        return count
 
-    def __find_predecessors(self, key: int) -> List[Optional[TDLNode]]:
+    def save(self, path: str) -> None:
+        # Versioned binary snapshot (see Snapshot.py): the sorted keys and the levels of their nodes, which load
+        # gives back as they are, and FrozenToDoList.open maps read-only. The values of map mode are not saved
+        def nodes() -> Iterator[Tuple[int, int]]:
+            node: Optional[TDLNode] = self.sentinel.next_nodes[0]
+            while node is not None:
+                yield node.key, len(node.next_nodes) - 1
+                node = node.next_nodes[0]
+
+        count: int = write_snapshot(path, TODOLIST, self.h, self.epsilon, nodes())
+        print(f"Saved {count} keys") if self.verbose else None
+
+    @classmethod
+    def load(cls, path: str, verbose: bool = False, auto_height: bool = False, stats: bool = False) -> "ToDoList":
+        # The list written by save, with the same height, epsilon and levels
+        header, keys, levels = read_snapshot(path, TODOLIST)
+        todolist: ToDoList = cls(header.height, header.parameter, verbose, auto_height, stats)
+        count: int = todolist.__link_sorted(keys, iter(levels))
+
+        if auto_height:
+            todolist.__check_height()
+
+        print(f"Loaded {count} keys") if verbose else None
+        return todolist
+
+    def __find_predecessors(self, key: int, start: Optional[TDLNode] = None, start_rank: int = 0,
+                            ranks: Optional[List[int]] = None) -> List[Optional[TDLNode]]:
         predecessors: List[Optional[TDLNode]] = [None] * (self.h + 1) #I initialize an empty list for storing the predecessors
-        current: TDLNode = self.sentinel #I start iterating from the first node of L0 (sentinel)
-        for lvl in range(self.h + 1):
+        #I start iterating from the first node of L0 (sentinel), or from start: a node of L0 whose key is at most key
+        #and whose position is start_rank. If ranks is given, it receives the positions of the predecessors
+        current: TDLNode = self.sentinel if start is None else start
+        position: int = start_rank
+
+        # For the top level only: L0 can hold more than one node once n exceeds (2 - epsilon) ** h
+        while (nxt := current.next_nodes[self.h]) is not None and nxt.key < key:
+            position += current.widths[self.h]
+            current = nxt
+        predecessors[0] = current
+        if ranks is not None:
+            ranks[0] = position
+
+        for lvl in range(1, self.h + 1):
             # Since at most only one node in two is not promoted to the next level,
             # a single comparison is sufficient to determine the predecessor at each level.
-            predecessors[lvl] = current if (nxt := current.next_nodes[lvl]) is None or nxt.key >= key else nxt
-            current = predecessors[lvl]
+            if (nxt := current.next_nodes[self.h - lvl]) is not None and nxt.key < key:
+                position += current.widths[self.h - lvl]
+                current = nxt
+            predecessors[lvl] = current
+            if ranks is not None:
+                ranks[lvl] = position
 
         return predecessors
 
+    def __counted_find_predecessors(self, key: int, start: Optional[TDLNode] = None, start_rank: int = 0,
+                                    ranks: Optional[List[int]] = None) -> List[Optional[TDLNode]]:
+        # Same as __find_predecessors, counting the pointers followed and the key comparisons
+        predecessors: List[Optional[TDLNode]] = [None] * (self.h + 1)
+        current: TDLNode = self.sentinel if start is None else start
+        position: int = start_rank
+        hops: int = 0
+        comparisons: int = 0
+
+        while (nxt := current.next_nodes[self.h]) is not None:
+            comparisons += 1
+            if nxt.key >= key:
+                break
+            position += current.widths[self.h]
+            current = nxt
+            hops += 1
+        predecessors[0] = current
+        if ranks is not None:
+            ranks[0] = position
+
+        for lvl in range(1, self.h + 1):
+            if (nxt := current.next_nodes[self.h - lvl]) is not None:
+                comparisons += 1
+                if nxt.key < key:
+                    position += current.widths[self.h - lvl]
+                    current = nxt
+                    hops += 1
+            predecessors[lvl] = current
+            if ranks is not None:
+                ranks[lvl] = position
+
+        self.stats.record_descent(hops, comparisons)
+        return predecessors
+
     def __check_rebuilding(self) -> None:
+        if self.auto_height:
+            self.__check_height()
         # If there is more than one node in the top level, we partially rebuild the list, in order to respect Property 1--> |L0|<=1
-        if self.sentinel.next_nodes[0] is not None and self.sentinel.next_nodes[0].next_nodes[0] is not None:
+        if self.level_sizes[0] > 1:
             self.__partial_rebuilding()
 
-    def __partial_rebuilding(self) -> None:
-        def __compute_length(lvl: int) -> int:
-            length: int = 0
-            node: Optional[TDLNode] = self.sentinel.next_nodes[lvl]
-            while node is not None:
-                length += 1
-                node = node.next_nodes[lvl]
-            return length
+    def __check_height(self) -> None:
+        # The height only changes once n has moved by a factor 2 - epsilon since the last change, and a change costs
+        # O(n), so it is amortized O(1) per operation.
+        # We grow as soon as n > (2 - epsilon) ** h, and shrink once n <= (2 - epsilon) ** (h - 2), to h - 1 or less
+        # (never below 2, the target height of a tiny list being 1)
+        size: int = self.level_sizes[self.h]
+        if size > self.thresholds[self.h]:
+            self.__grow(self.__target_height(size))
+        elif self.h > 2 and size <= self.thresholds[self.h - 2]:
+            self.__shrink(self.__target_height(size) + 1)
+
+    def __target_height(self, size: int) -> int:
+        # Smallest height (at least 1) such that (2 - epsilon) ** h >= size
+        h: int = 1
+        while (2 - self.epsilon) ** h < size:
+            h += 1
+        return h
+
+    def __grow(self, h: int) -> None:
+        # The new levels are added on top, which does not move the existing ones from the bottom (the nodes are stored
+        # bottom first), so only the sentinel gets new pointers; then the whole list is rebuilt from Lh
+        added: int = h - self.h
+        self.sentinel.next_nodes.extend([None] * added)
+        self.sentinel.widths.extend([self.level_sizes[self.h] + 1] * added)
+        self.level_sizes[:0] = [0] * added
+        print(f"Height grown from {self.h} to {h}") if self.verbose else None
+        self.h = h
+        self.thresholds = [(2 - self.epsilon) ** lvl for lvl in range(self.h + 1)]
+        self.__partial_rebuilding(self.h)
 
+    def __shrink(self, h: int) -> None:
+        # The top levels are dropped: the nodes that reach them lose their pointers above depth h (they are all in
+        # the level of depth h + 1); if the new L0 holds more than one node, __check_rebuilding fixes it right after
+        node: Optional[TDLNode] = self.sentinel.next_nodes[h + 1]
+        while node is not None:
+            nxt: Optional[TDLNode] = node.next_nodes[h + 1]
+            del node.next_nodes[h + 1:]
+            del node.widths[h + 1:]
+            node = nxt
+        del self.sentinel.next_nodes[h + 1:]
+        del self.sentinel.widths[h + 1:]
+        del self.level_sizes[:self.h - h]
+        print(f"Height shrunk from {self.h} to {h}") if self.verbose else None
+        self.h = h
+        self.thresholds = [(2 - self.epsilon) ** lvl for lvl in range(self.h + 1)]
+
+    def __partial_rebuilding(self, index: Optional[int] = None) -> None:
         def __compute_special_index() -> int:
             for lvl in range(self.h + 1):
-                if __compute_length(lvl) <= (2 - self.epsilon) ** lvl:
+                if self.level_sizes[lvl] <= self.thresholds[lvl]:
                     return lvl
             return self.h
 
-        # We find the smallest index i such that |Lindex| < (2 - epsilon) ** index
-        index: int = __compute_special_index()
+        # We find the smallest index i such that |Lindex| < (2 - epsilon) ** index (unless the caller gives it)
+        if index is None:
+            index = __compute_special_index()
+
+        # The nodes of Lindex drop their pointers above Lindex, the promoted ones get them back below
+        depth: int = self.h - index
+        node: Optional[TDLNode] = self.sentinel.next_nodes[depth]
+        while node is not None:
+            del node.next_nodes[depth + 1:]
+            del node.widths[depth + 1:]
+            node = node.next_nodes[depth]
 
         # We then rebuild the lists L0, ..., Lindex-1 in a bottom up fashion;
         # Lindex-1 gets every second element from Lindex (starting with the second),
         # Lindex-2 gets every second element from Lindex-1, and so on down to L0
+        # (a pointer of Llvl-1 jumps over two pointers of Llvl, so its width is the sum of theirs)
         for lvl in range(index, 0, -1):
-            current: TDLNode = self.sentinel #I start from the first node (sentinel) of the list L_index
-            while (nxt := current.next_nodes[lvl]) is not None and (nxt_nxt := nxt.next_nodes[lvl]) is not None:
-                current.next_nodes[lvl - 1] = nxt_nxt
-                current = nxt_nxt
-            current.next_nodes[lvl - 1] = None
-
-    def insert(self, key: int) -> None:
+            depth = self.h - lvl
+            # The sentinel keeps all its pointers, every other promoted node gets one more pointer for Llvl-1
+            sentinel: TDLNode = self.sentinel
+            if (nxt := sentinel.next_nodes[depth]) is not None:
+                current: Optional[TDLNode] = nxt.next_nodes[depth]
+                sentinel.widths[depth + 1] = sentinel.widths[depth] + nxt.widths[depth]
+            else:
+                current = None
+                sentinel.widths[depth + 1] = sentinel.widths[depth]
+            sentinel.next_nodes[depth + 1] = current
+            if current is not None:
+                while (nxt := current.next_nodes[depth]) is not None and (nxt_nxt := nxt.next_nodes[depth]) is not None:
+                    current.next_nodes.append(nxt_nxt)
+                    current.widths.append(current.widths[depth] + nxt.widths[depth])
+                    current = nxt_nxt
+                current.next_nodes.append(None)
+                current.widths.append(current.widths[depth] + (nxt.widths[depth] if nxt is not None else 0))
+            self.level_sizes[lvl - 1] = self.level_sizes[lvl] // 2
 
-        # Find the correct positions to insert the new node
-        predecessors: List[Optional[TDLNode]] = self.__find_predecessors(key)
+        if self.stats is not None:
+            # Every node of L0, ..., Lindex-1 got a new pointer
+            self.stats.record_rebuild(index, sum(self.level_sizes[:index]))
+        if self.tracer is not None:
+            self.tracer.emit("rebuild", {"index": index, "height": self.h})
 
+    def __add_node(self, key: int, predecessors: List[Optional[TDLNode]], ranks: List[int], value: Any = None) -> TDLNode:
         # Create the new node
-        new_node: TDLNode = TDLNode(key, self.h)
+        new_node: TDLNode = TDLNode(key, self.h, value)
 
-        # We add the new node after each predecessor
+        # We add the new node after each predecessor (it sits right after the one of Lh, at position ranks[h] + 1)
         for lvl in range(self.h + 1):
-            new_node.next_nodes[lvl] = predecessors[lvl].next_nodes[lvl]
-            predecessors[lvl].next_nodes[lvl] = new_node
+            new_node.next_nodes[self.h - lvl] = predecessors[lvl].next_nodes[self.h - lvl]
+            predecessors[lvl].next_nodes[self.h - lvl] = new_node
+            new_node.widths[self.h - lvl] = predecessors[lvl].widths[self.h - lvl] - (ranks[self.h] - ranks[lvl])
+            predecessors[lvl].widths[self.h - lvl] = ranks[self.h] - ranks[lvl] + 1
+            self.level_sizes[lvl] += 1
+
+        return new_node
+
+    def __remove_node(self, key: int, predecessors: List[Optional[TDLNode]]) -> bool:
+        # The node of Lh to be deleted, the first one with this key (duplicates further on may reach higher levels,
+        # so the levels above are matched on the node, not on the key)
+        victim: Optional[TDLNode] = predecessors[self.h].next_nodes[0]
+        if victim is None or victim.key != key:
+            return False
+        # The one to be promoted in place of the element to be deleted
+        substitute = victim.next_nodes[0]
+
+        # From the bottom up, so that the substitute grows one pointer at a time
+        for lvl in range(self.h, -1, -1):
+            depth: int = self.h - lvl
+            if predecessors[lvl].next_nodes[depth] is victim:
+                predecessors[lvl].next_nodes[depth] = substitute
+                successor = victim.next_nodes[depth]
+                if successor is not substitute:
+                    # The substitute is promoted to this level (taking the place of the target), so the level keeps its size
+                    substitute.next_nodes.append(successor)
+                    substitute.widths.append(victim.widths[depth] - 1)
+                else:
+                    predecessors[lvl].widths[depth] += victim.widths[depth] - 1
+                    self.level_sizes[lvl] -= 1
+            else:
+                # The levels are nested: the target is not in the levels above either, their pointers jump over it
+                predecessors[lvl].widths[depth] -= 1
+        return True
+
+    def insert(self, key: int, value: Any = None) -> None:
+        # Find the correct positions to insert the new node
+        ranks: List[int] = [0] * (self.h + 1)
+        self.__add_node(key, self.__find_predecessors(key, ranks=ranks), ranks, value)
 
         self.__check_rebuilding()
 
-        print(f"Inserted key {key}") if self.verbose else None
+        if self.tracer is not None:
+            self.tracer.emit("insert", {"key": key})
 
-    def delete(self, key: int) -> None:
-        predecessors: List[Optional[TDLNode]] = self.__find_predecessors(key)
+    def insert_many(self, keys: Iterable[int]) -> None:
+        # The batch is sorted so that each key is searched from the node of the previous one, which sits in every
+        # level (L0 included): the top level is walked once for the whole batch, and we only rebuild at the end
+        start: TDLNode = self.sentinel
+        start_rank: int = 0
+        ranks: List[int] = [0] * (self.h + 1)
+        tracer: Optional[Tracer] = self.tracer
+        for key in sorted(keys):
+            start = self.__add_node(key, self.__find_predecessors(key, start, start_rank, ranks), ranks)
+            start_rank = ranks[self.h] + 1
+            if tracer is not None:
+                tracer.emit("insert", {"key": key})
 
-        # The one to be promoted in place of the element to be deleted
-        substitute = predecessors[self.h].next_nodes[self.h].next_nodes[self.h] \
-            if predecessors[self.h].next_nodes[self.h] is not None \
-            else None
+        self.__check_rebuilding()
 
-        for lvl in range(self.h + 1):
-            if (target := predecessors[lvl].next_nodes[lvl]) is not None and target.key == key:
-                predecessors[lvl].next_nodes[lvl] = substitute
-                successor = target.next_nodes[lvl]
-                if successor is not None and successor.key != substitute.key:
-                    substitute.next_nodes[lvl] = successor
+    def delete(self, key: int) -> None:
+        found: bool = self.__remove_node(key, self.__find_predecessors(key))
 
         self.__check_rebuilding()
 
-        print(f"Deleted key {key}") if self.verbose else None
+        if self.tracer is not None:
+            self.tracer.emit("delete", {"key": key, "found": found})
+
+    def delete_many(self, keys: Iterable[int]) -> None:
+        # Same idea as insert_many: the predecessor in L0 of a deleted key is left in place, so the next
+        # (larger) key is searched from there
+        start: TDLNode = self.sentinel
+        tracer: Optional[Tracer] = self.tracer
+        for key in sorted(keys):
+            predecessors: List[Optional[TDLNode]] = self.__find_predecessors(key, start)
+            found: bool = self.__remove_node(key, predecessors)
+            start = predecessors[0]
+            if tracer is not None:
+                tracer.emit("delete", {"key": key, "found": found})
+
+        self.__check_rebuilding()
 
     def search(self, key: int) -> bool:
         predecessors: List[Optional[TDLNode]] = self.__find_predecessors(key)
-        if predecessors[self.h].next_nodes[self.h] is not None and predecessors[self.h].next_nodes[self.h].key == key:
-            print(f"Found key {key}") if self.verbose else None
-            return True
+        found: bool = predecessors[self.h].next_nodes[0] is not None and predecessors[self.h].next_nodes[0].key == key
+        if self.tracer is not None:
+            self.tracer.emit("search_hit" if found else "search_miss", {"key": key})
+        return found
+
+    def search_many(self, keys: Iterable[int]) -> List[bool]:
+        # The queries are answered in sorted order, each one starting from the predecessors of the previous one:
+        # we climb from Lh while those predecessors fall short of the key, then go back down with single steps,
+        # so a query costs O(log d) where d is the distance from the previous one.
+        # The answers come back in the order of the queries.
+        keys = list(keys)
+        found: List[bool] = [False] * len(keys)
+        path: List[TDLNode] = [self.sentinel] * (self.h + 1)  # Predecessors of the previous query, L0 first
+        for position in sorted(range(len(keys)), key=keys.__getitem__):
+            key = keys[position]
+            lvl: int = self.h
+            while lvl > 0 and (nxt := path[lvl].next_nodes[self.h - lvl]) is not None and nxt.key < key:
+                lvl -= 1
+
+            current: TDLNode = path[lvl]
+            if lvl == 0:
+                while (nxt := current.next_nodes[self.h]) is not None and nxt.key < key:
+                    current = nxt
+            path[lvl] = current
+
+            for lvl in range(lvl + 1, self.h + 1):
+                if (nxt := current.next_nodes[self.h - lvl]) is not None and nxt.key < key:
+                    current = nxt
+                path[lvl] = current
+
+            found[position] = (nxt := current.next_nodes[0]) is not None and nxt.key == key
+
+        if self.tracer is not None:
+            for key, hit in zip(keys, found):
+                self.tracer.emit("search_hit" if hit else "search_miss", {"key": key})
+        return found
+
+    def __counted_search_many(self, keys: Iterable[int]) -> List[bool]:
+        # Counting copy of search_many: every query is one descent, starting where the climb stops
+        keys = list(keys)
+        found: List[bool] = [False] * len(keys)
+        path: List[TDLNode] = [self.sentinel] * (self.h + 1)
+        for position in sorted(range(len(keys)), key=keys.__getitem__):
+            key = keys[position]
+            hops: int = 0
+            comparisons: int = 0
+            lvl: int = self.h
+            while lvl > 0 and (nxt := path[lvl].next_nodes[self.h - lvl]) is not None:
+                comparisons += 1
+                if nxt.key >= key:
+                    break
+                lvl -= 1
+
+            current: TDLNode = path[lvl]
+            if lvl == 0:
+                while (nxt := current.next_nodes[self.h]) is not None:
+                    comparisons += 1
+                    if nxt.key >= key:
+                        break
+                    current = nxt
+                    hops += 1
+            path[lvl] = current
+
+            for lvl in range(lvl + 1, self.h + 1):
+                if (nxt := current.next_nodes[self.h - lvl]) is not None:
+                    comparisons += 1
+                    if nxt.key < key:
+                        current = nxt
+                        hops += 1
+                path[lvl] = current
+
+            if (nxt := current.next_nodes[0]) is not None:
+                comparisons += 1
+                found[position] = nxt.key == key
+            self.stats.record_descent(hops, comparisons)
+
+        if self.tracer is not None:
+            for key, hit in zip(keys, found):
+                self.tracer.emit("search_hit" if hit else "search_miss", {"key": key})
+        return found
+
+    # Map mode: every key carries a value, stored in its node, so a single descent answers both
+    # the membership and the value
+
+    def __find_node(self, key: int) -> Optional[TDLNode]:
+        current: TDLNode = self.sentinel
+        while (nxt := current.next_nodes[self.h]) is not None and nxt.key < key:
+            current = nxt
+        for lvl in range(1, self.h + 1):
+            if (nxt := current.next_nodes[self.h - lvl]) is not None and nxt.key < key:
+                current = nxt
+        node: Optional[TDLNode] = current.next_nodes[0]
+        return node if node is not None and node.key == key else None
+
+    def __counted_find_node(self, key: int) -> Optional[TDLNode]:
+        # The map descent is the same as __find_predecessors, so the counting copy of the latter does it
+        node: Optional[TDLNode] = self.__counted_find_predecessors(key)[self.h].next_nodes[0]
+        return node if node is not None and node.key == key else None
+
+    def __contains__(self, key: int) -> bool:
+        return self.__find_node(key) is not None
+
+    def __getitem__(self, key: int) -> Any:
+        if (node := self.__find_node(key)) is None:
+            raise KeyError(key)
+        return node.value
+
+    def get(self, key: int, default: Any = None) -> Any:
+        node: Optional[TDLNode] = self.__find_node(key)
+        return node.value if node is not None else default
+
+    def __setitem__(self, key: int, value: Any) -> None:
+        ranks: List[int] = [0] * (self.h + 1)
+        predecessors: List[Optional[TDLNode]] = self.__find_predecessors(key, ranks=ranks)
+        if (node := predecessors[self.h].next_nodes[0]) is not None and node.key == key:
+            node.value = value
         else:
-            print(f"Key {key} not found") if self.verbose else None
-            return False
+            self.__add_node(key, predecessors, ranks, value)
+            self.__check_rebuilding()
+            if self.tracer is not None:
+                self.tracer.emit("insert", {"key": key})
+
+    def setdefault(self, key: int, default: Any = None) -> Any:
+        ranks: List[int] = [0] * (self.h + 1)
+        predecessors: List[Optional[TDLNode]] = self.__find_predecessors(key, ranks=ranks)
+        if (node := predecessors[self.h].next_nodes[0]) is not None and node.key == key:
+            return node.value
+        self.__add_node(key, predecessors, ranks, default)
+        self.__check_rebuilding()
+        if self.tracer is not None:
+            self.tracer.emit("insert", {"key": key})
+        return default
+
+    def pop(self, key: int, default: Any = _MISSING) -> Any:
+        predecessors: List[Optional[TDLNode]] = self.__find_predecessors(key)
+        if (node := predecessors[self.h].next_nodes[0]) is None or node.key != key:
+            if default is _MISSING:
+                raise KeyError(key)
+            return default
+        self.__remove_node(key, predecessors)
+        self.__check_rebuilding()
+        if self.tracer is not None:
+            self.tracer.emit("delete", {"key": key, "found": True})
+        return node.value
+
+    def items(self, lo: Optional[int] = None, hi: Optional[int] = None,
+              inclusive: Tuple[bool, bool] = (True, True)) -> Iterator[Tuple[int, Any]]:
+        # Lazily yields the (key, value) pairs between lo and hi, like irange
+        for node in self.__range_nodes(lo, hi, inclusive):
+            yield node.key, node.value
+
+    def __iter__(self) -> Iterator[int]:
+        node: Optional[TDLNode] = self.sentinel.next_nodes[0]
+        while node is not None:
+            yield node.key
+            node = node.next_nodes[0]
+
+    def __range_nodes(self, lo: Optional[int], hi: Optional[int], inclusive: Tuple[bool, bool]) -> Iterator[TDLNode]:
+        # Lazily yields the nodes between lo and hi (None meaning unbounded): one descent to find lo, then Lh is streamed
+        node: Optional[TDLNode] = self.sentinel.next_nodes[0] if lo is None \
+            else self.__find_predecessors(lo)[self.h].next_nodes[0]
+        if lo is not None and not inclusive[0]:
+            while node is not None and node.key <= lo:
+                node = node.next_nodes[0]
+        while node is not None and (hi is None or node.key < hi or (inclusive[1] and node.key == hi)):
+            yield node
+            node = node.next_nodes[0]
+
+    def __counted_range_nodes(self, lo: Optional[int], hi: Optional[int],
+                              inclusive: Tuple[bool, bool]) -> Iterator[TDLNode]:
+        # Counting copy of __range_nodes: the descent to lo is counted by __find_predecessors, the nodes streamed here
+        for node in ToDoList.__range_nodes(self, lo, hi, inclusive):
+            self.stats.scanned += 1
+            yield node
+
+    def irange(self, lo: Optional[int] = None, hi: Optional[int] = None,
+               inclusive: Tuple[bool, bool] = (True, True)) -> Iterator[int]:
+        for node in self.__range_nodes(lo, hi, inclusive):
+            yield node.key
+
+    def successor(self, key: int) -> Optional[int]:
+        # Smallest key strictly greater than key, None if there is none
+        node: Optional[TDLNode] = self.__find_predecessors(key)[self.h].next_nodes[0]
+        while node is not None and node.key <= key:
+            node = node.next_nodes[0]
+        return node.key if node is not None else None
+
+    def predecessor(self, key: int) -> Optional[int]:
+        # Largest key strictly smaller than key, None if there is none
+        node: TDLNode = self.__find_predecessors(key)[self.h]
+        return node.key if node is not self.sentinel else None
+
+    def min(self) -> Optional[int]:
+        node: Optional[TDLNode] = self.sentinel.next_nodes[0]
+        return node.key if node is not None else None
+
+    def max(self) -> Optional[int]:
+        node: TDLNode = self.__find_predecessors(inf)[self.h]
+        return node.key if node is not self.sentinel else None
+
+    def __count_below(self, key: int, strict: bool = True) -> int:
+        # Number of keys smaller than key (or equal to it if not strict): the widths of the descent add up
+        current: TDLNode = self.sentinel
+        position: int = 0
+        while (nxt := current.next_nodes[self.h]) is not None and (nxt.key < key or not strict and nxt.key == key):
+            position += current.widths[self.h]
+            current = nxt
+        for lvl in range(1, self.h + 1):
+            if (nxt := current.next_nodes[self.h - lvl]) is not None and (nxt.key < key or not strict and nxt.key == key):
+                position += current.widths[self.h - lvl]
+                current = nxt
+        return position
+
+    def __counted_count_below(self, key: int, strict: bool = True) -> int:
+        current: TDLNode = self.sentinel
+        position: int = 0
+        hops: int = 0
+        comparisons: int = 0
+        while (nxt := current.next_nodes[self.h]) is not None:
+            comparisons += 1
+            if nxt.key > key or strict and nxt.key == key:
+                break
+            position += current.widths[self.h]
+            current = nxt
+            hops += 1
+        for lvl in range(1, self.h + 1):
+            if (nxt := current.next_nodes[self.h - lvl]) is not None:
+                comparisons += 1
+                if nxt.key < key or not strict and nxt.key == key:
+                    position += current.widths[self.h - lvl]
+                    current = nxt
+                    hops += 1
+        self.stats.record_descent(hops, comparisons)
+        return position
+
+    def rank(self, key: int) -> int:
+        # Index of key in sorted order (where it would go if it is not there)
+        return self.__count_below(key)
+
+    def select(self, index: int) -> int:
+        # Key of the given index in sorted order, negative indexes count from the end
+        size: int = len(self)
+        if index < 0:
+            index += size
+        if not 0 <= index < size:
+            raise IndexError(f"Index {index} out of range for {size} keys")
+        return self.__select_node(index).key
+
+    def __select_node(self, index: int) -> TDLNode:
+        # Same descent as __find_predecessors, comparing positions instead of keys
+        current: TDLNode = self.sentinel
+        position: int = 0
+        while (nxt := current.next_nodes[self.h]) is not None and position + current.widths[self.h] <= index + 1:
+            position += current.widths[self.h]
+            current = nxt
+        for lvl in range(1, self.h + 1):
+            if (nxt := current.next_nodes[self.h - lvl]) is not None and position + current.widths[self.h - lvl] <= index + 1:
+                position += current.widths[self.h - lvl]
+                current = nxt
+        return current
+
+    def __counted_select_node(self, index: int) -> TDLNode:
+        current: TDLNode = self.sentinel
+        position: int = 0
+        hops: int = 0
+        comparisons: int = 0
+        while (nxt := current.next_nodes[self.h]) is not None:
+            comparisons += 1
+            if position + current.widths[self.h] > index + 1:
+                break
+            position += current.widths[self.h]
+            current = nxt
+            hops += 1
+        for lvl in range(1, self.h + 1):
+            if (nxt := current.next_nodes[self.h - lvl]) is not None:
+                comparisons += 1
+                if position + current.widths[self.h - lvl] <= index + 1:
+                    position += current.widths[self.h - lvl]
+                    current = nxt
+                    hops += 1
+        self.stats.record_descent(hops, comparisons)
+        return current
+
+    def count_range(self, lo: int, hi: int, inclusive: Tuple[bool, bool] = (True, True)) -> int:
+        # Number of keys irange(lo, hi, inclusive) would yield, in two descents
+        return max(0, self.__count_below(hi, strict=not inclusive[1]) - self.__count_below(lo, strict=inclusive[0]))
 
     def __str__(self) -> str:
         output: str = "\nSkip List:\n"
         for lvl in range(self.h + 1):
-            current: Optional[TDLNode] = self.sentinel.next_nodes[lvl]
+            current: Optional[TDLNode] = self.sentinel.next_nodes[self.h - lvl]
             level_str: str = f"Level {lvl}: "
             while current is not None:
                 level_str += f"{current.key} -> "
-                current = current.next_nodes[lvl]
+                current = current.next_nodes[self.h - lvl]
             level_str += "None"
             output += level_str + "\n"
         return output
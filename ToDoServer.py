@@ -0,0 +1,214 @@
+#asyncio server sharing named ToDoLists between processes over a TCP or Unix socket, with a line protocol:
+#    INSERT <name> <key> [<key> ...]          -> OK
+#    DELETE <name> <key> [<key> ...]          -> OK
+#    SEARCH <name> <key> [<key> ...]          -> OK <0|1> [<0|1> ...]
+#    IRANGE <name> <lo|-> <hi|->              -> OK [<key> ...]      (inclusive bounds, - meaning unbounded)
+#    LEN <name>                               -> OK <number of keys>
+#and ERR <message> for a bad request. Keys are integers; a client may send any number of requests before reading the
+#answers (pipelining), which always come back in the order of its requests.
+#Every request goes through one queue: the batcher takes whatever has piled up (from every client) and applies each run
+#of consecutive inserts, deletes or searches on the same structure with a single insert_many / delete_many /
+#search_many, so a busy server does one sorted pass per run instead of one descent per key.
+#The structures are only touched by the batcher, in arrival order, so no lock is needed.
+#Run with python ToDoServer.py --port 7070 (or --unix /tmp/todo.sock); ToDoClient.py is the matching client
+import argparse
+import asyncio
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from ToDoList import ToDoList
+
+COMMANDS: Tuple[str, ...] = ("INSERT", "DELETE", "SEARCH", "IRANGE", "LEN")
+MAX_LINE: int = 1 << 20  # Longest request accepted
+
+
+def default_factory() -> ToDoList:
+    return ToDoList(h=4, epsilon=0.2, auto_height=True)
+
+
+def parse_request(line: bytes) -> Tuple[str, str, List[Optional[int]]]:
+    # (command, structure name, integer arguments), raising ValueError on anything malformed
+    parts: List[bytes] = line.split()
+    if len(parts) < 2:
+        raise ValueError("expected <command> <name> [arguments]")
+    command: str = parts[0].decode("ascii", "replace").upper()
+    if command not in COMMANDS:
+        raise ValueError(f"unknown command {command}")
+    name: str = parts[1].decode("utf-8", "replace")
+    if command == "IRANGE":
+        if len(parts) != 4:
+            raise ValueError("IRANGE takes two bounds")
+        return command, name, [None if bound == b"-" else int(bound) for bound in parts[2:]]
+    if command == "LEN":
+        if len(parts) != 2:
+            raise ValueError("LEN takes no argument")
+        return command, name, []
+    if len(parts) < 3:
+        raise ValueError(f"{command} takes at least one key")
+    return command, name, [int(key) for key in parts[2:]]
+
+
+class ToDoServer:
+    def __init__(self, structures: Optional[Dict[str, Any]] = None,
+                 factory: Optional[Callable[[], Any]] = default_factory, max_batch: int = 4096) -> None:
+        self.structures: Dict[str, Any] = structures if structures is not None else {}
+        self.factory: Optional[Callable[[], Any]] = factory  # Creates the structures on first use (None: unknown names are errors)
+        self.max_batch: int = max_batch  # Most requests applied per batch (1 turns the coalescing off)
+        self.batches: int = 0  # Number of batches applied, and requests in them
+        self.requests: int = 0
+        self.__pending: Optional[asyncio.Queue] = None  # (command, name, arguments, future) waiting for the batcher
+        self.__batcher: Optional[asyncio.Task] = None
+        self.__server: Optional[asyncio.AbstractServer] = None
+
+    async def start(self, host: Optional[str] = "127.0.0.1", port: int = 0, path: Optional[str] = None) -> None:
+        # Listens on path (Unix socket) if it is given, on host:port otherwise (port 0: any free port, see address)
+        self.__pending = asyncio.Queue()
+        self.__batcher = asyncio.create_task(self.__run_batches())
+        if path is not None:
+            self.__server = await asyncio.start_unix_server(self.__serve, path=path, limit=MAX_LINE)
+        else:
+            self.__server = await asyncio.start_server(self.__serve, host, port, limit=MAX_LINE)
+
+    @property
+    def address(self) -> Any:
+        # (host, port) or path the server listens on
+        return self.__server.sockets[0].getsockname()
+
+    async def serve_forever(self) -> None:
+        await self.__server.serve_forever()
+
+    async def close(self) -> None:
+        self.__server.close()
+        await self.__server.wait_closed()
+        self.__batcher.cancel()
+        try:
+            await self.__batcher
+        except asyncio.CancelledError:
+            pass
+
+    async def __aenter__(self) -> "ToDoServer":
+        return self
+
+    async def __aexit__(self, *exc_info: object) -> None:
+        await self.close()
+
+    async def __serve(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        # The answers are queued as futures in the order of the requests, and written by a task of their own so that
+        # reading goes on while the batcher works
+        answers: asyncio.Queue = asyncio.Queue()
+        replier: asyncio.Task = asyncio.create_task(self.__reply(answers, writer))
+        loop: asyncio.AbstractEventLoop = asyncio.get_running_loop()
+        buffer: bytes = b""
+        try:
+            while True:
+                chunk: bytes = await reader.read(1 << 16)
+                if not chunk:
+                    break
+                lines: List[bytes] = (buffer + chunk).split(b"\n")
+                buffer = lines.pop()
+                if len(buffer) > MAX_LINE:
+                    raise ValueError("request too long")
+                for line in lines:
+                    future: asyncio.Future = loop.create_future()
+                    try:
+                        command, name, arguments = parse_request(line)
+                    except ValueError as error:
+                        future.set_result(f"ERR {error}")
+                    else:
+                        self.__pending.put_nowait((command, name, arguments, future))
+                    answers.put_nowait(future)
+        except (ConnectionError, ValueError):
+            pass
+        finally:
+            answers.put_nowait(None)
+            await replier
+            writer.close()
+
+    @staticmethod
+    async def __reply(answers: asyncio.Queue, writer: asyncio.StreamWriter) -> None:
+        # Writes the answers as they are ready, and only waits for the socket once nothing else is ready
+        try:
+            while (future := await answers.get()) is not None:
+                writer.write((await future).encode() + b"\n")
+                if answers.empty():
+                    await writer.drain()
+        except ConnectionError:
+            pass
+
+    async def __run_batches(self) -> None:
+        while True:
+            batch: List[Tuple[str, str, List[Optional[int]], asyncio.Future]] = [await self.__pending.get()]
+            while len(batch) < self.max_batch and not self.__pending.empty():
+                batch.append(self.__pending.get_nowait())
+            self.apply(batch)
+            await asyncio.sleep(0)  # Let the connections read and answer before the next batch
+
+    def apply(self, batch: List[Tuple[str, str, List[Optional[int]], asyncio.Future]]) -> None:
+        # Runs of the same command on the same structure become one call; the runs keep their order, so every
+        # client sees its requests applied in the order it sent them
+        self.batches += 1
+        self.requests += len(batch)
+        start: int = 0
+        while start < len(batch):
+            command, name = batch[start][0], batch[start][1]
+            stop: int = start + 1
+            if command in ("INSERT", "DELETE", "SEARCH"):
+                while stop < len(batch) and batch[stop][0] == command and batch[stop][1] == name:
+                    stop += 1
+            try:
+                answers: List[str] = self.__execute(command, name, [request[2] for request in batch[start:stop]])
+            except Exception as error:  # A failed request must not stop the batcher, which serves every client
+                answers = [f"ERR {error}"] * (stop - start)
+            for request, answer in zip(batch[start:stop], answers):
+                if not request[3].cancelled():
+                    request[3].set_result(answer)
+            start = stop
+
+    def __structure(self, name: str) -> Any:
+        if name not in self.structures:
+            if self.factory is None:
+                raise KeyError(f"unknown structure {name}")
+            self.structures[name] = self.factory()
+        return self.structures[name]
+
+    def __execute(self, command: str, name: str, requests: List[List[Optional[int]]]) -> List[str]:
+        # One answer per request
+        structure: Any = self.__structure(name)
+        if command == "INSERT":
+            structure.insert_many([key for keys in requests for key in keys])
+            return ["OK"] * len(requests)
+        if command == "DELETE":
+            structure.delete_many([key for keys in requests for key in keys])
+            return ["OK"] * len(requests)
+        if command == "SEARCH":
+            found: List[bool] = structure.search_many([key for keys in requests for key in keys])
+            answers: List[str] = []
+            position: int = 0
+            for keys in requests:
+                answers.append("OK " + " ".join("1" if hit else "0" for hit in found[position:position + len(keys)]))
+                position += len(keys)
+            return answers
+        if command == "IRANGE":
+            lo, hi = requests[0]
+            return [" ".join(["OK"] + [str(key) for key in structure.irange(lo, hi)])]
+        return [f"OK {len(structure)}"]
+
+
+async def _main(host: str, port: int, path: Optional[str], max_batch: int) -> None:
+    server: ToDoServer = ToDoServer(max_batch=max_batch)
+    await server.start(host, port, path)
+    print(f"Serving on {server.address}", flush=True)
+    async with server:
+        await server.serve_forever()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Serve named ToDoLists over a socket")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=7070)
+    parser.add_argument("--unix", help="listen on this Unix socket instead of TCP")
+    parser.add_argument("--max-batch", type=int, default=4096)
+    args = parser.parse_args()
+    try:
+        asyncio.run(_main(args.host, args.port, args.unix, args.max_batch))
+    except KeyboardInterrupt:
+        pass
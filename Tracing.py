@@ -0,0 +1,52 @@
+#Tracing hooks of SkipList, ToDoList, WorkingToDoList and ArrayToDoList: per-instance callbacks called as
+#hook(event, data) with a small dictionary of data (the key, and what the structure knows about the operation).
+#While no hook is registered the structures hold no Tracer at all, so an operation costs a single None check
+from typing import Any, Callable, Dict, List, Tuple
+
+# insert: key (and level for SkipList); delete: key, found; search_hit: key (and level for WorkingToDoList);
+# search_miss: key; rebuild: index (the special index; and height for ToDoList)
+EVENTS: Tuple[str, ...] = ("insert", "delete", "search_hit", "search_miss", "rebuild")
+# The events verbose=True prints: WorkingToDoList prints them all, the other structures never printed their rebuilds
+VERBOSE_EVENTS: Tuple[str, ...] = ("insert", "delete", "search_hit", "search_miss")
+
+Hook = Callable[[str, Dict[str, Any]], None]
+
+
+class Tracer:
+    def __init__(self) -> None:
+        self.hooks: Dict[str, List[Hook]] = {}  # Callbacks of each event, in the order they were added
+
+    def add(self, event: str, hook: Hook) -> None:
+        if event not in EVENTS:
+            raise ValueError(f"Unknown event {event!r}, expected one of {', '.join(EVENTS)}")
+        self.hooks.setdefault(event, []).append(hook)
+
+    def remove(self, event: str, hook: Hook) -> None:
+        # Raises ValueError if the hook is not registered for event
+        if hook not in self.hooks.get(event, []):
+            raise ValueError(f"Hook not registered for {event!r}")
+        self.hooks[event].remove(hook)
+        if not self.hooks[event]:
+            del self.hooks[event]
+
+    def emit(self, event: str, data: Dict[str, Any]) -> None:
+        for hook in self.hooks.get(event, ()):
+            hook(event, data)
+
+
+def print_hook(event: str, data: Dict[str, Any]) -> None:
+    # What verbose=True registers (see VERBOSE_EVENTS): the messages the structures used to print themselves
+    key: Any = data.get("key")
+    if event == "insert":
+        message: str = f"Inserted key {key}"
+    elif event == "delete":
+        message = f"Deleted key {key}" if data["found"] else f"Key {key} not found"
+    elif event == "search_hit":
+        message = f"Found key {key}"
+    elif event == "search_miss":
+        message = f"Key {key} not found"
+    else:
+        message = f"    partial rebuilding, special index: {data['index']}"
+    if event != "rebuild" and "level" in data:
+        message += f" at level {data['level']}"
+    print(message)
@@ -1,14 +1,20 @@
 import math
-from typing import List, Optional
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
 from math import inf
 import numpy as np
+from Stats import OperationStats
+from Tracing import EVENTS, Hook, Tracer, print_hook
 
 
 class WTDLNode:
+    __slots__ = ("key", "next_nodes", "label", "handle")
+
     def __init__(self, key: float, h: int) -> None:
         self.key: Optional[float] = key
+        # Only the levels the node occupies, bottom first: next_nodes[h - lvl] is the successor in Llvl
         self.next_nodes: List[Optional[WTDLNode]] = [None] * (h + 1)
         self.label: Optional[int] = None  # Label of the node (usefully for partial rebuilding)
+        self.handle: Optional[DLLNode] = None  # Entry of the node in Q, None until it is first searched
 
     def __str__(self) -> str:
         return f"Node: {self.key}, label: {self.label}, next_nodes: {[node.key if node else None for node in self.next_nodes]}"
@@ -16,38 +22,146 @@ class WTDLNode:
 
 
 class DLLNode:
+    __slots__ = ("node", "prev", "next")
+
     def __init__(self, node: Optional[WTDLNode]) -> None:
         self.node: Optional[WTDLNode] = node  # WTDLNode ou None
-        self.prev: Optional[WTDLNode] = None  # Pointer to the previous node
-        self.next: Optional[WTDLNode] = None  # Pointer to the next node
+        self.prev: Optional[DLLNode] = None  # Pointer to the previous node
+        self.next: Optional[DLLNode] = None  # Pointer to the next node
 
 
 class DoublyLinkedList:
+    # Recency list: each WTDLNode is in it at most once, through its handle, and the tail is the one searched last,
+    # so the list holds one entry per live key that was ever searched
     def __init__(self):
-        self.tail = None  # Pointer to the last node
-
-    def append(self, node: WTDLNode) -> None:
-        new_node = DLLNode(node)
+        self.tail: Optional[DLLNode] = None  # Pointer to the last node
+        self.size: int = 0
+
+    def __len__(self) -> int:
+        return self.size
+
+    def __unlink(self, handle: DLLNode) -> None:
+        if handle.prev:
+            handle.prev.next = handle.next
+        if handle.next:
+            handle.next.prev = handle.prev
+        else:
+            self.tail = handle.prev
+        handle.prev = handle.next = None
+
+    def move_to_front(self, node: WTDLNode) -> None:
+        # Makes node the most recent entry (the tail) in O(1), adding it if it is not in the list yet
+        handle: Optional[DLLNode] = node.handle
+        if handle is None:
+            handle = node.handle = DLLNode(node)
+            self.size += 1
+        elif handle is self.tail:
+            return
+        else:
+            self.__unlink(handle)
         if self.tail:  # If the list is not empty
-            self.tail.next = new_node
-            new_node.prev = self.tail
-        self.tail = new_node
+            self.tail.next = handle
+            handle.prev = self.tail
+        self.tail = handle
+
+    def remove(self, node: WTDLNode) -> None:
+        # Unlinks node in O(1) if it is in the list
+        if node.handle is not None:
+            self.__unlink(node.handle)
+            node.handle = None
+            self.size -= 1
 
 
 class WorkingToDoList:
-    def __init__(self, h: int, epsilon: float, verbose: bool = False) -> None:
+    def __init__(self, h: int, epsilon: float, verbose: bool = False, stats: bool = False,
+                 rebuild_debt: Optional[float] = None) -> None:
         self.h: int = h  # Height of the ToDoList (Maximum level)
         self.epsilon: float = epsilon  # Arbitrary value
-        self.verbose: bool = verbose  # Verbose mode
+        self.verbose: bool = verbose  # Verbose mode (prints every event)
         self.sentinel: WTDLNode = WTDLNode(None, self.h)  # Header node (dummy node)
-        self.Q: DoublyLinkedList = DoublyLinkedList()  # Contains the keys ordered by their current working set numbers
+        self.level_sizes: List[int] = [0] * (self.h + 1)  # Number of nodes of L0, ..., Lh, kept up to date by every operation
+        # Rebuild scheduling: a search that finds its key below L0 moves it up to L0 and only rebuilds once L0 is too
+        # big (like insert and delete) or once the levels moved through since the last rebuild (the debt) reach
+        # debt_limit. Each of those levels gains at most one node per search, so between two rebuilds the searches
+        # add fewer than debt_limit nodes to L0, ..., Lh-1 altogether: every level holds less than debt_limit
+        # nodes more than the last rebuild (and the inserts and deletes since) left in it, and is not checked against
+        # its own bound meanwhile. By default (rebuild_debt=None) debt_limit is the number of pointers the last rebuild
+        # rewrote (at least 2h), so the promotions that pile up cost no more than that rebuild did and every rebuild
+        # is paid for by the searches before it. A number fixes debt_limit instead, and rebuild_debt=0 rebuilds after
+        # every successful search, as the paper does
+        self.rebuild_debt: Optional[float] = rebuild_debt
+        self.debt_limit: float = 2 * self.h if rebuild_debt is None else rebuild_debt
+        self.debt: int = 0  # Levels moved through by the searches since the last rebuild
+        self.Q: DoublyLinkedList = DoublyLinkedList()  # Contains the keys ordered by their current working set numbers (most recent last)
+        # Opt-in statistics: the descents are swapped for counting copies, so that the plain ones stay branch free
+        self.stats: Optional[OperationStats] = OperationStats() if stats else None
+        if stats:
+            self.__find_predecessors = self.__counted_find_predecessors
+            self.__locate = self.__counted_locate
+            self.__range_nodes = self.__counted_range_nodes
+        # Tracing hooks, None while there are none so that the operations only pay a None check
+        self.tracer: Optional[Tracer] = None
+        if verbose:
+            for event in EVENTS:
+                self.add_hook(event, print_hook)
+
+    def add_hook(self, event: str, hook: Hook) -> None:
+        # hook(event, data) is called on every event of this list (see Tracing.EVENTS)
+        if self.tracer is None:
+            self.tracer = Tracer()
+        self.tracer.add(event, hook)
+
+    def remove_hook(self, event: str, hook: Hook) -> None:
+        if self.tracer is None:
+            raise ValueError(f"Hook not registered for {event!r}")
+        self.tracer.remove(event, hook)
+        if not self.tracer.hooks:
+            self.tracer = None  # Back to the plain path
+
+    def stats_snapshot(self) -> Dict[str, Any]:
+        if self.stats is None:
+            raise ValueError("Stats are disabled, build the list with stats=True")
+        return self.stats.snapshot()
+
+    def reset_stats(self) -> None:
+        if self.stats is None:
+            raise ValueError("Stats are disabled, build the list with stats=True")
+        self.stats.reset()
+
+    def __len__(self) -> int:
+        # Every key lives in the bottom level Lh
+        return self.level_sizes[self.h]
+
+    @classmethod
+    def from_sorted(cls, keys: Iterable[int], h: int, epsilon: float, verbose: bool = False,
+                    stats: bool = False, rebuild_debt: Optional[float] = None) -> "WorkingToDoList":
+        # Builds the whole list in a single pass over the sorted keys: Lh-1 holds every second key of Lh,
+        # Lh-2 every fourth one, and so on (no key has been searched yet, so there is nothing to keep higher)
+        working_todolist: WorkingToDoList = cls(h, epsilon, verbose, stats, rebuild_debt)
+        tails: List[WTDLNode] = [working_todolist.sentinel] * (h + 1)  # Last node of each level, bottom first
+        count: int = 0
+        previous: float = -inf
+        for key in keys:
+            if key < previous:
+                raise ValueError(f"Keys must be sorted, got {key} after {previous}")
+            previous = key
+            count += 1
+            depth: int = min((count & -count).bit_length() - 1, h)
+            node: WTDLNode = WTDLNode(key, depth)
+            for d in range(depth + 1):
+                tails[d].next_nodes[d] = node
+                tails[d] = node
+                working_todolist.level_sizes[h - d] += 1
+
+        print(f"Loaded {count} keys") if verbose else None
+        return working_todolist
 
     def __find_predecessors(self, key: int) -> List[Optional[WTDLNode]]:
         predecessors: List[Optional[WTDLNode]] = [None] * (self.h + 1)
         current: WTDLNode = self.sentinel
 
         # For the top level only:
-        while (nxt := current.next_nodes[0]) and nxt.key < key:
+        while (nxt := current.next_nodes[self.h]) and nxt.key < key:
             current = nxt
         predecessors[0] = current
 
@@ -55,33 +169,53 @@ class WorkingToDoList:
         for lvl in range(1, self.h + 1):
             # Since at most only one node in two is not promoted to the next level,
             # a single comparison is sufficient to determine the predecessor at each level.
-            predecessors[lvl] = current if not (nxt := current.next_nodes[lvl]) or nxt.key >= key else nxt
+            predecessors[lvl] = current if not (nxt := current.next_nodes[self.h - lvl]) or nxt.key >= key else nxt
             current = predecessors[lvl]
 
         return predecessors
 
-    def __compute_length(self, lvl: int) -> int:
-        length: int = 0
-        node: Optional[WTDLNode] = self.sentinel.next_nodes[lvl]
-        while node:
-            length += 1
-            node = node.next_nodes[lvl]
-        return length
+    def __counted_find_predecessors(self, key: int) -> List[Optional[WTDLNode]]:
+        # Same as __find_predecessors, counting the pointers followed and the key comparisons
+        predecessors: List[Optional[WTDLNode]] = [None] * (self.h + 1)
+        current: WTDLNode = self.sentinel
+        hops: int = 0
+        comparisons: int = 0
+
+        while nxt := current.next_nodes[self.h]:
+            comparisons += 1
+            if nxt.key >= key:
+                break
+            current = nxt
+            hops += 1
+        predecessors[0] = current
+
+        for lvl in range(1, self.h + 1):
+            if nxt := current.next_nodes[self.h - lvl]:
+                comparisons += 1
+                if nxt.key < key:
+                    current = nxt
+                    hops += 1
+            predecessors[lvl] = current
+
+        self.stats.record_descent(hops, comparisons)
+        return predecessors
 
     def __check_rebuilding(self) -> None:
         # If the size of the top level is more than epsilon^-1 + 1, we partially rebuild the list
-        if self.__compute_length(0) > (1 / self.epsilon) + 1:
+        if self.level_sizes[0] > (1 / self.epsilon) + 1:
             self.__partial_rebuilding()
 
     def __partial_rebuilding(self) -> None:
         def compute_special_index() -> int:
             for lvl in range(self.h + 1):
-                if self.__compute_length(lvl) <= (2 - self.epsilon / 2) ** lvl:
+                if self.level_sizes[lvl] <= (2 - self.epsilon / 2) ** lvl:
                     return lvl
             return self.h
 
         index: int = compute_special_index()
-        print(f"    partial rebuilding, special index: {index}") if self.verbose else None
+        self.debt = 0
+        if self.tracer is not None:
+            self.tracer.emit("rebuild", {"index": index})
 
         dll_node: DLLNode = self.Q.tail
         for i in range(math.floor((2 - self.epsilon / 2) ** (index - 1))):
@@ -91,27 +225,44 @@ class WorkingToDoList:
                 dll_node.node.label = i
             dll_node = dll_node.prev
 
+        # The nodes of Lindex drop their pointers above Lindex, the promoted ones get them back below
+        depth: int = self.h - index
+        node: Optional[WTDLNode] = self.sentinel.next_nodes[depth]
+        while node:
+            del node.next_nodes[depth + 1:]
+            node = node.next_nodes[depth]
+
         # Promoting nodes
         for lvl in range(index, 0, -1):
+            depth = self.h - lvl
             current: WTDLNode = self.sentinel
+            promoted_count: int = 0
             # We walk through Lj and take any value whose label (in Q) is defined and is at most (2 - epsilon)^j
             # as well as every “second value” as needed to ensure that Property 3 holds.
-            while nxt := current.next_nodes[lvl]:
+            while nxt := current.next_nodes[depth]:
                 if nxt.label and nxt.label <= (2 - self.epsilon) ** lvl:
-                    current.next_nodes[lvl - 1] = nxt
-                    current = nxt
-                elif nxt_nxt := nxt.next_nodes[lvl]:
+                    promoted: WTDLNode = nxt
+                elif nxt_nxt := nxt.next_nodes[depth]:
                     nxt.label = None
-                    current.next_nodes[lvl - 1] = nxt_nxt
-                    current = nxt_nxt
+                    promoted = nxt_nxt
                 else:
-                    current.next_nodes[lvl - 1] = None
                     break
-            current.next_nodes[lvl - 1] = None
+                # The sentinel keeps all its pointers, every other promoted node gets one more pointer for Llvl-1
+                if current is self.sentinel:
+                    current.next_nodes[depth + 1] = promoted
+                else:
+                    current.next_nodes.append(promoted)
+                current = promoted
+                promoted_count += 1
+            if current is self.sentinel:
+                current.next_nodes[depth + 1] = None
+            else:
+                current.next_nodes.append(None)
+            self.level_sizes[lvl - 1] = promoted_count
 
         current: WTDLNode = self.sentinel
-        while current.next_nodes[0]:
-            current = current.next_nodes[0]
+        while current.next_nodes[self.h]:
+            current = current.next_nodes[self.h]
             current.label = None
 
         # Just to be sure and because it's written in the paper
@@ -122,6 +273,13 @@ class WorkingToDoList:
             dll_node.node.label = None
             dll_node = dll_node.prev
 
+        # Every node of L0, ..., Lindex-1 got a new pointer
+        relinked: int = sum(self.level_sizes[:index])
+        if self.rebuild_debt is None:
+            self.debt_limit = max(2 * self.h, relinked)
+        if self.stats is not None:
+            self.stats.record_rebuild(index, relinked)
+
 
     def insert(self, key: int) -> None:
         # Find the correct positions to insert the new node
@@ -132,33 +290,47 @@ class WorkingToDoList:
 
         # We add the new node after each predecessor
         for lvl in range(self.h + 1):
-            if predecessors[lvl]:
-                new_node.next_nodes[lvl] = predecessors[lvl].next_nodes[lvl]
-            predecessors[lvl].next_nodes[lvl] = new_node
+            new_node.next_nodes[self.h - lvl] = predecessors[lvl].next_nodes[self.h - lvl]
+            predecessors[lvl].next_nodes[self.h - lvl] = new_node
+            self.level_sizes[lvl] += 1
 
         self.__check_rebuilding()
-        print(f"Inserted key {key}") if self.verbose else None
+        if self.tracer is not None:
+            self.tracer.emit("insert", {"key": key})
 
 
 
     def delete(self, key: int) -> None:
         predecessors: List[Optional[WTDLNode]] = self.__find_predecessors(key)
 
-        # The one to be promoted in place of the element to be deleted
-        substitute = predecessors[self.h].next_nodes[self.h].next_nodes[self.h] \
-            if predecessors[self.h].next_nodes[self.h] else None
-
-        for lvl in range(self.h + 1):
-            if (target := predecessors[lvl].next_nodes[lvl]) and target.key == key:
-                predecessors[lvl].next_nodes[lvl] = substitute
-                successor = target.next_nodes[lvl]
-                if successor and successor.key != substitute.key:
-                    substitute.next_nodes[lvl] = successor
+        # The node of Lh to be deleted, the first one with this key (duplicates further on may reach higher levels,
+        # so the levels above are matched on the node, not on the key)
+        victim: Optional[WTDLNode] = predecessors[self.h].next_nodes[0]
+        found: bool = victim is not None and victim.key == key
+        if found:
+            self.Q.remove(victim)
+            # The one to be promoted in place of the element to be deleted
+            substitute: Optional[WTDLNode] = victim.next_nodes[0]
+
+            # From the bottom up, so that the substitute grows one pointer at a time
+            for lvl in range(self.h, -1, -1):
+                if predecessors[lvl].next_nodes[self.h - lvl] is not victim:
+                    break  # The levels are nested: the victim is not in the levels above either
+                predecessors[lvl].next_nodes[self.h - lvl] = substitute
+                successor = victim.next_nodes[self.h - lvl]
+                if successor is not substitute:
+                    # The substitute takes the place of the victim, the level keeps its size
+                    substitute.next_nodes.append(successor)
+                else:
+                    self.level_sizes[lvl] -= 1
 
         self.__check_rebuilding()
-        print(f"Deleted key {key}") if self.verbose else None
+        if self.tracer is not None:
+            self.tracer.emit("delete", {"key": key, "found": found})
 
-    def search(self, key: int) -> bool:
+    def __locate(self, key: int) -> Tuple[int, List[Optional[WTDLNode]], Optional[WTDLNode]]:
+        # Highest level where the search meets key (-1 if key is not in the list), the predecessors above it
+        # and the node of key
         def is_perfect_square(n: int) -> bool:
             return math.isqrt(n) ** 2 == n
 
@@ -166,43 +338,157 @@ class WorkingToDoList:
         predecessors: List[Optional[WTDLNode]] = [None] * (self.h + 1)
         key_level: int = -1
 
-        for lvl in range(self.h + 1):
-            if successor := current.next_nodes[lvl]:
-                if is_perfect_square(lvl) and successor.key == key:
+        # For the top level only:
+        while (successor := current.next_nodes[self.h]) and successor.key < key:
+            current = successor
+        predecessors[0] = current
+
+        if successor and successor.key == key:
+            key_level = 0
+        else:
+            for lvl in range(1, self.h + 1):
+                successor = current.next_nodes[self.h - lvl]
+                if successor and is_perfect_square(lvl) and successor.key == key:
                     key_level = lvl
                     break
-                predecessors[lvl] = current if not (nxt := current.next_nodes[lvl]) or nxt.key >= key else nxt
+                predecessors[lvl] = current if not successor or successor.key >= key else successor
                 current = predecessors[lvl]
 
-        candidate: Optional[WTDLNode] = current.next_nodes[self.h]
-        if key_level == -1 and candidate and candidate.key == key:
-            key_level = self.h
-        elif key_level == -1:
-            print(f"Key {key} not found") if self.verbose else None
+        if key_level == -1:
+            successor = current.next_nodes[0]
+            if successor and successor.key == key:
+                key_level = self.h
+
+        return key_level, predecessors, successor
+
+    def __counted_locate(self, key: int) -> Tuple[int, List[Optional[WTDLNode]], Optional[WTDLNode]]:
+        # Same as __locate, counting the pointers followed and the key comparisons
+        current: WTDLNode = self.sentinel
+        predecessors: List[Optional[WTDLNode]] = [None] * (self.h + 1)
+        key_level: int = -1
+        hops: int = 0
+        comparisons: int = 0
+
+        while successor := current.next_nodes[self.h]:
+            comparisons += 1
+            if successor.key >= key:
+                break
+            current = successor
+            hops += 1
+        predecessors[0] = current
+
+        if successor:
+            comparisons += 1
+        if successor and successor.key == key:
+            key_level = 0
+        else:
+            for lvl in range(1, self.h + 1):
+                successor = current.next_nodes[self.h - lvl]
+                if successor and math.isqrt(lvl) ** 2 == lvl:
+                    comparisons += 1
+                    if successor.key == key:
+                        key_level = lvl
+                        break
+                if successor:
+                    comparisons += 1
+                    if successor.key < key:
+                        current = successor
+                        hops += 1
+                predecessors[lvl] = current
+
+        if key_level == -1:
+            successor = current.next_nodes[0]
+            if successor:
+                comparisons += 1
+                if successor.key == key:
+                    key_level = self.h
+
+        self.stats.record_descent(hops + (key_level != -1), comparisons)
+        return key_level, predecessors, successor
+
+    def search(self, key: int) -> bool:
+        key_level, predecessors, candidate = self.__locate(key)
+        if key_level == -1:
+            if self.tracer is not None:
+                self.tracer.emit("search_miss", {"key": key})
             return False
 
-        print(f"Found key {key} at level {key_level}") if self.verbose else None
+        if self.tracer is not None:
+            self.tracer.emit("search_hit", {"key": key, "level": key_level})
 
-        self.Q.append(candidate)
-        new_node: WTDLNode = WTDLNode(key, self.h)
+        self.Q.move_to_front(candidate)
 
-        # We add the key to every level from 0 to key_level - 1
-        for lvl in range(key_level):
-            if predecessors[lvl]:
-                new_node.next_nodes[lvl] = predecessors[lvl].next_nodes[lvl]
-                predecessors[lvl].next_nodes[lvl] = new_node
+        # We add the node itself to every level from key_level - 1 up to 0 (it may already sit in the lowest ones)
+        for lvl in range(key_level - 1, -1, -1):
+            if predecessors[lvl].next_nodes[self.h - lvl] is not candidate:
+                candidate.next_nodes.append(predecessors[lvl].next_nodes[self.h - lvl])
+                predecessors[lvl].next_nodes[self.h - lvl] = candidate
+                self.level_sizes[lvl] += 1
 
-        self.__partial_rebuilding()
+        # The rebuild waits until L0 overflows or enough promotions have piled up
+        self.debt += key_level
+        if self.debt >= self.debt_limit or self.level_sizes[0] > (1 / self.epsilon) + 1:
+            self.__partial_rebuilding()
+        return True
+
+    def __iter__(self) -> Iterator[int]:
+        node: Optional[WTDLNode] = self.sentinel.next_nodes[0]
+        while node:
+            yield node.key
+            node = node.next_nodes[0]
+
+    def __range_nodes(self, lo: Optional[int], hi: Optional[int], inclusive: Tuple[bool, bool]) -> Iterator[WTDLNode]:
+        # Lazily yields the nodes between lo and hi (None meaning unbounded): one descent to find lo, then Lh is streamed
+        node: Optional[WTDLNode] = self.sentinel.next_nodes[0] if lo is None \
+            else self.__find_predecessors(lo)[self.h].next_nodes[0]
+        if lo is not None and not inclusive[0]:
+            while node and node.key <= lo:
+                node = node.next_nodes[0]
+        while node and (hi is None or node.key < hi or (inclusive[1] and node.key == hi)):
+            yield node
+            node = node.next_nodes[0]
+
+    def __counted_range_nodes(self, lo: Optional[int], hi: Optional[int],
+                              inclusive: Tuple[bool, bool]) -> Iterator[WTDLNode]:
+        # Counting copy of __range_nodes: the descent to lo is counted by __find_predecessors, the nodes streamed here
+        for node in WorkingToDoList.__range_nodes(self, lo, hi, inclusive):
+            self.stats.scanned += 1
+            yield node
+
+    def irange(self, lo: Optional[int] = None, hi: Optional[int] = None,
+               inclusive: Tuple[bool, bool] = (True, True)) -> Iterator[int]:
+        for node in self.__range_nodes(lo, hi, inclusive):
+            yield node.key
+
+    def successor(self, key: int) -> Optional[int]:
+        # Smallest key strictly greater than key, None if there is none
+        node: Optional[WTDLNode] = self.__find_predecessors(key)[self.h].next_nodes[0]
+        while node and node.key <= key:
+            node = node.next_nodes[0]
+        return node.key if node else None
+
+    def predecessor(self, key: int) -> Optional[int]:
+        # Largest key strictly smaller than key, None if there is none
+        node: WTDLNode = self.__find_predecessors(key)[self.h]
+        return node.key if node is not self.sentinel else None
+
+    def min(self) -> Optional[int]:
+        node: Optional[WTDLNode] = self.sentinel.next_nodes[0]
+        return node.key if node else None
+
+    def max(self) -> Optional[int]:
+        node: WTDLNode = self.__find_predecessors(inf)[self.h]
+        return node.key if node is not self.sentinel else None
 
     def __str__(self) -> str:
         output: str = "\nWorking ToDo List:\n"
         for lvl in range(self.h + 1):
-            current: Optional[WTDLNode] = self.sentinel.next_nodes[lvl]
+            current: Optional[WTDLNode] = self.sentinel.next_nodes[self.h - lvl]
             count: int = 0
             level_str: str = ""
             while current:
                 count += 1
                 level_str += f"{current.key} -> "
-                current = current.next_nodes[lvl]
+                current = current.next_nodes[self.h - lvl]
             output += f"Level {lvl} (count: {count}): " + level_str + "None" + "\n"
         return output
@@ -1,13 +1,100 @@
-from typing import List, Optional
+from typing import Dict, Iterator, List, Optional
 from math import inf
 
 
 class TDLNode:
+    __slots__ = ("key", "next_nodes")
+
     def __init__(self, key: float, h: int) -> None:
         self.key: float = key
+        # Only the levels the node occupies, bottom first: next_nodes[h - lvl] is the successor in Llvl
         self.next_nodes: List[Optional[TDLNode]] = [None] * (h + 1)  # Create a list with h + 1 elements initialized to None
 
 
+class FrequencyBucket:
+    __slots__ = ("count", "keys", "prev", "next")
+
+    def __init__(self, count: int) -> None:
+        self.count: int = count  # Access count shared by all the keys of the bucket
+        self.keys: Dict[int, None] = {}  # Keys in the order they reached the count (a dict for O(1) removal)
+        self.prev: FrequencyBucket = self
+        self.next: FrequencyBucket = self
+
+
+class FrequencyList:
+    # Access counts kept in order: a circular doubly-linked list of buckets by increasing count, around a sentinel of
+    # count 0, and the bucket of every key. An access moves the key to the next bucket (created if its count is not
+    # there yet), so counting and removing are O(1), and the keys come out by decreasing count in O(1) each
+    def __init__(self) -> None:
+        self.sentinel: FrequencyBucket = FrequencyBucket(0)
+        self.buckets: Dict[int, FrequencyBucket] = {}  # Bucket of every key
+
+    def __len__(self) -> int:
+        return len(self.buckets)
+
+    def __contains__(self, key: int) -> bool:
+        return key in self.buckets
+
+    def __getitem__(self, key: int) -> int:
+        return self.buckets[key].count
+
+    def get(self, key: int, default: int = 0) -> int:
+        return self.buckets[key].count if key in self.buckets else default
+
+    def __unlink(self, bucket: FrequencyBucket) -> None:
+        bucket.prev.next = bucket.next
+        bucket.next.prev = bucket.prev
+
+    def increment(self, key: int) -> int:
+        # Returns the new count of key
+        bucket: Optional[FrequencyBucket] = self.buckets.get(key)
+        current: FrequencyBucket = bucket if bucket is not None else self.sentinel
+        nxt: FrequencyBucket = current.next
+        if nxt is self.sentinel or nxt.count != current.count + 1:
+            # New bucket between current and nxt
+            nxt = FrequencyBucket(current.count + 1)
+            nxt.prev = current
+            nxt.next = current.next
+            current.next.prev = nxt
+            current.next = nxt
+        nxt.keys[key] = None
+        self.buckets[key] = nxt
+        if bucket is not None:
+            del bucket.keys[key]
+            if not bucket.keys:
+                self.__unlink(bucket)
+        return nxt.count
+
+    def remove(self, key: int) -> None:
+        bucket: Optional[FrequencyBucket] = self.buckets.pop(key, None)
+        if bucket is not None:
+            del bucket.keys[key]
+            if not bucket.keys:
+                self.__unlink(bucket)
+
+    def __iter__(self) -> Iterator[int]:
+        # Keys by decreasing count (those that reached a count first come first); the list must not change meanwhile
+        bucket: FrequencyBucket = self.sentinel.prev
+        while bucket is not self.sentinel:
+            yield from bucket.keys
+            bucket = bucket.prev
+
+    def keys(self) -> Iterator[int]:
+        return iter(self)
+
+    def top_k(self, k: int) -> List[int]:
+        # The k most accessed keys, in O(k)
+        top: List[int] = []
+        bucket: FrequencyBucket = self.sentinel.prev
+        while bucket is not self.sentinel and len(top) < k:
+            for key in bucket.keys:
+                if len(top) == k:
+                    break
+                top.append(key)
+            bucket = bucket.prev
+        return top
+
+
 class WorkingToDoList:
     def __init__(self, h: int, epsilon: float, verbose: bool = False) -> None:
         self.h: int = h  # Height of the ToDoList (Maximum level)
@@ -15,31 +102,31 @@ class WorkingToDoList:
         self.verbose: bool = verbose  # Verbose mode
         self.sentinel: TDLNode = TDLNode(-inf, self.h)  # Header node (dummy node)
         
-        # Dictionary to track access counts
-        self.access_count: dict[int, int] = {}
+        # Access counts, ordered by frequency
+        self.access_count: FrequencyList = FrequencyList()
 
     def __find_predecessors(self, key: int) -> List[Optional[TDLNode]]:
         predecessors: List[Optional[TDLNode]] = [None] * (self.h + 1)  # Initialize an empty list for storing the predecessors
         current: TDLNode = self.sentinel  # Start iterating from the first node of L0 (sentinel)
         for lvl in range(self.h + 1):
-            predecessors[lvl] = current if current.next_nodes[lvl] is None or current.next_nodes[lvl].key >= key \
-                else current.next_nodes[lvl]
+            predecessors[lvl] = current if current.next_nodes[self.h - lvl] is None or current.next_nodes[self.h - lvl].key >= key \
+                else current.next_nodes[self.h - lvl]
             current = predecessors[lvl]
 
         return predecessors
 
     def __check_rebuilding(self) -> None:
         # If there is more than one node in the top level, we partially rebuild the list
-        if self.sentinel.next_nodes[0] is not None and self.sentinel.next_nodes[0].next_nodes[0] is not None:
+        if self.sentinel.next_nodes[self.h] is not None and self.sentinel.next_nodes[self.h].next_nodes[self.h] is not None:
             self.__partial_rebuilding()
 
     def __partial_rebuilding(self) -> None:
         def __compute_length(lvl: int) -> int:
             length: int = 0
-            node: Optional[TDLNode] = self.sentinel.next_nodes[lvl]
+            node: Optional[TDLNode] = self.sentinel.next_nodes[self.h - lvl]
             while node is not None:
                 length += 1
-                node = node.next_nodes[lvl]
+                node = node.next_nodes[self.h - lvl]
             return length
 
         def __compute_special_index() -> int:
@@ -50,12 +137,23 @@ class WorkingToDoList:
 
         index: int = __compute_special_index()
 
+        # The nodes of Lindex drop their pointers above Lindex, the promoted ones get them back below
+        depth: int = self.h - index
+        node: Optional[TDLNode] = self.sentinel.next_nodes[depth]
+        while node is not None:
+            del node.next_nodes[depth + 1:]
+            node = node.next_nodes[depth]
+
         for lvl in range(index, 0, -1):
-            current: TDLNode = self.sentinel
-            while (nxt := current.next_nodes[lvl]) is not None and (nxt_nxt := nxt.next_nodes[lvl]) is not None:
-                current.next_nodes[lvl - 1] = nxt_nxt
-                current = nxt_nxt
-            current.next_nodes[lvl - 1] = None
+            depth = self.h - lvl
+            # The sentinel keeps all its pointers, every other promoted node gets one more pointer for Llvl-1
+            current: Optional[TDLNode] = nxt.next_nodes[depth] if (nxt := self.sentinel.next_nodes[depth]) is not None else None
+            self.sentinel.next_nodes[depth + 1] = current
+            if current is not None:
+                while (nxt := current.next_nodes[depth]) is not None and (nxt_nxt := nxt.next_nodes[depth]) is not None:
+                    current.next_nodes.append(nxt_nxt)
+                    current = nxt_nxt
+                current.next_nodes.append(None)
 
     def insert(self, key: int) -> None:
         # Find the correct positions to insert the new node
@@ -66,11 +164,11 @@ class WorkingToDoList:
 
         # We add the new node after each predecessor
         for lvl in range(self.h + 1):
-            new_node.next_nodes[lvl] = predecessors[lvl].next_nodes[lvl]
-            predecessors[lvl].next_nodes[lvl] = new_node
+            new_node.next_nodes[self.h - lvl] = predecessors[lvl].next_nodes[self.h - lvl]
+            predecessors[lvl].next_nodes[self.h - lvl] = new_node
 
         # Update access count
-        self.access_count[key] = self.access_count.get(key, 0) + 1
+        self.access_count.increment(key)
 
         self.__check_rebuilding()
 
@@ -80,21 +178,24 @@ class WorkingToDoList:
     def delete(self, key: int) -> None:
         predecessors: List[Optional[TDLNode]] = self.__find_predecessors(key)
 
-        # The one to be promoted in place of the element to be deleted
-        substitute = predecessors[self.h].next_nodes[self.h].next_nodes[self.h] \
-            if predecessors[self.h].next_nodes[self.h] is not None \
-            else None
-
-        for lvl in range(self.h + 1):
-            if (target := predecessors[lvl].next_nodes[lvl]) is not None and target.key == key:
-                predecessors[lvl].next_nodes[lvl] = substitute
-                successor = target.next_nodes[lvl]
-                if successor is not None and successor.key != substitute.key:
-                    substitute.next_nodes[lvl] = successor
+        # The node of Lh to be deleted, the first one with this key (duplicates further on may reach higher levels,
+        # so the levels above are matched on the node, not on the key)
+        victim: Optional[TDLNode] = predecessors[self.h].next_nodes[0]
+        if victim is not None and victim.key == key:
+            # The one to be promoted in place of the element to be deleted
+            substitute: Optional[TDLNode] = victim.next_nodes[0]
+
+            # From the bottom up, so that the substitute grows one pointer at a time
+            for lvl in range(self.h, -1, -1):
+                if predecessors[lvl].next_nodes[self.h - lvl] is not victim:
+                    break  # The levels are nested: the victim is not in the levels above either
+                predecessors[lvl].next_nodes[self.h - lvl] = substitute
+                successor = victim.next_nodes[self.h - lvl]
+                if successor is not substitute:
+                    substitute.next_nodes.append(successor)
 
         # Remove access count if key is deleted
-        if key in self.access_count:
-            del self.access_count[key]
+        self.access_count.remove(key)
 
         self.__check_rebuilding()
 
@@ -103,10 +204,10 @@ class WorkingToDoList:
 
     def search(self, key: int) -> bool:
         predecessors: List[Optional[TDLNode]] = self.__find_predecessors(key)
-        if predecessors[self.h].next_nodes[self.h] is not None and predecessors[self.h].next_nodes[self.h].key == key:
+        if predecessors[self.h].next_nodes[0] is not None and predecessors[self.h].next_nodes[0].key == key:
             # Update access count
-            self.access_count[key] = self.access_count.get(key, 0) + 1
-            
+            self.access_count.increment(key)
+
             if self.verbose:
                 print(f"Found key {key}")
             return True
@@ -116,18 +217,25 @@ class WorkingToDoList:
             return False
 
     def get_ordered_keys(self) -> List[int]:
-        # Create a list of keys sorted by their access count (working set number)
-        Q = sorted(self.access_count.keys(), key=lambda k: self.access_count[k], reverse=True)
-        return Q
+        # Keys by decreasing access count, read off the frequency buckets in O(n)
+        return list(self.access_count)
+
+    def iter_ordered_keys(self) -> Iterator[int]:
+        # Same order as get_ordered_keys, lazily: stopping after k keys costs O(k)
+        return iter(self.access_count)
+
+    def top_k(self, k: int) -> List[int]:
+        # The k most accessed keys, in O(k)
+        return self.access_count.top_k(k)
 
     def __str__(self) -> str:
         output: str = "\nSkip List:\n"
         for lvl in range(self.h + 1):
-            current: Optional[TDLNode] = self.sentinel.next_nodes[lvl]
+            current: Optional[TDLNode] = self.sentinel.next_nodes[self.h - lvl]
             level_str: str = f"Level {lvl}: "
             while current is not None:
                 level_str += f"{current.key} -> "
-                current = current.next_nodes[lvl]
+                current = current.next_nodes[self.h - lvl]
             level_str += "None"
             output += level_str + "\n"
         return output
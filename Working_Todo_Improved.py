@@ -1,115 +1,216 @@
-from typing import List, Optional
+from typing import Dict, List, Optional, Tuple
+
+
+class WorkingSetTracker:
+    # Working-set numbers from the last access time of every key: a Fenwick tree over the time steps holds a 1 at the
+    # last access of every live key, so the distinct keys accessed since x was (x included) are the ones after its
+    # time step, counted in O(log n). The time steps are renumbered 1..n once they reach the capacity of the tree,
+    # which is at least twice the number of keys, so that costs O(log n) amortized per access
+    def __init__(self, capacity: int = 1024) -> None:
+        self.last_access: Dict[int, int] = {}  # Time step of the last access of every key
+        self.time: int = 0  # Last time step used
+        self.tree: List[int] = [0] * (capacity + 1)  # Fenwick tree over the time steps 1..capacity
+        self.accessed: List[Optional[int]] = [None] * (capacity + 1)  # Key of every time step still a last access
+
+    def __len__(self) -> int:
+        return len(self.last_access)
+
+    def __add(self, step: int, delta: int) -> None:
+        while step < len(self.tree):
+            self.tree[step] += delta
+            step += step & -step
+
+    def __prefix(self, step: int) -> int:
+        # Number of live keys last accessed at time steps 1..step
+        total: int = 0
+        while step > 0:
+            total += self.tree[step]
+            step -= step & -step
+        return total
+
+    def __compact(self) -> None:
+        # The keys get the time steps 1..n in the order of their last accesses, in a tree twice that size
+        order: List[int] = sorted(self.last_access, key=self.last_access.__getitem__)
+        self.tree = [0] * (max(2 * len(order), 1024) + 1)
+        self.accessed = [None] * len(self.tree)
+        for step, key in enumerate(order, 1):
+            self.last_access[key] = step
+            self.accessed[step] = key
+            self.tree[step] += 1
+            parent: int = step + (step & -step)  # Linear-time build: every node passes its sum up to its parent
+            if parent < len(self.tree):
+                self.tree[parent] += self.tree[step]
+        for step in range(len(order) + 1, len(self.tree)):
+            parent = step + (step & -step)
+            if parent < len(self.tree):
+                self.tree[parent] += self.tree[step]
+        self.time = len(order)
+
+    def working_set_number(self, key: int) -> Optional[int]:
+        # w(key): distinct keys accessed since the last access of key, key included (None if key is not tracked)
+        step: Optional[int] = self.last_access.get(key)
+        if step is None:
+            return None
+        return self.__prefix(self.time) - self.__prefix(step - 1)
+
+    def access(self, key: int) -> int:
+        # Records an access to key and returns its working-set number just before it (for a new key, the number of
+        # keys it makes)
+        step: Optional[int] = self.last_access.get(key)
+        if step is None:
+            number: int = len(self.last_access) + 1
+        else:
+            number = self.__prefix(self.time) - self.__prefix(step - 1)
+            self.__add(step, -1)
+            self.accessed[step] = None
+        if self.time + 1 >= len(self.tree):
+            self.last_access.pop(key, None)  # Renumbered without it, it takes the next step like a new key
+            self.__compact()
+        self.time += 1
+        self.last_access[key] = self.time
+        self.accessed[self.time] = key
+        self.__add(self.time, 1)
+        return number
+
+    def remove(self, key: int) -> None:
+        step: Optional[int] = self.last_access.pop(key, None)
+        if step is not None:
+            self.__add(step, -1)
+            self.accessed[step] = None
+
+    def __step_of(self, rank: int) -> int:
+        # Time step of the rank-th live key in order of last access (rank from 1), by a descent of the tree
+        step: int = 0
+        bit: int = 1 << (len(self.tree) - 1).bit_length()
+        while bit:
+            if step + bit < len(self.tree) and self.tree[step + bit] < rank:
+                step += bit
+                rank -= self.tree[step]
+            bit >>= 1
+        return step + 1
+
+    def most_recent(self, k: int) -> List[int]:
+        # The k keys accessed last, the most recent first, in O(k log n)
+        total: int = len(self.last_access)
+        return [self.accessed[self.__step_of(rank)] for rank in range(total, max(total - k, 0), -1)]
 
 
 class WTDLNode:
-    def __init__(self, key: int, h: int) -> None:
+    __slots__ = ("key", "next_nodes")
+
+    def __init__(self, key: int, level: int) -> None:
         self.key: int = key
-        self.next_nodes: List[Optional[WTDLNode]] = [None] * (h + 1)  # For levels 0 to h
-        self.prev: Optional['WTDLNode'] = None  # Pointer for the doubly-linked list
+        self.next_nodes: List[Optional[WTDLNode]] = [None] * (level + 1)  # Only for the levels 0 to level the node occupies
 
 
 class WorkingToDoList:
+    # Level 0 holds every key, level lvl > 0 at most (2 - epsilon) ** (h - lvl) of them, the ones accessed most
+    # recently: a key with working-set number w sits about log(w) levels below the top, where the search finds it.
+    # An accessed key goes up to the top level; when that overfills a level, the levels above the first one that
+    # still fits are rebuilt from it, half full, with its most recent keys (by the last access times of the tracker).
+    # Every level lvl holds the level_sizes[lvl] keys accessed last (accesses add the most recent key to all levels,
+    # deletes take a key out of all of them, rebuilds keep the most recent ones), so a rebuild takes its keys from
+    # the tracker and only walks the levels it rebuilds: O(c log n) for the capacity c of the lowest one
     def __init__(self, h: int, epsilon: float, verbose: bool = False) -> None:
         self.h: int = h  # Maximum level
         self.epsilon: float = epsilon  # Arbitrary value
         self.verbose: bool = verbose  # Verbose mode
         self.sentinel: WTDLNode = WTDLNode(float('-inf'), self.h)  # Sentinel node for lists
-        self.working_set: dict[int, int] = {}  # Store working set numbers
-        self.Q: Optional[WTDLNode] = None  # Head of the doubly linked list for working set ordering
+        self.working_set: dict[int, int] = {}  # Working-set number of every key at its last access
+        self.tracker: WorkingSetTracker = WorkingSetTracker()
+        self.level_sizes: List[int] = [0] * (self.h + 1)  # Number of nodes of every level
+        self.capacities: List[float] = [(2 - self.epsilon) ** (self.h - lvl) for lvl in range(self.h + 1)]
+        self.keep: List[int] = [max(int(capacity // 2), 1) for capacity in self.capacities]  # Sizes after a rebuild
+        self.nodes: Dict[int, WTDLNode] = {}  # Node of every key
+
+    def __len__(self) -> int:
+        return self.level_sizes[0]
 
     def __find_predecessors(self, key: int) -> List[Optional[WTDLNode]]:
         predecessors: List[Optional[WTDLNode]] = [None] * (self.h + 1)
         current: WTDLNode = self.sentinel
-        for lvl in range(self.h + 1):
+        # From the top down, so that current always occupies the level being walked
+        for lvl in range(self.h, -1, -1):
             while current.next_nodes[lvl] is not None and current.next_nodes[lvl].key < key:
                 current = current.next_nodes[lvl]
             predecessors[lvl] = current
         return predecessors
 
-    def __get_working_set_number(self, key: int) -> int:
-        # Calculate working set number for key
-        if key not in self.working_set:
-            return len(set(self.__collect_last_occurrences(key)))
-        return self.working_set[key]
-
-    def __collect_last_occurrences(self, key: int) -> List[int]:
-        occurrences = []
-        current = self.sentinel.next_nodes[0]
-        while current is not None:
-            occurrences.append(current.key)
-            current = current.next_nodes[0]
-        return occurrences
+    def __locate(self, key: int) -> Tuple[List[Optional[WTDLNode]], Optional[WTDLNode]]:
+        # Same descent, stopping at the top level of key: its predecessors in the levels above, and its node
+        predecessors: List[Optional[WTDLNode]] = [None] * (self.h + 1)
+        current: WTDLNode = self.sentinel
+        for lvl in range(self.h, -1, -1):
+            while (nxt := current.next_nodes[lvl]) is not None and nxt.key < key:
+                current = nxt
+            if nxt is not None and nxt.key == key:
+                return predecessors, nxt
+            predecessors[lvl] = current
+        return predecessors, None
+
+    def __access(self, node: WTDLNode, predecessors: List[Optional[WTDLNode]]) -> None:
+        # Records the access and moves the node up to the top level (predecessors are those of the levels it is not in)
+        self.working_set[node.key] = self.tracker.access(node.key)
+        for lvl in range(len(node.next_nodes), self.h + 1):
+            node.next_nodes.append(predecessors[lvl].next_nodes[lvl])
+            predecessors[lvl].next_nodes[lvl] = node
+            self.level_sizes[lvl] += 1
+        self.__check_rebuilding()
 
     def __check_rebuilding(self) -> None:
-        if self.sentinel.next_nodes[0] is not None and self.sentinel.next_nodes[0].next_nodes[0] is not None:
-            self.__partial_rebuilding()
-
-    def __partial_rebuilding(self) -> None:
-        """Rebuilds the lists L0, L1, ..., Li to maintain properties."""
-        # Find the first index i such that |Li| ≤ (2 - ε/2)^i
-        i = 0
-        while i in self.L and len(self.L[i]) <= (2 - self.epsilon / 2) ** i:
-            i += 1
-
-        # Now i is the first index where the property may be violated
-        if i in self.L:
-            # Traverse the first (2 - ε)^(i-1) nodes of Q
-            current = self.Q
-            count = 0
-
-            while current and count < (2 - self.epsilon) ** (i - 1):
-                # Get the value of the current node
-                z = current.value
-
-                # Check if the working set number of z is defined and is at most (2 - ε)^j
-                if z in self.w and self.w[z] <= (2 - self.epsilon) ** (i - 1):
-                    # Insert z into the appropriate list Lj
-                    if i - 1 not in self.L:
-                        self.L[i - 1] = []
-                    self.L[i - 1].append(z)
-
-                # Move to the next node in the linked list
-                current = current.next
-                count += 1
-
-        # Rebuild all lists L0, ..., Li-1
-        for j in range(i):
-            if j in self.L:
-                # Rebuild L_j
-                new_list = []
-                for value in self.L[j]:
-                    # Check if value is in the working set
-                    if self.w[value] <= (2 - self.epsilon) ** j:
-                        new_list.append(value)
-                self.L[j] = new_list
-
-        # Clear the labels in the first (2 - ε)^(i-1) nodes of Q
-        current = self.Q
-        count = 0
-        while current and count < (2 - self.epsilon) ** (i - 1):
-            # Clear the label (if applicable, this could be a reference)
-            # Here we assume 'label' is handled through w or another structure
-            count += 1
-            current = current.next
+        # The lowest overfull level is rebuilt, with all the ones above, from the level below it
+        for lvl in range(1, self.h + 1):
+            if self.level_sizes[lvl] > self.capacities[lvl]:
+                self.__partial_rebuilding(lvl - 1)
+                return
+
+    def __partial_rebuilding(self, base: int) -> None:
+        # Levels base + 1, ..., h keep the keep[lvl] keys of level base accessed last (each level keeps a prefix of
+        # the same ranking, so they stay nested). Only the nodes of level base + 1 reach above base
+        node: Optional[WTDLNode] = self.sentinel.next_nodes[base + 1]
+        while node is not None:
+            nxt: Optional[WTDLNode] = node.next_nodes[base + 1]
+            del node.next_nodes[base + 1:]
+            node = nxt
+
+        recent: List[WTDLNode] = [self.nodes[key] for key in
+                                  self.tracker.most_recent(min(self.keep[base + 1], self.level_sizes[base]))]
+        for rank, node in enumerate(recent):
+            top: int = base
+            while top < self.h and rank < self.keep[top + 1]:
+                top += 1
+            node.next_nodes.extend([None] * (top - base))
+        recent.sort(key=lambda node: node.key)
+
+        for lvl in range(base + 1, self.h + 1):
+            current: WTDLNode = self.sentinel
+            for node in recent:
+                if len(node.next_nodes) > lvl:
+                    current.next_nodes[lvl] = node
+                    current = node
+            current.next_nodes[lvl] = None
+            self.level_sizes[lvl] = min(self.keep[lvl], len(recent))
 
+        if self.verbose:
+            print(f"    partial rebuilding from level {base}")
 
     def insert(self, key: int) -> None:
         # Find predecessors
         predecessors = self.__find_predecessors(key)
 
-        # Create new node
-        new_node = WTDLNode(key, self.h)
-
-        # Insert into L0
-        new_node.next_nodes[0] = predecessors[0].next_nodes[0]
-        predecessors[0].next_nodes[0] = new_node
-        new_node.prev = predecessors[0]  # Link back in the doubly-linked list
+        node = predecessors[0].next_nodes[0]
+        if node is None or node.key != key:
+            # Create new node (it only lives in level 0 until the access moves it up)
+            node = WTDLNode(key, 0)
+            node.next_nodes[0] = predecessors[0].next_nodes[0]
+            predecessors[0].next_nodes[0] = node
+            self.level_sizes[0] += 1
+            self.nodes[key] = node
+        else:
+            # Already there: inserting it again is an access, from the levels it is not in
+            predecessors = self.__locate(key)[0]
 
-        # Update working set number
-        self.working_set[key] = self.__get_working_set_number(key)
-
-        # Rebuild lists if necessary
-        self.__check_rebuilding()
+        self.__access(node, predecessors)
 
         if self.verbose:
             print(f"Inserted key {key}")
@@ -119,53 +220,33 @@ class WorkingToDoList:
         for lvl in range(self.h + 1):
             if predecessors[lvl].next_nodes[lvl] is not None and predecessors[lvl].next_nodes[lvl].key == key:
                 # Adjust the links
-                successors = predecessors[lvl].next_nodes[lvl].next_nodes[lvl]
-                predecessors[lvl].next_nodes[lvl] = successors
-                if successors is not None:
-                    successors.prev = predecessors[lvl]
+                predecessors[lvl].next_nodes[lvl] = predecessors[lvl].next_nodes[lvl].next_nodes[lvl]
+                self.level_sizes[lvl] -= 1
 
         # Remove from working set
+        self.nodes.pop(key, None)
+        self.tracker.remove(key)
         if key in self.working_set:
             del self.working_set[key]
 
-        self.__check_rebuilding()
-
         if self.verbose:
             print(f"Deleted key {key}")
 
     def search(self, key: int) -> bool:
-        predecessors = self.__find_predecessors(key)
+        predecessors, node = self.__locate(key)
+        if node is not None:
+            self.__access(node, predecessors)
+            if self.verbose:
+                print(f"Found key {key}")
+            return True
 
-        for i in range(self.h + 1):
-            current = predecessors[i].next_nodes[i]
-            if current is not None and current.key == key:
-                # Move to front of Q
-                self.__move_to_front(current)
-                if self.verbose:
-                    print(f"Found key {key}")
-                return True
-        
         if self.verbose:
             print(f"Key {key} not found")
         return False
 
-    def __move_to_front(self, node: WTDLNode) -> None:
-        # Move the node in Q to the front
-        if self.Q is None or self.Q.key == node.key:
-            return  # Already at front
-
-        # Unlink node from Q
-        if node.prev is not None:
-            node.prev.next_nodes[0] = node.next_nodes[0]
-        if node.next_nodes[0] is not None:
-            node.next_nodes[0].prev = node.prev
-
-        # Link to front
-        node.prev = None
-        node.next_nodes[0] = self.Q
-        if self.Q is not None:
-            self.Q.prev = node
-        self.Q = node
+    def working_set_number(self, key: int) -> Optional[int]:
+        # Current w(key): distinct keys accessed since its last access, itself included (None if it is not there)
+        return self.tracker.working_set_number(key)
 
     def __str__(self) -> str:
         output = "\nWorking ToDo List:\n"
@@ -178,7 +259,7 @@ class WorkingToDoList:
             level_str += "None"
             output += level_str + "\n"
         return output
-    
+
 
 
 '''
@@ -189,4 +270,4 @@ y = working_todolist.search(5)
 print(y)
 z = working_todolist.delete(5)
 print(z)
-'''
\ No newline at end of file
+'''
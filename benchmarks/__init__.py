@@ -0,0 +1,14 @@
+#Throughput benchmark of SkipList, ToDoList, WorkingToDoList and ArrayToDoList on named workloads, and cost of the
+#searches by working-set number, multi-threaded throughput of the thread-safe SkipLists, load generator of
+#ToDoServer, ShardedToDoList against a single ToDoList, memory per key, and finger searches (see __main__.py)
+from .finger import FINGER_QUERIES, run_finger
+from .memory import bytes_per_key, run_memory
+from .report import print_table, read_json, write_csv, write_json
+from .runner import run, summarize, time_workload
+from .sharding import run_sharding
+from .server_load import ServerProcess, run_server_load
+from .structures import STRUCTURES
+from .threads import THREAD_STRUCTURES, LockedSkipList, run_threads
+from .workloads import WORKLOADS, Workload
+from .working_set import ACCESS_PATTERNS, working_set_numbers
+from .working_set_bound import CountedKey, run_working_set
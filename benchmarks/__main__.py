@@ -0,0 +1,174 @@
+#Command line of the benchmark, from the root of the repository:
+#    python -m benchmarks run --workloads uniform zipf --sizes 1000 10000 100000 --json results.json --csv results.csv
+#    python -m benchmarks plot results.json --output results.png
+#    python -m benchmarks run --structures WorkingToDoList WorkingToDoList-eager --workloads read-mostly write-mostly mixed
+#    python -m benchmarks working-set --patterns zipf lru-stack --size 2000 --searches 10000 --csv working_set.csv
+#    python -m benchmarks threads --threads 1 2 4 8 --size 10000 --operations 200000 --csv threads.csv
+#    python -m benchmarks server --clients 1 8 64 --max-batch 1 4096 --requests 100000 --csv server.csv
+#    python -m benchmarks shards --shards 1 2 4 --size 100000 --skew 0.8 --rebalance --csv shards.csv
+#    python -m benchmarks memory --sizes 1000 20000 --csv memory.csv
+#    python -m benchmarks finger --queries sequential clustered uniform --size 200000 --searches 200000
+import argparse
+from typing import List, Optional
+
+from .finger import FINGER_CSV_FIELDS, FINGER_QUERIES, format_finger_row, print_finger_header, run_finger
+from .memory import MEMORY_CSV_FIELDS, format_memory_row, print_memory_header, run_memory
+from .report import format_row, print_header, read_json, write_csv, write_json
+from .runner import run
+from .sharding import SHARDS_CSV_FIELDS, format_sharding_row, print_sharding_header, run_sharding
+from .server_load import SERVER_CSV_FIELDS, format_server_row, print_server_header, run_server_load
+from .structures import STRUCTURES
+from .threads import THREAD_STRUCTURES, THREADS_CSV_FIELDS, format_threads_row, print_threads_header, run_threads
+from .workloads import WORKLOADS
+from .working_set import ACCESS_PATTERNS
+from .working_set_bound import WORKING_SET_CSV_FIELDS, WORKING_SET_STRUCTURES, print_working_set_table, run_working_set
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks", description="Throughput of the ordered sets")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = commands.add_parser("run", help="run the workloads and report the operations per second")
+    run_parser.add_argument("--structures", nargs="+", choices=list(STRUCTURES), default=list(STRUCTURES))
+    run_parser.add_argument("--workloads", nargs="+", choices=list(WORKLOADS), default=list(WORKLOADS))
+    run_parser.add_argument("--sizes", nargs="+", type=int, default=[1000, 10000])
+    run_parser.add_argument("--repetitions", type=int, default=5)
+    run_parser.add_argument("--seed", type=int, default=0)
+    run_parser.add_argument("--json", help="write the results (with every sample) to this JSON file")
+    run_parser.add_argument("--csv", help="write the results to this CSV file")
+
+    plot_parser = commands.add_parser("plot", help="plot a JSON file written by run (needs matplotlib)")
+    plot_parser.add_argument("results")
+    plot_parser.add_argument("--output", help="save the figure to this file instead of showing it")
+
+    working_set_parser = commands.add_parser("working-set", help="comparisons and latency of the searches by working-set number")
+    working_set_parser.add_argument("--structures", nargs="+", choices=WORKING_SET_STRUCTURES, default=WORKING_SET_STRUCTURES)
+    working_set_parser.add_argument("--patterns", nargs="+", choices=list(ACCESS_PATTERNS), default=list(ACCESS_PATTERNS))
+    working_set_parser.add_argument("--size", type=int, default=2000)
+    working_set_parser.add_argument("--searches", type=int, default=10000)
+    working_set_parser.add_argument("--seed", type=int, default=0)
+    working_set_parser.add_argument("--trace", help="replay the keys of this file (one integer per line) instead of the patterns")
+    working_set_parser.add_argument("--json", help="write the results to this JSON file")
+    working_set_parser.add_argument("--csv", help="write the results to this CSV file")
+
+    threads_parser = commands.add_parser("threads", help="throughput of the thread-safe SkipLists by number of threads")
+    threads_parser.add_argument("--structures", nargs="+", choices=list(THREAD_STRUCTURES), default=list(THREAD_STRUCTURES))
+    threads_parser.add_argument("--threads", nargs="+", type=int, default=[1, 2, 4, 8])
+    threads_parser.add_argument("--size", type=int, default=10000)
+    threads_parser.add_argument("--operations", type=int, default=100000)
+    threads_parser.add_argument("--read-ratio", type=float, default=0.9, help="share of searches, the rest being inserts and deletes")
+    threads_parser.add_argument("--repetitions", type=int, default=3)
+    threads_parser.add_argument("--seed", type=int, default=0)
+    threads_parser.add_argument("--json", help="write the results to this JSON file")
+    threads_parser.add_argument("--csv", help="write the results to this CSV file")
+
+    server_parser = commands.add_parser("server", help="throughput of ToDoServer by number of concurrent clients")
+    server_parser.add_argument("--clients", nargs="+", type=int, default=[1, 8, 64])
+    server_parser.add_argument("--max-batch", nargs="+", type=int, default=[1, 4096], help="batch limits of the server (1: no coalescing)")
+    server_parser.add_argument("--pipeline", type=int, default=16, help="requests each client keeps in flight")
+    server_parser.add_argument("--size", type=int, default=10000)
+    server_parser.add_argument("--requests", type=int, default=50000)
+    server_parser.add_argument("--read-ratio", type=float, default=0.9, help="share of searches, the rest being inserts and deletes")
+    server_parser.add_argument("--repetitions", type=int, default=3)
+    server_parser.add_argument("--seed", type=int, default=0)
+    server_parser.add_argument("--json", help="write the results to this JSON file")
+    server_parser.add_argument("--csv", help="write the results to this CSV file")
+
+    shards_parser = commands.add_parser("shards", help="throughput of ShardedToDoList against a single ToDoList")
+    shards_parser.add_argument("--shards", nargs="+", type=int, default=[1, 2, 4])
+    shards_parser.add_argument("--size", type=int, default=100000)
+    shards_parser.add_argument("--operations", type=int, default=200000)
+    shards_parser.add_argument("--batch", type=int, default=1000, help="keys per insert_many / delete_many / search_many")
+    shards_parser.add_argument("--read-ratio", type=float, default=0.9, help="share of search batches, the rest being inserts and deletes")
+    shards_parser.add_argument("--skew", type=float, default=0.0, help="share of the keys in the first eighth of the key space")
+    shards_parser.add_argument("--rebalance", action="store_true", help="rebalance the shards after the preload")
+    shards_parser.add_argument("--repetitions", type=int, default=3)
+    shards_parser.add_argument("--seed", type=int, default=0)
+    shards_parser.add_argument("--json", help="write the results to this JSON file")
+    shards_parser.add_argument("--csv", help="write the results to this CSV file")
+
+    memory_parser = commands.add_parser("memory", help="bytes allocated per key once the structures are filled")
+    memory_parser.add_argument("--structures", nargs="+", choices=list(STRUCTURES), default=list(STRUCTURES))
+    memory_parser.add_argument("--sizes", nargs="+", type=int, default=[1000, 20000])
+    memory_parser.add_argument("--repetitions", type=int, default=1)
+    memory_parser.add_argument("--seed", type=int, default=0)
+    memory_parser.add_argument("--json", help="write the results to this JSON file")
+    memory_parser.add_argument("--csv", help="write the results to this CSV file")
+
+    finger_parser = commands.add_parser("finger", help="searches of a SkipList from the sentinel against from its finger")
+    finger_parser.add_argument("--queries", nargs="+", choices=list(FINGER_QUERIES), default=list(FINGER_QUERIES))
+    finger_parser.add_argument("--size", type=int, default=200000)
+    finger_parser.add_argument("--searches", type=int, default=200000)
+    finger_parser.add_argument("--repetitions", type=int, default=3)
+    finger_parser.add_argument("--seed", type=int, default=0)
+    finger_parser.add_argument("--json", help="write the results to this JSON file")
+    finger_parser.add_argument("--csv", help="write the results to this CSV file")
+
+    args = parser.parse_args(argv)
+    if args.command == "run":
+        print_header()
+        results = run(args.structures, args.workloads, args.sizes, args.repetitions, args.seed,
+                      progress=lambda result: print(format_row(result), flush=True))
+        if args.json:
+            write_json(results, args.json)
+        if args.csv:
+            write_csv(results, args.csv)
+    elif args.command == "working-set":
+        trace: Optional[List[int]] = None
+        if args.trace:
+            with open(args.trace) as file:
+                trace = [int(line) for line in file if line.strip()]
+        results = run_working_set(args.structures, args.patterns, args.size, args.searches, args.seed, trace)
+        print_working_set_table(results)
+        if args.json:
+            write_json(results, args.json)
+        if args.csv:
+            write_csv(results, args.csv, WORKING_SET_CSV_FIELDS)
+    elif args.command == "threads":
+        print_threads_header()
+        results = run_threads(args.structures, args.threads, args.size, args.operations, args.read_ratio,
+                              args.repetitions, args.seed, progress=lambda result: print(format_threads_row(result), flush=True))
+        if args.json:
+            write_json(results, args.json)
+        if args.csv:
+            write_csv(results, args.csv, THREADS_CSV_FIELDS)
+    elif args.command == "server":
+        print_server_header()
+        results = run_server_load(args.clients, args.max_batch, args.size, args.requests, args.pipeline, args.read_ratio,
+                                  args.repetitions, args.seed, progress=lambda result: print(format_server_row(result), flush=True))
+        if args.json:
+            write_json(results, args.json)
+        if args.csv:
+            write_csv(results, args.csv, SERVER_CSV_FIELDS)
+    elif args.command == "shards":
+        print_sharding_header()
+        results = run_sharding(args.shards, args.size, args.operations, args.batch, args.read_ratio, args.skew,
+                               args.rebalance, args.repetitions, args.seed,
+                               progress=lambda result: print(format_sharding_row(result), flush=True))
+        if args.json:
+            write_json(results, args.json)
+        if args.csv:
+            write_csv(results, args.csv, SHARDS_CSV_FIELDS)
+    elif args.command == "memory":
+        print_memory_header()
+        results = run_memory(args.structures, args.sizes, args.repetitions, args.seed,
+                             progress=lambda result: print(format_memory_row(result), flush=True))
+        if args.json:
+            write_json(results, args.json)
+        if args.csv:
+            write_csv(results, args.csv, MEMORY_CSV_FIELDS)
+    elif args.command == "finger":
+        print_finger_header()
+        results = run_finger(args.queries, args.size, args.searches, args.repetitions, args.seed,
+                             progress=lambda result: print(format_finger_row(result), flush=True))
+        if args.json:
+            write_json(results, args.json)
+        if args.csv:
+            write_csv(results, args.csv, FINGER_CSV_FIELDS)
+    else:
+        from .plot import plot
+        plot(read_json(args.results), args.output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+#Searches of a SkipList from the sentinel against the same SkipList searching from its finger (the predecessors of
+#the previous search), on query streams of decreasing locality. Both lists are built from the same sorted keys with
+#the same seed, so they have the same towers and only the starting point of the searches differs
+import gc
+import math
+import time
+from random import Random
+from typing import Any, Callable, Dict, Iterable, List, Optional, TextIO
+
+from SkipList import SkipList
+
+from .runner import summarize
+from .workloads import KEY_SPACE
+
+FINGER_CSV_FIELDS: List[str] = ["structure", "queries", "size", "searches", "repetitions",
+                                "ops_per_sec", "stdev", "ci95_low", "ci95_high", "speedup"]
+
+
+def sequential_queries(keys: List[int], count: int, rng: Random) -> List[int]:
+    # The keys in increasing order, over and over
+    return [keys[i % len(keys)] for i in range(count)]
+
+
+def clustered_queries(keys: List[int], count: int, rng: Random, step: int = 16) -> List[int]:
+    # Random walk over the ranks: every query lands within step positions of the previous one
+    queries: List[int] = []
+    rank: int = rng.randrange(len(keys))
+    for _ in range(count):
+        rank = min(max(rank + rng.randint(-step, step), 0), len(keys) - 1)
+        queries.append(keys[rank])
+    return queries
+
+
+def uniform_queries(keys: List[int], count: int, rng: Random) -> List[int]:
+    return rng.choices(keys, k=count)
+
+
+FINGER_QUERIES: Dict[str, Callable[[List[int], int, Random], List[int]]] = {
+    "sequential": sequential_queries,
+    "clustered": clustered_queries,
+    "uniform": uniform_queries,
+}
+
+
+def time_searches(skiplist: SkipList, queries: List[int]) -> int:
+    search: Callable[[int], bool] = skiplist.search
+    gc.collect()
+    gc.disable()
+    try:
+        start: int = time.perf_counter_ns()
+        for key in queries:
+            search(key)
+        return time.perf_counter_ns() - start
+    finally:
+        gc.enable()
+
+
+def run_finger(queries: Iterable[str], size: int, searches: int, repetitions: int = 3, seed: int = 0,
+               progress: Optional[Callable[[Dict[str, Any]], None]] = None) -> List[Dict[str, Any]]:
+    # Two results per query stream, from the sentinel then from the finger, whose speedup is relative to the first
+    results: List[Dict[str, Any]] = []
+    max_level: int = max(math.ceil(math.log2(max(size, 2))), 1)
+    for queries_name in queries:
+        throughputs: Dict[bool, List[float]] = {False: [], True: []}
+        for repetition in range(repetitions):
+            rng: Random = Random(f"{seed}/{queries_name}/{size}/{repetition}")
+            keys: List[int] = sorted(rng.sample(range(1, max(KEY_SPACE, 100 * size)), size))
+            stream: List[int] = FINGER_QUERIES[queries_name](keys, searches, rng)
+            for finger in (False, True):
+                skiplist: SkipList = SkipList.from_sorted(keys, max_level=max_level, p=0.5, finger=finger, seed=repetition)
+                throughputs[finger].append(searches / (max(time_searches(skiplist, stream), 1) / 1e9))
+
+        baseline: Optional[float] = None
+        for finger in (False, True):
+            summary: Dict[str, float] = summarize(throughputs[finger])
+            baseline = summary["mean"] if baseline is None else baseline
+            result: Dict[str, Any] = {
+                "structure": "SkipList-finger" if finger else "SkipList",
+                "queries": queries_name,
+                "size": size,
+                "searches": searches,
+                "repetitions": repetitions,
+                "ops_per_sec": summary["mean"],
+                "stdev": summary["stdev"],
+                "ci95_low": summary["ci95_low"],
+                "ci95_high": summary["ci95_high"],
+                "speedup": summary["mean"] / baseline,
+                "samples": throughputs[finger],
+            }
+            results.append(result)
+            progress(result) if progress is not None else None
+    return results
+
+
+def format_finger_row(result: Dict[str, Any]) -> str:
+    margin: float = (result["ci95_high"] - result["ci95_low"]) / 2
+    return (f"{result['queries']:<11} {result['structure']:<16} {result['ops_per_sec']:>13,.0f} ops/s  "
+            f"± {margin:<10,.0f} x{result['speedup']:.2f}")
+
+
+def print_finger_header(file: Optional[TextIO] = None) -> None:
+    print(f"{'queries':<11} {'structure':<16} {'throughput':>19}  {'(95% CI)':<12} speedup", file=file)
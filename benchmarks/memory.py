@@ -0,0 +1,64 @@
+#Memory footprint of the structures: bytes allocated per key (as traced by tracemalloc) once a fresh structure holds
+#size distinct keys, inserted one by one. Every repetition draws its own keys, the structures of a repetition
+#sharing them
+import gc
+import tracemalloc
+from random import Random
+from typing import Any, Callable, Dict, Iterable, List, Optional, TextIO
+
+from .runner import summarize
+from .structures import STRUCTURES
+from .workloads import KEY_SPACE
+
+MEMORY_CSV_FIELDS: List[str] = ["structure", "size", "repetitions", "bytes_per_key", "stdev", "ci95_low", "ci95_high"]
+
+
+def bytes_per_key(make_structure: Callable[[int], Any], keys: List[int]) -> float:
+    gc.collect()
+    tracemalloc.start()
+    try:
+        before: int = tracemalloc.get_traced_memory()[0]
+        structure: Any = make_structure(len(keys))
+        for key in keys:
+            structure.insert(key)
+        after: int = tracemalloc.get_traced_memory()[0]
+    finally:
+        tracemalloc.stop()
+    return (after - before) / len(keys)
+
+
+def run_memory(structures: Iterable[str], sizes: Iterable[int], repetitions: int = 1, seed: int = 0,
+               progress: Optional[Callable[[Dict[str, Any]], None]] = None) -> List[Dict[str, Any]]:
+    results: List[Dict[str, Any]] = []
+    structures = list(structures)
+    for size in sizes:
+        samples: Dict[str, List[float]] = {name: [] for name in structures}
+        for repetition in range(repetitions):
+            keys: List[int] = Random(f"{seed}/{size}/{repetition}").sample(range(1, max(KEY_SPACE, 100 * size)), size)
+            for structure_name in structures:
+                samples[structure_name].append(bytes_per_key(STRUCTURES[structure_name], keys))
+
+        for structure_name in structures:
+            summary: Dict[str, float] = summarize(samples[structure_name])
+            result: Dict[str, Any] = {
+                "structure": structure_name,
+                "size": size,
+                "repetitions": repetitions,
+                "bytes_per_key": summary["mean"],
+                "stdev": summary["stdev"],
+                "ci95_low": summary["ci95_low"],
+                "ci95_high": summary["ci95_high"],
+                "samples": samples[structure_name],
+            }
+            results.append(result)
+            progress(result) if progress is not None else None
+    return results
+
+
+def format_memory_row(result: Dict[str, Any]) -> str:
+    margin: float = (result["ci95_high"] - result["ci95_low"]) / 2
+    return f"{result['size']:>9} {result['structure']:<21} {result['bytes_per_key']:>10,.1f} bytes/key  ± {margin:,.1f}"
+
+
+def print_memory_header(file: Optional[TextIO] = None) -> None:
+    print(f"{'size':>9} {'structure':<21} {'memory':>20}  (95% CI)", file=file)
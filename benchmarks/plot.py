@@ -0,0 +1,34 @@
+#Optional step, run on a JSON file written by the benchmark: matplotlib is only needed here
+from typing import Any, Dict, List, Optional
+
+
+def plot(results: List[Dict[str, Any]], output: Optional[str] = None) -> None:
+    # One panel per workload: throughput against size, one line per structure with its confidence interval
+    try:
+        import matplotlib.pyplot as plt
+    except ImportError:
+        raise SystemExit("Plotting needs matplotlib (pip install matplotlib)")
+
+    workloads: List[str] = list(dict.fromkeys(result["workload"] for result in results))
+    figure, axes = plt.subplots(1, len(workloads), figsize=(5 * len(workloads), 4), squeeze=False)
+    for axis, workload in zip(axes[0], workloads):
+        for structure in dict.fromkeys(result["structure"] for result in results):
+            points = sorted((result["size"], result["ops_per_sec"], result["ci95_low"], result["ci95_high"])
+                            for result in results if result["workload"] == workload and result["structure"] == structure)
+            if not points:
+                continue
+            sizes, means, lows, highs = zip(*points)
+            axis.plot(sizes, means, marker="o", label=structure)
+            axis.fill_between(sizes, lows, highs, alpha=0.2)
+        axis.set_xscale("log")
+        axis.set_title(workload)
+        axis.set_xlabel("Number of keys")
+        axis.set_ylabel("Operations per second")
+        axis.grid(True)
+        axis.legend()
+    figure.tight_layout()
+
+    if output is not None:
+        figure.savefig(output)
+    else:
+        plt.show()
@@ -0,0 +1,40 @@
+#Results are lists of flat dictionaries (see runner.run), written as JSON (with the raw samples) or CSV (without)
+import csv
+import json
+from typing import Any, Dict, List, Optional, TextIO
+
+CSV_FIELDS: List[str] = ["structure", "workload", "size", "operations", "repetitions",
+                         "ops_per_sec", "stdev", "ci95_low", "ci95_high"]
+
+
+def write_json(results: List[Dict[str, Any]], path: str) -> None:
+    with open(path, "w") as file:
+        json.dump(results, file, indent=2)
+
+
+def read_json(path: str) -> List[Dict[str, Any]]:
+    with open(path) as file:
+        return json.load(file)
+
+
+def write_csv(results: List[Dict[str, Any]], path: str, fields: List[str] = CSV_FIELDS) -> None:
+    with open(path, "w", newline="") as file:
+        writer = csv.DictWriter(file, fieldnames=fields, extrasaction="ignore")
+        writer.writeheader()
+        writer.writerows(results)
+
+
+def format_row(result: Dict[str, Any]) -> str:
+    margin: float = (result["ci95_high"] - result["ci95_low"]) / 2
+    return (f"{result['workload']:<15} {result['size']:>9} {result['structure']:<21} "
+            f"{result['ops_per_sec']:>13,.0f} ops/s  ± {margin:,.0f}")
+
+
+def print_header(file: Optional[TextIO] = None) -> None:
+    print(f"{'workload':<15} {'size':>9} {'structure':<21} {'throughput':>19}  (95% CI)", file=file)
+
+
+def print_table(results: List[Dict[str, Any]], file: Optional[TextIO] = None) -> None:
+    print_header(file)
+    for result in results:
+        print(format_row(result), file=file)
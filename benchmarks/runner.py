@@ -0,0 +1,81 @@
+#Runs every (structure, workload, size) combination for a number of repetitions, each one on a fresh structure
+#and a fresh workload, and summarizes the throughputs with a 95% confidence interval
+import gc
+import statistics
+import time
+from random import Random
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+from .structures import STRUCTURES
+from .workloads import WORKLOADS, Workload
+
+# Two-sided 95% quantiles of Student's t distribution, by degrees of freedom (the normal one beyond)
+T_95: Dict[int, float] = {1: 12.706, 2: 4.303, 3: 3.182, 4: 2.776, 5: 2.571, 6: 2.447, 7: 2.365, 8: 2.306, 9: 2.262,
+                          10: 2.228, 12: 2.179, 15: 2.131, 20: 2.086, 25: 2.060, 30: 2.042}
+
+
+def _t_95(degrees: int) -> float:
+    # Between two tabulated degrees, the smaller one (wider interval)
+    return T_95[max(d for d in T_95 if d <= degrees)] if degrees <= 30 else 1.96
+
+
+def time_workload(structure: Any, workload: Workload) -> int:
+    # Nanoseconds taken by the operations of the workload, the garbage collector being off meanwhile
+    for key in workload.preload:
+        structure.insert(key)
+    methods: List[Callable[[int], Any]] = [structure.insert, structure.delete, structure.search]
+    operations = workload.operations
+
+    gc.collect()
+    gc.disable()
+    try:
+        start: int = time.perf_counter_ns()
+        for operation, key in operations:
+            methods[operation](key)
+        return time.perf_counter_ns() - start
+    finally:
+        gc.enable()
+
+
+def summarize(samples: List[float]) -> Dict[str, float]:
+    mean: float = statistics.fmean(samples)
+    if len(samples) < 2:
+        return {"mean": mean, "stdev": 0.0, "ci95_low": mean, "ci95_high": mean}
+    stdev: float = statistics.stdev(samples)
+    margin: float = _t_95(len(samples) - 1) * stdev / len(samples) ** 0.5
+    return {"mean": mean, "stdev": stdev, "ci95_low": mean - margin, "ci95_high": mean + margin}
+
+
+def run(structures: Iterable[str], workloads: Iterable[str], sizes: Iterable[int], repetitions: int = 5,
+        seed: int = 0, progress: Optional[Callable[[Dict[str, Any]], None]] = None) -> List[Dict[str, Any]]:
+    # One result per combination; repetition r of every structure sees the same workload (seeded from seed, r),
+    # so the structures are compared on identical operations
+    results: List[Dict[str, Any]] = []
+    for workload_name in workloads:
+        for size in sizes:
+            for structure_name in structures:
+                throughputs: List[float] = []
+                operations: int = 0
+                for repetition in range(repetitions):
+                    workload: Workload = WORKLOADS[workload_name](size, Random(f"{seed}/{workload_name}/{size}/{repetition}"))
+                    structure: Any = STRUCTURES[structure_name](workload.max_size)
+                    elapsed: int = time_workload(structure, workload)
+                    operations = len(workload.operations)
+                    throughputs.append(operations / (max(elapsed, 1) / 1e9))
+
+                summary: Dict[str, float] = summarize(throughputs)
+                result: Dict[str, Any] = {
+                    "structure": structure_name,
+                    "workload": workload_name,
+                    "size": size,
+                    "operations": operations,
+                    "repetitions": repetitions,
+                    "ops_per_sec": summary["mean"],
+                    "stdev": summary["stdev"],
+                    "ci95_low": summary["ci95_low"],
+                    "ci95_high": summary["ci95_high"],
+                    "samples": throughputs,
+                }
+                results.append(result)
+                progress(result) if progress is not None else None
+    return results
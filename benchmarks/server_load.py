@@ -0,0 +1,134 @@
+#Load generator of ToDoServer: the server runs in a process of its own (on a Unix socket, or on TCP where there is
+#none), and 1, 8, 64, ... clients connected at once share a fixed number of mixed requests, each one keeping up to
+#pipeline requests in flight. Every client count is run once per --max-batch value of the server, so the rows with
+#max_batch 1 (no coalescing) show what the batching buys.
+#The clients all run in this process, on one event loop: with many of them the client side can be the bottleneck
+import asyncio
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from random import Random
+from typing import Any, Callable, Dict, List, Optional, TextIO, Tuple
+
+from ToDoClient import ToDoClient
+
+from .runner import summarize
+from .threads import mixed_operations
+
+SERVER_CSV_FIELDS: List[str] = ["max_batch", "clients", "pipeline", "size", "requests", "read_ratio", "repetitions",
+                                "ops_per_sec", "stdev", "ci95_low", "ci95_high"]
+
+STRUCTURE_NAME: str = "bench"
+SERVER_SCRIPT: str = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "ToDoServer.py")
+
+
+class ServerProcess:
+    """ToDoServer.py started in a subprocess, on a temporary Unix socket if the platform has them"""
+
+    def __init__(self, max_batch: int) -> None:
+        self.directory: Optional[tempfile.TemporaryDirectory] = None
+        command: List[str] = [sys.executable, SERVER_SCRIPT, "--max-batch", str(max_batch)]
+        if hasattr(socket, "AF_UNIX"):
+            self.directory = tempfile.TemporaryDirectory()
+            self.path: Optional[str] = os.path.join(self.directory.name, "todo.sock")
+            command += ["--unix", self.path]
+        else:
+            self.path = None
+            command += ["--port", "0"]
+        self.process: subprocess.Popen = subprocess.Popen(command, stdout=subprocess.PIPE, text=True)
+        # The server prints its address once it listens
+        line: str = self.process.stdout.readline()
+        if not line.startswith("Serving on"):
+            self.close()
+            raise RuntimeError("The server did not start")
+        self.port: int = 0 if self.path is not None else int(line.rsplit(",", 1)[1].strip(" )\n"))
+
+    async def connect(self) -> ToDoClient:
+        return await ToDoClient.connect(port=self.port, path=self.path)
+
+    def close(self) -> None:
+        self.process.terminate()
+        self.process.wait()
+        self.process.stdout.close()
+        if self.directory is not None:
+            self.directory.cleanup()
+
+    def __enter__(self) -> "ServerProcess":
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.close()
+
+
+async def _client(client: ToDoClient, operations: List[Tuple[int, int]], pipeline: int) -> None:
+    methods: List[Callable[[str, int], Any]] = [client.insert, client.delete, client.search]
+    for start in range(0, len(operations), pipeline):
+        await asyncio.gather(*(methods[operation](STRUCTURE_NAME, key)
+                               for operation, key in operations[start:start + pipeline]))
+
+
+async def time_clients(server: ServerProcess, preload: List[int], per_client: List[List[Tuple[int, int]]],
+                       pipeline: int) -> int:
+    # Nanoseconds for every client to get all its answers, the connections being open and the keys loaded beforehand
+    clients: List[ToDoClient] = [await server.connect() for _ in per_client]
+    try:
+        await clients[0].delete_many(STRUCTURE_NAME, await clients[0].irange(STRUCTURE_NAME))
+        await clients[0].insert_many(STRUCTURE_NAME, preload)
+        start: int = time.perf_counter_ns()
+        await asyncio.gather(*(_client(client, operations, pipeline) for client, operations in zip(clients, per_client)))
+        return time.perf_counter_ns() - start
+    finally:
+        for client in clients:
+            await client.close()
+
+
+def run_server_load(client_counts: List[int], max_batches: List[int], size: int, requests: int, pipeline: int = 16,
+                    read_ratio: float = 0.9, repetitions: int = 3, seed: int = 0,
+                    progress: Optional[Callable[[Dict[str, Any]], None]] = None) -> List[Dict[str, Any]]:
+    # The structure starts with size keys out of 2 * size before every run; the same requests are dealt out to the
+    # clients of every client count
+    results: List[Dict[str, Any]] = []
+    key_space: int = 2 * size
+    for max_batch in max_batches:
+        with ServerProcess(max_batch) as server:
+            for client_count in client_counts:
+                throughputs: List[float] = []
+                for repetition in range(repetitions):
+                    rng: Random = Random(f"{seed}/{size}/{repetition}")
+                    preload: List[int] = rng.sample(range(key_space), size)
+                    workload: List[Tuple[int, int]] = mixed_operations(requests, key_space, read_ratio, rng)
+                    elapsed: int = asyncio.run(time_clients(
+                        server, preload, [workload[i::client_count] for i in range(client_count)], pipeline))
+                    throughputs.append(requests / (max(elapsed, 1) / 1e9))
+
+                summary: Dict[str, float] = summarize(throughputs)
+                result: Dict[str, Any] = {
+                    "max_batch": max_batch,
+                    "clients": client_count,
+                    "pipeline": pipeline,
+                    "size": size,
+                    "requests": requests,
+                    "read_ratio": read_ratio,
+                    "repetitions": repetitions,
+                    "ops_per_sec": summary["mean"],
+                    "stdev": summary["stdev"],
+                    "ci95_low": summary["ci95_low"],
+                    "ci95_high": summary["ci95_high"],
+                    "samples": throughputs,
+                }
+                results.append(result)
+                progress(result) if progress is not None else None
+    return results
+
+
+def format_server_row(result: Dict[str, Any]) -> str:
+    margin: float = (result["ci95_high"] - result["ci95_low"]) / 2
+    return (f"{result['max_batch']:>9} {result['clients']:>7} {result['pipeline']:>8} "
+            f"{result['ops_per_sec']:>13,.0f} req/s  ± {margin:,.0f}")
+
+
+def print_server_header(file: Optional[TextIO] = None) -> None:
+    print(f"{'max_batch':>9} {'clients':>7} {'pipeline':>8} {'throughput':>19}  (95% CI)", file=file)
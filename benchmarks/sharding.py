@@ -0,0 +1,101 @@
+#Throughput of ShardedToDoList against a single ToDoList in this process: both get the same batches of keys (searches,
+#inserts and deletes, batch keys at a time through search_many / insert_many / delete_many) after the same preload.
+#With skew > 0 that share of the keys falls in the first eighth of the key space, which piles them up in the first
+#shard; --rebalance then rebalances the shards after the preload.
+#The shards only run in parallel when the machine has a core for each of them (and one for this process)
+import gc
+import time
+from random import Random
+from typing import Any, Callable, Dict, List, Optional, TextIO, Tuple
+
+from ShardedToDoList import ShardedToDoList
+from ToDoList import ToDoList
+
+from .runner import summarize
+from .structures import EPSILON
+from .workloads import DELETE, INSERT, KEY_SPACE, SEARCH
+
+SHARDS_CSV_FIELDS: List[str] = ["structure", "shards", "size", "operations", "batch", "skew", "repetitions",
+                                "ops_per_sec", "stdev", "ci95_low", "ci95_high", "speedup"]
+
+
+def _key(rng: Random, skew: float) -> int:
+    return rng.randrange(KEY_SPACE // 8) if rng.random() < skew else rng.randrange(KEY_SPACE)
+
+
+def batched_operations(count: int, batch: int, read_ratio: float, skew: float, rng: Random) -> List[Tuple[int, List[int]]]:
+    # (INSERT | DELETE | SEARCH, keys) batches, searches with probability read_ratio, the rest split evenly between
+    # inserts and deletes
+    operations: List[Tuple[int, List[int]]] = []
+    for _ in range(0, count, batch):
+        draw: float = rng.random()
+        operation: int = SEARCH if draw < read_ratio else INSERT if draw < (1 + read_ratio) / 2 else DELETE
+        operations.append((operation, [_key(rng, skew) for _ in range(batch)]))
+    return operations
+
+
+def time_batches(structure: Any, operations: List[Tuple[int, List[int]]]) -> int:
+    methods: List[Callable[[List[int]], Any]] = [structure.insert_many, structure.delete_many, structure.search_many]
+    gc.collect()
+    gc.disable()
+    try:
+        start: int = time.perf_counter_ns()
+        for operation, keys in operations:
+            methods[operation](keys)
+        return time.perf_counter_ns() - start
+    finally:
+        gc.enable()
+
+
+def run_sharding(shard_counts: List[int], size: int, operations: int, batch: int = 1000, read_ratio: float = 0.9,
+                 skew: float = 0.0, rebalance: bool = False, repetitions: int = 3, seed: int = 0,
+                 progress: Optional[Callable[[Dict[str, Any]], None]] = None) -> List[Dict[str, Any]]:
+    # First row: the single ToDoList, whose throughput the speedups are relative to
+    results: List[Dict[str, Any]] = []
+    baseline: Optional[float] = None
+    for shards in [0] + shard_counts:
+        throughputs: List[float] = []
+        for repetition in range(repetitions):
+            rng: Random = Random(f"{seed}/{size}/{repetition}")
+            preload: List[int] = sorted(_key(rng, skew) for _ in range(size))
+            workload: List[Tuple[int, List[int]]] = batched_operations(operations, batch, read_ratio, skew, rng)
+            if shards == 0:
+                elapsed: int = time_batches(ToDoList.from_sorted(preload, 4, EPSILON, auto_height=True), workload)
+            else:
+                with ShardedToDoList(shards, key_range=(0, KEY_SPACE), epsilon=EPSILON) as sharded:
+                    sharded.insert_many(preload)
+                    if rebalance:
+                        sharded.rebalance()
+                    elapsed = time_batches(sharded, workload)
+            throughputs.append(operations / (max(elapsed, 1) / 1e9))
+
+        summary: Dict[str, float] = summarize(throughputs)
+        baseline = summary["mean"] if baseline is None else baseline
+        result: Dict[str, Any] = {
+            "structure": "ToDoList" if shards == 0 else "ShardedToDoList",
+            "shards": max(shards, 1),
+            "size": size,
+            "operations": operations,
+            "batch": batch,
+            "skew": skew,
+            "repetitions": repetitions,
+            "ops_per_sec": summary["mean"],
+            "stdev": summary["stdev"],
+            "ci95_low": summary["ci95_low"],
+            "ci95_high": summary["ci95_high"],
+            "speedup": summary["mean"] / baseline,
+            "samples": throughputs,
+        }
+        results.append(result)
+        progress(result) if progress is not None else None
+    return results
+
+
+def format_sharding_row(result: Dict[str, Any]) -> str:
+    margin: float = (result["ci95_high"] - result["ci95_low"]) / 2
+    return (f"{result['structure']:<16} {result['shards']:>6} {result['ops_per_sec']:>13,.0f} ops/s  "
+            f"± {margin:<10,.0f} x{result['speedup']:.2f}")
+
+
+def print_sharding_header(file: Optional[TextIO] = None) -> None:
+    print(f"{'structure':<16} {'shards':>6} {'throughput':>19}  {'(95% CI)':<12} speedup", file=file)
@@ -0,0 +1,26 @@
+#A structure factory takes the largest number of keys the workload holds, and returns an empty structure sized for it
+#(the fixed-height ones get the height that keeps their top level down to a single node)
+#Run from the root of the repository (python -m benchmarks), where the structures live
+import math
+from typing import Any, Callable, Dict
+
+from SkipList import SkipList
+from ToDoList import ToDoList
+from WorkingToDoList import WorkingToDoList
+from ArrayToDoList import ArrayToDoList
+
+EPSILON: float = 0.2
+
+
+def _height(max_size: int) -> int:
+    return max(math.ceil(math.log(max(max_size, 2), 2 - EPSILON)), 1)
+
+
+STRUCTURES: Dict[str, Callable[[int], Any]] = {
+    "SkipList": lambda max_size: SkipList(max_level=4, p=0.5, adaptive=True),
+    "ToDoList": lambda max_size: ToDoList(h=4, epsilon=EPSILON, auto_height=True),
+    "WorkingToDoList": lambda max_size: WorkingToDoList(h=_height(max_size), epsilon=EPSILON),
+    # Rebuilds after every successful search, as the paper does: the baseline of the lazy rebuild scheduling
+    "WorkingToDoList-eager": lambda max_size: WorkingToDoList(h=_height(max_size), epsilon=EPSILON, rebuild_debt=0),
+    "ArrayToDoList": lambda max_size: ArrayToDoList(h=_height(max_size), epsilon=EPSILON, capacity=max_size),
+}
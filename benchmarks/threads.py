@@ -0,0 +1,146 @@
+#Multi-threaded throughput of the thread-safe SkipLists: a fixed number of mixed operations (searches, inserts and
+#deletes over a shared key space) is split between 1, 2, 4, ... threads that start together on a barrier, and the
+#throughput of every thread count is compared to the single-threaded one.
+#The baseline is the plain SkipList behind one global lock, the only safe option before ConcurrentSkipList.
+#The threads only run in parallel on a free-threaded build of CPython (python3.13t and later); with the GIL the
+#numbers show the cost of the locking rather than any scaling
+import gc
+import sys
+import threading
+import time
+from random import Random
+from typing import Any, Callable, Dict, List, Optional, TextIO, Tuple
+
+from ConcurrentSkipList import ConcurrentSkipList
+from SkipList import SkipList
+
+from .runner import summarize
+from .workloads import DELETE, INSERT, SEARCH
+
+
+class LockedSkipList:
+    """SkipList with every operation behind a single lock"""
+
+    def __init__(self, max_level: int) -> None:
+        self.skip_list: SkipList = SkipList(max_level=max_level, p=0.5)
+        self.lock: threading.Lock = threading.Lock()
+
+    def insert(self, key: int) -> None:
+        with self.lock:
+            self.skip_list.insert(key)
+
+    def delete(self, key: int) -> None:
+        with self.lock:
+            self.skip_list.delete(key)
+
+    def search(self, key: int) -> bool:
+        with self.lock:
+            return self.skip_list.search(key)
+
+
+def _max_level(size: int) -> int:
+    return max(size.bit_length(), 4)
+
+
+THREAD_STRUCTURES: Dict[str, Callable[[int], Any]] = {
+    "LockedSkipList": lambda size: LockedSkipList(_max_level(size)),
+    "ConcurrentSkipList": lambda size: ConcurrentSkipList(_max_level(size), p=0.5),
+}
+
+THREADS_CSV_FIELDS: List[str] = ["structure", "threads", "size", "operations", "read_ratio", "repetitions",
+                                 "ops_per_sec", "stdev", "ci95_low", "ci95_high", "speedup"]
+
+
+def gil_enabled() -> bool:
+    # sys._is_gil_enabled only exists from Python 3.13 on, the GIL being always there before
+    return getattr(sys, "_is_gil_enabled", lambda: True)()
+
+
+def mixed_operations(count: int, key_space: int, read_ratio: float, rng: Random) -> List[Tuple[int, int]]:
+    # Searches with probability read_ratio, the rest split evenly between inserts and deletes, which keeps the
+    # number of keys around its starting point
+    operations: List[Tuple[int, int]] = []
+    for _ in range(count):
+        draw: float = rng.random()
+        operation: int = SEARCH if draw < read_ratio else INSERT if draw < (1 + read_ratio) / 2 else DELETE
+        operations.append((operation, rng.randrange(key_space)))
+    return operations
+
+
+def time_threads(structure: Any, per_thread: List[List[Tuple[int, int]]]) -> int:
+    # Nanoseconds from the moment every thread is ready to the moment the last one is done
+    barrier: threading.Barrier = threading.Barrier(len(per_thread) + 1)
+    methods: List[Callable[[int], Any]] = [structure.insert, structure.delete, structure.search]
+
+    def worker(operations: List[Tuple[int, int]]) -> None:
+        barrier.wait()
+        for operation, key in operations:
+            methods[operation](key)
+
+    threads: List[threading.Thread] = [threading.Thread(target=worker, args=(operations,)) for operations in per_thread]
+    for thread in threads:
+        thread.start()
+    gc.collect()
+    gc.disable()
+    try:
+        barrier.wait()
+        start: int = time.perf_counter_ns()
+        for thread in threads:
+            thread.join()
+        return time.perf_counter_ns() - start
+    finally:
+        gc.enable()
+
+
+def run_threads(structures: List[str], thread_counts: List[int], size: int, operations: int, read_ratio: float = 0.9,
+                repetitions: int = 3, seed: int = 0,
+                progress: Optional[Callable[[Dict[str, Any]], None]] = None) -> List[Dict[str, Any]]:
+    # The structures start with size keys out of 2 * size; the same operations are dealt out to the threads of
+    # every thread count, so only the parallelism changes from one row to the next
+    results: List[Dict[str, Any]] = []
+    key_space: int = 2 * size
+    for structure_name in structures:
+        single: Optional[float] = None
+        for thread_count in thread_counts:
+            throughputs: List[float] = []
+            for repetition in range(repetitions):
+                rng: Random = Random(f"{seed}/{size}/{repetition}")
+                preload: List[int] = rng.sample(range(key_space), size)
+                workload: List[Tuple[int, int]] = mixed_operations(operations, key_space, read_ratio, rng)
+                structure: Any = THREAD_STRUCTURES[structure_name](size)
+                for key in preload:
+                    structure.insert(key)
+                elapsed: int = time_threads(structure, [workload[i::thread_count] for i in range(thread_count)])
+                throughputs.append(operations / (max(elapsed, 1) / 1e9))
+
+            summary: Dict[str, float] = summarize(throughputs)
+            single = summary["mean"] if single is None else single
+            result: Dict[str, Any] = {
+                "structure": structure_name,
+                "threads": thread_count,
+                "size": size,
+                "operations": operations,
+                "read_ratio": read_ratio,
+                "repetitions": repetitions,
+                "ops_per_sec": summary["mean"],
+                "stdev": summary["stdev"],
+                "ci95_low": summary["ci95_low"],
+                "ci95_high": summary["ci95_high"],
+                "speedup": summary["mean"] / single,  # Against the first thread count
+                "samples": throughputs,
+            }
+            results.append(result)
+            progress(result) if progress is not None else None
+    return results
+
+
+def format_threads_row(result: Dict[str, Any]) -> str:
+    margin: float = (result["ci95_high"] - result["ci95_low"]) / 2
+    return (f"{result['structure']:<20} {result['threads']:>7} {result['ops_per_sec']:>13,.0f} ops/s  "
+            f"± {margin:<10,.0f} x{result['speedup']:.2f}")
+
+
+def print_threads_header(file: Optional[TextIO] = None) -> None:
+    if gil_enabled():
+        print("(GIL enabled: the threads take turns, run a free-threaded build to see them scale)", file=file)
+    print(f"{'structure':<20} {'threads':>7} {'throughput':>19}  {'(95% CI)':<12} speedup", file=file)
@@ -0,0 +1,91 @@
+#Access sequences with a controlled working-set number: w(x) at some access of x is the number of distinct keys
+#accessed since the previous access of x (x included), which is what a working-set structure should pay log of.
+#A generator takes the keys of the structure, the number of accesses and a Random, and returns the keys accessed
+from bisect import bisect_left
+from itertools import accumulate
+from math import log2
+from random import Random
+from typing import Callable, Dict, List, Optional
+
+
+def zipf_accesses(keys: List[int], count: int, rng: Random, s: float = 1.1) -> List[int]:
+    # The i-th most popular key (in a random order of popularity) is accessed with probability proportional to 1 / i ** s
+    popularity: List[int] = keys[:]
+    rng.shuffle(popularity)
+    cumulative: List[float] = list(accumulate(1 / rank ** s for rank in range(1, len(keys) + 1)))
+    total: float = cumulative[-1]
+    return [popularity[bisect_left(cumulative, rng.random() * total)] for _ in range(count)]
+
+
+def lru_stack_accesses(keys: List[int], count: int, rng: Random) -> List[int]:
+    # The keys are kept in a move-to-front stack and every access takes the key at a stack distance d drawn
+    # log-uniformly in [0, len(keys)): once warm, w(x) = d + 1, and every bucket [2 ** b, 2 ** (b + 1)) of w
+    # gets about the same share of the accesses
+    stack: List[int] = keys[:]
+    rng.shuffle(stack)
+    accesses: List[int] = []
+    for _ in range(count):
+        distance: int = min(int(2 ** (rng.random() * log2(len(stack)))) - 1, len(stack) - 1)
+        key: int = stack.pop(distance)
+        stack.insert(0, key)
+        accesses.append(key)
+    return accesses
+
+
+def phase_accesses(keys: List[int], count: int, rng: Random, hot_size: int = 0, phases: int = 8,
+                   hot_fraction: float = 0.9) -> List[int]:
+    # The accesses go through phases of equal length, each with its own random hot set (len(keys) // 64 keys by
+    # default) that takes hot_fraction of the accesses, the others being uniform: w is small inside a phase and
+    # jumps when the hot set moves
+    hot_size = hot_size or max(len(keys) // 64, 1)
+    phase_length: int = max(count // phases, 1)
+    accesses: List[int] = []
+    hot: List[int] = []
+    for i in range(count):
+        if i % phase_length == 0:
+            hot = rng.sample(keys, hot_size)
+        accesses.append(rng.choice(hot) if rng.random() < hot_fraction else rng.choice(keys))
+    return accesses
+
+
+def working_set_numbers(accesses: List[int]) -> List[Optional[int]]:
+    # w of every access (None for the first access of a key), in O(log m) each: a Fenwick tree over the times
+    # holds a one at the time of the last access of every key, so w(x) is the number of ones from the last
+    # access of x onwards
+    size: int = len(accesses)
+    tree: List[int] = [0] * (size + 1)
+    total: int = 0
+
+    def add(time: int, delta: int) -> None:
+        time += 1
+        while time <= size:
+            tree[time] += delta
+            time += time & -time
+
+    def prefix(time: int) -> int:
+        # Number of ones at times < time
+        result: int = 0
+        while time > 0:
+            result += tree[time]
+            time -= time & -time
+        return result
+
+    last: Dict[int, int] = {}
+    numbers: List[Optional[int]] = []
+    for time, key in enumerate(accesses):
+        if key in last:
+            numbers.append(total - prefix(last[key]))
+            add(last[key], -1)
+        else:
+            numbers.append(None)
+            total += 1
+        add(time, 1)
+        last[key] = time
+    return numbers
+
+
+ACCESS_PATTERNS: Dict[str, Callable[[List[int], int, Random], List[int]]] = {
+    "zipf": zipf_accesses,
+    "lru-stack": lru_stack_accesses,
+    "phases": phase_accesses,
+}
@@ -0,0 +1,146 @@
+#Cost of every search against its working-set number w(x): the same access sequence is replayed twice on each
+#structure (loaded with the same keys), once with integer keys for the latencies and once with CountedKey keys for
+#the number of key comparisons, and both are averaged by bucket [2 ** b, 2 ** (b + 1)) of w
+import gc
+import statistics
+import time
+from math import log2
+from random import Random
+from typing import Any, Dict, List, Optional
+
+from .structures import STRUCTURES
+from .working_set import ACCESS_PATTERNS, working_set_numbers
+
+WORKING_SET_STRUCTURES: List[str] = ["SkipList", "ToDoList", "WorkingToDoList"]  # The ones that take any comparable key
+
+
+class CountedKey:
+    """Integer key that counts every comparison it takes part in (in CountedKey.comparisons)"""
+    __slots__ = ("key",)
+    comparisons: int = 0
+
+    def __init__(self, key: int) -> None:
+        self.key: int = key
+
+    @staticmethod
+    def _value(other: Any) -> Any:
+        return other.key if isinstance(other, CountedKey) else other
+
+    def __lt__(self, other: Any) -> bool:
+        CountedKey.comparisons += 1
+        return self.key < CountedKey._value(other)
+
+    def __le__(self, other: Any) -> bool:
+        CountedKey.comparisons += 1
+        return self.key <= CountedKey._value(other)
+
+    def __gt__(self, other: Any) -> bool:
+        CountedKey.comparisons += 1
+        return self.key > CountedKey._value(other)
+
+    def __ge__(self, other: Any) -> bool:
+        CountedKey.comparisons += 1
+        return self.key >= CountedKey._value(other)
+
+    def __eq__(self, other: Any) -> bool:
+        CountedKey.comparisons += 1
+        return self.key == CountedKey._value(other)
+
+    def __ne__(self, other: Any) -> bool:
+        CountedKey.comparisons += 1
+        return self.key != CountedKey._value(other)
+
+    def __hash__(self) -> int:
+        return hash(self.key)
+
+
+def _timer_overhead() -> int:
+    # Smallest time measured around nothing, subtracted from every latency
+    samples: List[int] = []
+    for _ in range(1000):
+        start: int = time.perf_counter_ns()
+        samples.append(time.perf_counter_ns() - start)
+    return min(samples)
+
+
+def _load(structure_name: str, keys: List[Any]) -> Any:
+    structure: Any = STRUCTURES[structure_name](len(keys))
+    for key in keys:
+        structure.insert(key)
+    return structure
+
+
+def measure(structure_name: str, keys: List[int], accesses: List[int]) -> List[List[int]]:
+    # (latency in ns, number of comparisons) of every search of accesses
+    structure: Any = _load(structure_name, keys)
+    search = structure.search
+    overhead: int = _timer_overhead()
+    latencies: List[int] = []
+    gc.collect()
+    gc.disable()
+    try:
+        for key in accesses:
+            start: int = time.perf_counter_ns()
+            search(key)
+            latencies.append(max(time.perf_counter_ns() - start - overhead, 0))
+    finally:
+        gc.enable()
+
+    counted: Dict[int, CountedKey] = {key: CountedKey(key) for key in keys}
+    structure = _load(structure_name, [counted[key] for key in keys])
+    search = structure.search
+    comparisons: List[int] = []
+    for key in accesses:
+        before: int = CountedKey.comparisons
+        search(counted[key])
+        comparisons.append(CountedKey.comparisons - before)
+    return [latencies, comparisons]
+
+
+def run_working_set(structures: List[str], patterns: List[str], size: int, searches: int, seed: int = 0,
+                    trace: Optional[List[int]] = None) -> List[Dict[str, Any]]:
+    # One result per (structure, pattern, bucket of w); a trace (keys accessed, in order) replaces the patterns
+    sequences: Dict[str, List[int]] = {}
+    if trace is not None:
+        sequences["trace"] = trace
+    else:
+        rng: Random = Random(seed)
+        keys: List[int] = rng.sample(range(1, 100 * size), size)
+        for pattern in patterns:
+            sequences[pattern] = ACCESS_PATTERNS[pattern](keys, searches, Random(f"{seed}/{pattern}"))
+
+    results: List[Dict[str, Any]] = []
+    for pattern, accesses in sequences.items():
+        keys = sorted(set(accesses)) if trace is not None else keys
+        buckets: Dict[int, List[int]] = {}  # Bucket of w -> positions of the accesses (first accesses left out)
+        for position, number in enumerate(working_set_numbers(accesses)):
+            if number is not None:
+                buckets.setdefault(int(log2(number)), []).append(position)
+
+        for structure_name in structures:
+            latencies, comparisons = measure(structure_name, keys, accesses)
+            for bucket in sorted(buckets):
+                positions: List[int] = buckets[bucket]
+                results.append({
+                    "structure": structure_name,
+                    "pattern": pattern,
+                    "size": len(keys),
+                    "w_low": 2 ** bucket,
+                    "w_high": 2 ** (bucket + 1) - 1,
+                    "searches": len(positions),
+                    "mean_comparisons": statistics.fmean(comparisons[p] for p in positions),
+                    "mean_latency_ns": statistics.fmean(latencies[p] for p in positions),
+                    "median_latency_ns": statistics.median(latencies[p] for p in positions),
+                })
+    return results
+
+
+WORKING_SET_CSV_FIELDS: List[str] = ["structure", "pattern", "size", "w_low", "w_high", "searches",
+                                     "mean_comparisons", "mean_latency_ns", "median_latency_ns"]
+
+
+def print_working_set_table(results: List[Dict[str, Any]]) -> None:
+    print(f"{'pattern':<10} {'structure':<16} {'w':>15} {'searches':>9} {'comparisons':>12} {'latency (ns)':>13}")
+    for result in results:
+        print(f"{result['pattern']:<10} {result['structure']:<16} {result['w_low']:>7}-{result['w_high']:<7} "
+              f"{result['searches']:>9} {result['mean_comparisons']:>12.1f} {result['mean_latency_ns']:>13,.0f}")
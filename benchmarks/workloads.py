@@ -0,0 +1,123 @@
+#A workload is a function (size, rng) -> Workload: the keys loaded before the clock starts, and the timed operations.
+#Everything is generated up front, so the timed loop only dispatches the operations
+from bisect import bisect_left
+from itertools import accumulate
+from random import Random
+from typing import Callable, Dict, Iterator, List, NamedTuple, Tuple
+
+INSERT: int = 0
+DELETE: int = 1
+SEARCH: int = 2
+
+KEY_SPACE: int = 10_000_000  # Keys are drawn from range(1, max(KEY_SPACE, 100 * size))
+
+
+class Workload(NamedTuple):
+    preload: List[int]  # Inserted (in this order) before timing
+    operations: List[Tuple[int, int]]  # (INSERT | DELETE | SEARCH, key), timed
+    max_size: int  # Largest number of keys the structure holds, to size the fixed-height ones
+
+
+def _distinct_keys(size: int, rng: Random) -> List[int]:
+    return rng.sample(range(1, max(KEY_SPACE, 100 * size)), size)
+
+
+def uniform(size: int, rng: Random) -> Workload:
+    # size searches, each for a loaded key chosen uniformly at random
+    keys: List[int] = _distinct_keys(size, rng)
+    return Workload(keys, [(SEARCH, key) for key in rng.choices(keys, k=size)], size)
+
+
+def sequential(size: int, rng: Random) -> Workload:
+    # size inserts in increasing order, then size searches in the same order
+    keys: List[int] = sorted(_distinct_keys(size, rng))
+    return Workload([], [(INSERT, key) for key in keys] + [(SEARCH, key) for key in keys], size)
+
+
+def zipf(size: int, rng: Random, s: float = 1.1) -> Workload:
+    # size searches whose targets follow a Zipf law of exponent s: the i-th most popular key is asked with
+    # probability proportional to 1 / i ** s, the popularity order being a random permutation of the keys
+    keys: List[int] = _distinct_keys(size, rng)
+    popularity: List[int] = keys[:]
+    rng.shuffle(popularity)
+    cumulative: List[float] = list(accumulate(1 / rank ** s for rank in range(1, size + 1)))
+    total: float = cumulative[-1]
+    return Workload(keys, [(SEARCH, popularity[bisect_left(cumulative, rng.random() * total)]) for _ in range(size)], size)
+
+
+def sliding_window(size: int, rng: Random, window: int = 0) -> Workload:
+    # Increasing keys go through a window of the most recent ones (size // 10 by default): every step inserts
+    # the new key, deletes the one leaving the window and searches a key still inside it
+    window = window or max(size // 10, 1)
+    keys: List[int] = sorted(_distinct_keys(size + window, rng))
+    preload: List[int] = keys[:window]
+    operations: List[Tuple[int, int]] = []
+    for i in range(window, window + size):
+        operations.append((INSERT, keys[i]))
+        operations.append((DELETE, keys[i - window]))
+        operations.append((SEARCH, keys[rng.randrange(i - window + 1, i + 1)]))
+    return Workload(preload, operations, window + 1)
+
+
+def churn(size: int, rng: Random) -> Workload:
+    # size keys are loaded, then size rounds of one insert of a new key and one delete of a random present key
+    keys: List[int] = _distinct_keys(2 * size, rng)
+    present: List[int] = keys[:size]
+    operations: List[Tuple[int, int]] = []
+    for key in keys[size:]:
+        operations.append((INSERT, key))
+        present.append(key)
+        position: int = rng.randrange(len(present))
+        present[position], present[-1] = present[-1], present[position]
+        operations.append((DELETE, present.pop()))
+    return Workload(keys[:size], operations, size + 1)
+
+
+def _traffic(size: int, rng: Random, read_ratio: float) -> Workload:
+    # size keys are loaded, then size operations: with probability read_ratio a search of a present key (half of them
+    # among the 1% of the keys searched most, so that recency pays off), otherwise the insert of a new key or the
+    # delete of a random present key, with even odds
+    keys: List[int] = _distinct_keys(2 * size, rng)
+    present: List[int] = keys[:size]
+    hot: List[int] = present[:max(size // 100, 1)]
+    fresh: Iterator[int] = iter(keys[size:])
+    operations: List[Tuple[int, int]] = []
+    for _ in range(size):
+        draw: float = rng.random()
+        if draw < read_ratio:
+            source: List[int] = hot if rng.random() < 0.5 else present
+            operations.append((SEARCH, source[rng.randrange(len(source))]))
+        elif draw < (1 + read_ratio) / 2 or len(present) <= len(hot):
+            key: int = next(fresh)
+            operations.append((INSERT, key))
+            present.append(key)
+        else:
+            # The hot keys stay, so that their searches still hit
+            position: int = rng.randrange(len(hot), len(present))
+            present[position], present[-1] = present[-1], present[position]
+            operations.append((DELETE, present.pop()))
+    return Workload(keys[:size], operations, 2 * size)
+
+
+def read_mostly(size: int, rng: Random) -> Workload:
+    return _traffic(size, rng, 0.95)
+
+
+def write_mostly(size: int, rng: Random) -> Workload:
+    return _traffic(size, rng, 0.2)
+
+
+def mixed(size: int, rng: Random) -> Workload:
+    return _traffic(size, rng, 0.5)
+
+
+WORKLOADS: Dict[str, Callable[[int, Random], Workload]] = {
+    "uniform": uniform,
+    "sequential": sequential,
+    "zipf": zipf,
+    "sliding-window": sliding_window,
+    "churn": churn,
+    "read-mostly": read_mostly,
+    "write-mostly": write_mostly,
+    "mixed": mixed,
+}
@@ -1,6 +1,27 @@
 from SkipList import SkipList
 from ToDoList import ToDoList
 from WorkingToDoList import WorkingToDoList
+import Working_Todo
+import Working_Todo_Improved
+from ArrayToDoList import ArrayToDoList
+from ToDoServer import ToDoServer
+from ToDoClient import ToDoClient
+from ShardedToDoList import ShardedToDoList
+from FrozenToDoList import FrozenToDoList
+from ConcurrentSkipList import ConcurrentSkipList
+from Snapshot import HEADER
+from bisect import bisect_left, insort
+from collections import Counter
+import asyncio
+import inspect
+import io
+from contextlib import redirect_stdout
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
 
 def test_skiplist():
     skiplist = SkipList(max_level=3, p=0.5, verbose=True)
@@ -67,6 +88,708 @@ def test_working_todolist():
     print(working_todolist)
 
 
+def test_working_todolist_rebuild_debt():
+    # Between two rebuilds, the searches add fewer than debt_limit nodes to the levels altogether
+    rng = random.Random(0)
+    keys = rng.sample(range(100000), 2000)
+    for rebuild_debt in (0, 1, 30, 200, None):
+        working_todolist = WorkingToDoList(h=14, epsilon=0.2, rebuild_debt=rebuild_debt)
+        for key in keys:
+            working_todolist.insert(key)
+        rebuilt = list(working_todolist.level_sizes)  # Level sizes left by the last rebuild
+        for _ in range(5000):
+            # Mostly a few recent keys, as in a working set, and sometimes any key
+            key = keys[int(rng.paretovariate(1)) % len(keys)] if rng.random() < 0.9 else rng.choice(keys)
+            assert working_todolist.search(key)
+            if working_todolist.debt == 0:
+                rebuilt = list(working_todolist.level_sizes)
+                continue
+            growth = [size - before for size, before in zip(working_todolist.level_sizes, rebuilt)]
+            assert sum(growth) <= working_todolist.debt < working_todolist.debt_limit
+            assert max(growth) < working_todolist.debt_limit
+            if rebuild_debt is not None:
+                assert working_todolist.debt_limit == rebuild_debt
+            else:
+                # The default limit is what the last rebuild rewrote, so it never falls below 2h
+                assert working_todolist.debt_limit >= 2 * working_todolist.h
+        assert len(working_todolist) == len(keys)
+
+
+def test_working_todolist_rebuild_count():
+    # On the same searches, the default debt rebuilds far less often than rebuild_debt=0 (once per search) or a
+    # fixed 2h, and no more often than an unlimited debt, which leaves only the rebuilds of an overflowing L0
+    rng = random.Random(0)
+    keys = rng.sample(range(100000), 2000)
+    searches = [rng.choice(keys) for _ in range(1000)]
+    rebuilds = {}
+    for rebuild_debt in (0, 24, None, float("inf")):
+        working_todolist = WorkingToDoList.from_sorted(sorted(keys), h=12, epsilon=0.2, stats=True,
+                                                       rebuild_debt=rebuild_debt)
+        working_todolist.reset_stats()
+        for key in searches:
+            assert working_todolist.search(key)
+        rebuilds[rebuild_debt] = working_todolist.stats_snapshot()["rebuilds"]
+    assert rebuilds[0] == len(searches)
+    assert rebuilds[None] <= rebuilds[float("inf")] * 1.1
+    assert rebuilds[None] < rebuilds[24] * 0.75 and rebuilds[None] < len(searches) * 0.4
+
+
+def _random_updates(structures, model, rng, count, key_space):
+    # Inserts of absent keys and deletes of random ones on every structure and on the sorted model
+    for _ in range(count):
+        key = rng.randrange(key_space)
+        position = bisect_left(model, key)
+        present = position < len(model) and model[position] == key
+        if rng.random() < 0.6:
+            if not present:
+                model.insert(position, key)
+                for structure in structures:
+                    structure.insert(key)
+        else:
+            if present:
+                del model[position]
+            for structure in structures:
+                structure.delete(key)
+
+
+def test_ordered_iteration():
+    # Iteration, irange, successor / predecessor and min / max against a sorted list
+    rng = random.Random(0)
+    for structures in ([ToDoList(h=4, epsilon=0.2, auto_height=True), SkipList(max_level=4, p=0.5, adaptive=True)],
+                       [ToDoList(h=10, epsilon=0.2), SkipList(max_level=10, p=0.5)]):
+        model = []
+        for structure in structures:
+            assert list(structure) == [] and list(structure.irange(0, 10)) == []
+            assert structure.min() is None and structure.max() is None
+            assert structure.successor(5) is None and structure.predecessor(5) is None
+        for _ in range(15):
+            _random_updates(structures, model, rng, 200, 1000)
+            for structure in structures:
+                assert list(structure) == model
+                assert structure.min() == (model[0] if model else None)
+                assert structure.max() == (model[-1] if model else None)
+                for _ in range(20):
+                    lo, hi = sorted(rng.randrange(-10, 1010) for _ in range(2))
+                    inclusive = (rng.random() < 0.5, rng.random() < 0.5)
+                    expected = [key for key in model
+                                if (lo < key or inclusive[0] and key == lo) and (key < hi or inclusive[1] and key == hi)]
+                    assert list(structure.irange(lo, hi, inclusive)) == expected
+                    assert list(structure.irange(lo, None)) == [key for key in model if key >= lo]
+                    assert list(structure.irange(None, hi)) == [key for key in model if key <= hi]
+                    key = rng.choice(model) if model and rng.random() < 0.5 else rng.randrange(-10, 1010)
+                    position = bisect_left(model, key)
+                    after = position + (position < len(model) and model[position] == key)
+                    assert structure.successor(key) == (model[after] if after < len(model) else None)
+                    assert structure.predecessor(key) == (model[position - 1] if position > 0 else None)
+
+
+def test_finger_search():
+    # A finger SkipList (plain, counting, adaptive) must end up exactly like a plain one with the same seed, on
+    # walks of nearby keys with jumps back and forth, and answer like the model
+    rng = random.Random(0)
+    for options in ({}, {"stats": True}, {"adaptive": True}):
+        max_level = 2 if options.get("adaptive") else 12
+        plain = SkipList(max_level=max_level, p=0.5, seed=1, adaptive=options.get("adaptive", False))
+        finger = SkipList(max_level=max_level, p=0.5, seed=1, finger=True, **options)
+        model = []
+        key = 5000
+        for _ in range(6000):
+            key = rng.randrange(10000) if rng.random() < 0.05 else max(0, min(9999, key + rng.randint(-20, 20)))
+            position = bisect_left(model, key)
+            present = position < len(model) and model[position] == key
+            operation = rng.random()
+            if operation < 0.4:
+                if not present:
+                    model.insert(position, key)
+                    plain.insert(key)
+                    finger.insert(key)
+            elif operation < 0.6:
+                if present:
+                    del model[position]
+                plain.delete(key)
+                finger.delete(key)
+            elif operation < 0.8:
+                assert finger.search(key) == present == plain.search(key)
+            else:
+                # The widths, kept up to date from the finger ranks, must stay right
+                assert finger.rank(key) == position
+                if model:
+                    index = rng.randrange(len(model))
+                    assert finger.select(index) == model[index]
+        assert list(finger) == model
+        assert str(finger) == str(plain)
+        assert finger.search_many(model[::7] + [-1, 10000]) == [True] * len(model[::7]) + [False, False]
+
+
+def test_rank_select():
+    # rank, select and count_range against a sorted list, through single and batch updates, the partial rebuildings
+    # and the height changes that all have to keep the widths right
+    rng = random.Random(0)
+    keys = sorted(rng.sample(range(2000), 300))
+    structures = [ToDoList.from_sorted(keys, 4, 0.2, auto_height=True), ToDoList(h=10, epsilon=0.2),
+                  SkipList.from_sorted(keys, max_level=3, p=0.5, adaptive=True), SkipList(max_level=10, p=0.5)]
+    for structure in structures[1::2]:
+        for key in keys:
+            structure.insert(key)
+    model = list(keys)
+    for round in range(12):
+        if round % 3 == 2:
+            # A batch of absent keys or of a third of the keys, by turns (the SkipLists take them one by one)
+            added = sorted(set(rng.sample(range(2000), 150)) - set(model)) if round % 2 else []
+            removed = rng.sample(model, len(model) // 3) if not round % 2 else []
+            for key in added:
+                insort(model, key)
+            for key in removed:
+                model.remove(key)
+            for structure in structures:
+                if isinstance(structure, ToDoList):
+                    structure.insert_many(added)
+                    structure.delete_many(removed)
+                else:
+                    for key in added:
+                        structure.insert(key)
+                    for key in removed:
+                        structure.delete(key)
+        else:
+            _random_updates(structures, model, rng, 150, 2000)
+        for structure in structures:
+            assert len(structure) == len(model)
+            for _ in range(30):
+                key = rng.randrange(-5, 2005)
+                assert structure.rank(key) == bisect_left(model, key)
+                lo, hi = sorted(rng.randrange(-5, 2005) for _ in range(2))
+                inclusive = (rng.random() < 0.5, rng.random() < 0.5)
+                assert structure.count_range(lo, hi, inclusive) == len(list(structure.irange(lo, hi, inclusive)))
+                assert structure.count_range(hi, lo) == (hi == lo and hi in model)
+                if model:
+                    index = rng.randrange(-len(model), len(model))
+                    assert structure.select(index) == model[index]
+            for index in (len(model), -len(model) - 1):
+                try:
+                    structure.select(index)
+                    assert False, "expected IndexError"
+                except IndexError:
+                    pass
+
+
+def test_stats():
+    # Every traversal reports to the stats: one descent per search_many query, rank and select, two per count_range,
+    # one per bounded irange with its streamed nodes counted apart. Built without stats, nothing is swapped in
+    keys = list(range(0, 200, 2))
+    queries = [7, 40, 41, 150, 3]
+    for build in (lambda stats: ToDoList.from_sorted(keys, 8, 0.2, stats=stats),
+                  lambda stats: SkipList.from_sorted(keys, max_level=8, p=0.5, seed=1, stats=stats),
+                  lambda stats: SkipList.from_sorted(keys, max_level=8, p=0.5, seed=1, finger=True, stats=stats)):
+        plain, counted = build(False), build(True)
+        counted.reset_stats()
+        assert counted.search_many(queries) == plain.search_many(queries) == [False, True, False, True, False]
+        assert counted.rank(41) == plain.rank(41) == 21
+        assert counted.select(-1) == plain.select(-1) == 198
+        assert counted.count_range(10, 20) == plain.count_range(10, 20) == 6
+        assert list(counted.irange(10, 20)) == list(plain.irange(10, 20)) == list(range(10, 21, 2))
+        assert list(counted.irange(hi=7)) == [0, 2, 4, 6]
+        snapshot = counted.stats_snapshot()
+        assert snapshot["descents"] == len(queries) + 1 + 1 + 2 + 1
+        assert snapshot["scanned"] == 6 + 4
+        assert 0 < snapshot["hops"] <= snapshot["comparisons"]
+        assert snapshot["rebuilds"] == 0
+
+        # A lone miss costs the same pointers in search_many, rank and predecessor, which share the descent
+        counted.reset_stats()
+        assert all(value in (0, 0.0, {}, None) for value in counted.stats_snapshot().values())
+        hops = []
+        for query in (lambda: counted.search_many([101]), lambda: counted.rank(101), lambda: counted.predecessor(101)):
+            before = counted.stats_snapshot()["hops"]
+            query()
+            hops.append(counted.stats_snapshot()["hops"] - before)
+        assert hops[0] == hops[1] == hops[2] > 0
+
+        # The counting copies are bound methods set on the instance, the plain structure keeps the class ones
+        def swapped(structure):
+            return {name for name, value in vars(structure).items()
+                    if inspect.ismethod(value) and value.__name__.startswith("__counted")}
+        assert "search_many" in swapped(counted) and len(swapped(counted)) >= 5
+        assert plain.stats is None and not swapped(plain)
+        for method in (plain.stats_snapshot, plain.reset_stats):
+            try:
+                method()
+                assert False, "expected ValueError"
+            except ValueError:
+                pass
+
+    working = WorkingToDoList.from_sorted(keys, 10, 0.2, stats=True)
+    working.reset_stats()
+    assert list(working.irange(10, 20)) == list(range(10, 21, 2))
+    assert working.stats_snapshot()["descents"] == 1 and working.stats_snapshot()["scanned"] == 6
+
+
+def test_map_mode():
+    # The map methods against a dict, on both lists (with a finger too, whose predecessors every method reuses)
+    rng = random.Random(0)
+    for structure in (ToDoList(h=4, epsilon=0.2, auto_height=True), SkipList(max_level=10, p=0.5),
+                      SkipList(max_level=10, p=0.5, finger=True)):
+        model = {}
+        for _ in range(5000):
+            key = rng.randrange(500)
+            operation = rng.randrange(7)
+            if operation == 0:
+                structure[key] = model[key] = rng.random()
+            elif operation == 1:
+                if key in model:
+                    assert structure[key] == model[key]
+                else:
+                    try:
+                        structure[key]
+                        assert False, "expected KeyError"
+                    except KeyError:
+                        pass
+            elif operation == 2:
+                assert structure.get(key) == model.get(key)
+                assert structure.get(key, "default") == model.get(key, "default")
+            elif operation == 3:
+                value = rng.random()
+                assert structure.setdefault(key, value) == model.setdefault(key, value)
+            elif operation == 4:
+                assert structure.pop(key, None) == model.pop(key, None)
+            elif operation == 5:
+                if key in model:
+                    assert structure.pop(key) == model.pop(key)
+                else:
+                    try:
+                        structure.pop(key)
+                        assert False, "expected KeyError"
+                    except KeyError:
+                        pass
+            elif key not in model:
+                # Plain insert with a value, the set entry point of the map
+                model[key] = key * 2
+                structure.insert(key, key * 2)
+            assert (key in structure) == (key in model)
+        assert len(structure) == len(model)
+        assert list(structure.items()) == sorted(model.items())
+        lo, hi = 100, 300
+        assert list(structure.items(lo, hi, (False, True))) == sorted(item for item in model.items() if lo < item[0] <= hi)
+        assert list(structure) == sorted(model)
+
+
+def test_concurrent_skiplist():
+    # Threads inserting, deleting and searching a small shared key range at once: every key must end up present
+    # exactly when the inserts that returned True outnumber the deletes that did, and the levels must stay sorted
+    switch_interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)  # Switch threads as often as possible, in the middle of the operations
+    try:
+        skiplist = ConcurrentSkipList(max_level=6, p=0.5, seed=0)
+        key_space = 64
+        balances = []  # Successful inserts minus successful deletes of every key, one list per thread
+        errors = []
+
+        def worker(seed):
+            rng = random.Random(seed)
+            balance = [0] * key_space
+            try:
+                for _ in range(5000):
+                    key = rng.randrange(key_space)
+                    operation = rng.random()
+                    if operation < 0.4:
+                        balance[key] += skiplist.insert(key)
+                    elif operation < 0.8:
+                        balance[key] -= skiplist.delete(key)
+                    else:
+                        skiplist.search(key)
+            except Exception as error:
+                errors.append(error)
+            balances.append(balance)
+
+        # Daemons with a deadline: a broken list can send a thread round a cycle forever
+        threads = [threading.Thread(target=worker, args=(seed,), daemon=True) for seed in range(8)]
+        for thread in threads:
+            thread.start()
+        deadline = time.monotonic() + 60
+        for thread in threads:
+            thread.join(timeout=max(deadline - time.monotonic(), 0))
+        assert not any(thread.is_alive() for thread in threads), "a thread is stuck"
+    finally:
+        sys.setswitchinterval(switch_interval)
+
+    assert not errors
+    totals = [sum(balance[key] for balance in balances) for key in range(key_space)]
+    assert all(total in (0, 1) for total in totals)
+    assert list(skiplist) == [key for key in range(key_space) if totals[key]]
+    assert all(skiplist.search(key) == bool(totals[key]) for key in range(key_space))
+    for lvl in range(skiplist.max_level_limit + 1):
+        node, keys = skiplist.sentinel.next_nodes[lvl], []
+        while node is not None:
+            assert node.fully_linked and not node.marked and not node.lock.locked()
+            keys.append(node.key)
+            node = node.next_nodes[lvl]
+        assert keys == sorted(set(keys))
+
+
+def test_verbose_output():
+    # verbose=True prints the operations; of the rebuilds, only those of WorkingToDoList, as before the tracing hooks
+    for structure, prints_rebuilds in ((ToDoList(h=5, epsilon=0.2, verbose=True), False),
+                                       (ArrayToDoList(h=5, epsilon=0.2, verbose=True), False),
+                                       (WorkingToDoList(h=5, epsilon=0.2, verbose=True), True)):
+        output = io.StringIO()
+        with redirect_stdout(output):
+            for key in range(63):
+                structure.insert(key)
+            structure.search(5)
+        assert "Inserted key 62" in output.getvalue() and "Found key 5" in output.getvalue()
+        assert ("partial rebuilding" in output.getvalue()) == prints_rebuilds
+
+        # The rebuilds still reach the hooks
+        rebuilds = []
+        structure.add_hook("rebuild", lambda event, data: rebuilds.append(data))
+        with redirect_stdout(io.StringIO()):
+            for key in range(63, 200):
+                structure.insert(key)
+        assert rebuilds
+
+
+def _check_levels(structure):
+    # Levels of a compact-node list (next_nodes[h - lvl] is the successor in Llvl): sorted, each one inside the next
+    # one down, and every node holding exactly one pointer per level it is in. Returns the keys of L0, ..., Lh
+    h = structure.h
+    levels = []
+    pointers = {}  # Levels every node is in
+    below = None
+    for lvl in range(h, -1, -1):
+        nodes = []
+        node = structure.sentinel.next_nodes[h - lvl]
+        while node is not None:
+            nodes.append(node)
+            pointers[id(node)] = pointers.get(id(node), 0) + 1
+            node = node.next_nodes[h - lvl]
+        assert all(a.key <= b.key for a, b in zip(nodes, nodes[1:]))
+        assert below is None or {id(node) for node in nodes} <= below
+        below = {id(node) for node in nodes}
+        levels.insert(0, nodes)
+    assert all(len(node.next_nodes) == pointers[id(node)] for node in levels[h])
+    return [[node.key for node in nodes] for nodes in levels]
+
+
+def test_duplicate_keys():
+    # insert accepts a key that is already there: deleting one copy must leave the others, and their levels, whole
+    for seed in range(6):
+        rng = random.Random(seed)
+        for structure in (ToDoList(h=6, epsilon=0.2), WorkingToDoList(h=10, epsilon=0.2),
+                          Working_Todo.WorkingToDoList(h=11, epsilon=0.2)):
+            model = []
+            for _ in range(3000):
+                key = rng.randrange(200)
+                operation = rng.random()
+                if operation < 0.45:
+                    structure.insert(key)
+                    insort(model, key)
+                elif operation < 0.8:
+                    structure.delete(key)
+                    position = bisect_left(model, key)
+                    if position < len(model) and model[position] == key:
+                        del model[position]
+                else:
+                    assert structure.search(key) == (key in model)
+            levels = _check_levels(structure)
+            assert levels[structure.h] == model
+            if hasattr(structure, "level_sizes"):
+                assert structure.level_sizes == [len(level) for level in levels]
+                assert len(structure) == len(model)
+
+
+def test_working_set_tracker():
+    # Against a list of the keys by last access (the most recent last), through the renumberings of a small tree
+    rng = random.Random(0)
+    tracker = Working_Todo_Improved.WorkingSetTracker(capacity=8)
+    recency = []
+    for _ in range(20000):
+        key = rng.randrange(300)
+        if rng.random() < 0.15:
+            tracker.remove(key)
+            if key in recency:
+                recency.remove(key)
+        else:
+            expected = len(recency) - recency.index(key) if key in recency else len(recency) + 1
+            assert tracker.access(key) == expected
+            if key in recency:
+                recency.remove(key)
+            recency.append(key)
+        probe = rng.randrange(300)
+        assert tracker.working_set_number(probe) == (len(recency) - recency.index(probe) if probe in recency else None)
+        assert len(tracker) == len(recency)
+        if rng.random() < 0.05:
+            k = rng.randrange(len(recency) + 2)
+            assert tracker.most_recent(k) == recency[::-1][:k]
+
+
+def test_working_todolist_improved():
+    # Against a sorted list and a recency list: searches, levels holding the keys accessed last, and their bounds
+    rng = random.Random(0)
+    for h in (4, 12):
+        structure = Working_Todo_Improved.WorkingToDoList(h=h, epsilon=0.2)
+        model = []
+        recency = []  # Keys by last access, the most recent last (inserting a key is an access)
+        for _ in range(6000):
+            key = rng.randrange(400) if rng.random() < 0.5 else rng.choice(recency[-20:] or [0])
+            operation = rng.random()
+            if operation < 0.35:
+                structure.insert(key)
+                if key not in model:
+                    insort(model, key)
+            elif operation < 0.55:
+                structure.delete(key)
+                if key in model:
+                    model.remove(key)
+            else:
+                assert structure.search(key) == (key in model)
+                if key not in model:
+                    continue
+            if key in recency:
+                recency.remove(key)
+            if key in model:
+                recency.append(key)
+                assert structure.working_set_number(key) == 1
+        assert len(structure) == len(model)
+        for lvl in range(h + 1):
+            keys = []
+            node = structure.sentinel.next_nodes[lvl]
+            while node is not None:
+                keys.append(node.key)
+                node = node.next_nodes[lvl]
+            assert len(keys) == structure.level_sizes[lvl]
+            assert lvl == 0 or len(keys) <= structure.capacities[lvl]
+            assert keys == sorted(recency[len(recency) - len(keys):])
+        assert all(structure.working_set_number(key) == len(recency) - recency.index(key) for key in model)
+
+
+def test_access_frequencies():
+    # get_ordered_keys / iter_ordered_keys / top_k of Working_Todo against a Counter: by decreasing count, and among
+    # equal counts in the order the keys reached it. A delete forgets the count of its key
+    rng = random.Random(0)
+    structure = Working_Todo.WorkingToDoList(h=11, epsilon=0.2)
+    counts = Counter()
+    reached = {}  # When every key reached its current count
+    present = Counter()  # Copies of every key in the list
+    for step in range(6000):
+        key = rng.randrange(150)
+        operation = rng.random()
+        if step % 50 == 49 and counts:
+            # A key from the middle of the largest group of equal counts
+            groups = {}
+            for counted in sorted(counts, key=reached.get):
+                groups.setdefault(counts[counted], []).append(counted)
+            group = max(groups.values(), key=len)
+            operation, key = 1.0, group[len(group) // 2]
+        if operation < 0.4:
+            structure.insert(key)
+            present[key] += 1
+            counts[key] += 1
+            reached[key] = step
+        elif operation < 0.8:
+            assert structure.search(key) == (present[key] > 0)
+            if present[key]:
+                counts[key] += 1
+                reached[key] = step
+        else:
+            structure.delete(key)
+            if present[key]:
+                present[key] -= 1
+            counts.pop(key, None)
+            reached.pop(key, None)
+        if step % 10 == 0:
+            expected = sorted(counts, key=lambda counted: (-counts[counted], reached[counted]))
+            assert structure.get_ordered_keys() == expected
+            assert list(structure.iter_ordered_keys()) == expected
+            k = rng.randrange(len(expected) + 2)
+            assert structure.top_k(k) == expected[:k]
+            assert all(structure.access_count[counted] == counts[counted] for counted in counts)
+
+
+def test_array_todolist():
+    # The array engine must behave exactly like ToDoList on the same stream of operations
+    rng = random.Random(0)
+    todolist = ToDoList(h=8, epsilon=0.2)
+    array_todolist = ArrayToDoList(h=8, epsilon=0.2, capacity=16)
+
+    for _ in range(20000):
+        key = rng.randint(1, 2000)
+        operation = rng.choice(("insert", "delete", "search"))
+        if operation == "insert" and not todolist.search(key):
+            todolist.insert(key)
+            array_todolist.insert(key)
+        elif operation == "delete":
+            todolist.delete(key)
+            array_todolist.delete(key)
+        else:
+            assert todolist.search(key) == array_todolist.search(key)
+
+    assert len(todolist) == len(array_todolist)
+    assert str(todolist).split("\n")[2:] == str(array_todolist).split("\n")[2:]
+    print(f"ArrayToDoList matches ToDoList ({len(array_todolist)} keys)")
+
+
+def test_todo_server():
+    # Round trips through ToDoClient against a server on an ephemeral port, with pipelined requests coalesced into
+    # batches, error answers and the connection shutdown
+    async def scenario():
+        server = ToDoServer(structures={"known": ToDoList(h=4, epsilon=0.2, auto_height=True)}, factory=None)
+        await server.start(port=0)
+        client = await ToDoClient.connect(port=server.address[1])
+
+        await client.insert_many("known", list(range(0, 200, 2)))
+        await client.insert("known", 7)
+        assert await client.search("known", 7)
+        assert not await client.search("known", 9)
+        assert await client.search_many("known", [0, 1, 198, 199]) == [True, False, True, False]
+        await client.delete("known", 7)
+        await client.delete_many("known", [0, 2])
+        assert await client.irange("known", None, 10) == [4, 6, 8, 10]
+        assert await client.length("known") == 98
+
+        # Pipelined requests are answered in order, in fewer batches than requests
+        requests_before, batches_before = server.requests, server.batches
+        found = await asyncio.gather(*(client.search("known", key) for key in range(100)))
+        assert found == [key % 2 == 0 and key >= 4 for key in range(100)]
+        assert server.batches - batches_before < server.requests - requests_before
+
+        # An unknown structure is an error for that request only
+        try:
+            await client.search("unknown", 1)
+            assert False, "expected ValueError"
+        except ValueError as error:
+            assert "unknown structure" in str(error)
+        assert await client.search("known", 4)
+
+        await client.close()
+        try:
+            await client.search("known", 4)
+            assert False, "expected ConnectionError"
+        except ConnectionError:
+            pass
+        await server.close()
+
+    asyncio.run(asyncio.wait_for(scenario(), timeout=30))
+
+
+def test_todo_client_cancelled_call():
+    # A call cancelled while in flight must not take the answer of the next one, nor stop the client
+    async def scenario():
+        server = ToDoServer()
+        await server.start(port=0)
+        client = await ToDoClient.connect(port=server.address[1])
+        await client.insert("todo", 1)
+
+        cancelled = asyncio.create_task(client.search("todo", 2))
+        await asyncio.sleep(0)  # The request is sent, its answer not read yet
+        cancelled.cancel()
+        assert await client.search("todo", 1)
+        assert not await client.search("todo", 2)
+        assert cancelled.cancelled()
+
+        await client.close()
+        await server.close()
+
+    asyncio.run(asyncio.wait_for(scenario(), timeout=30))
+
+
+def test_sharded_todolist():
+    # Model check against a sorted list (the shards keep duplicate keys, a delete removes one of them), with the keys
+    # piled up in the first shard so that rebalance has to move the boundaries
+    rng = random.Random(0)
+    model = []
+    with ShardedToDoList(shards=3, key_range=(0, 3000)) as sharded:
+        for round in range(4):
+            keys = [rng.randrange(300) if rng.random() < 0.8 else rng.randrange(3000) for _ in range(500)]
+            sharded.insert_many(keys)
+            for key in keys:
+                insort(model, key)
+            removed = [rng.randrange(3000) for _ in range(200)]
+            sharded.delete_many(removed)
+            for key in removed:
+                position = bisect_left(model, key)
+                if position < len(model) and model[position] == key:
+                    del model[position]
+            queries = [rng.randrange(3000) for _ in range(300)]
+            assert sharded.search_many(queries) == [key in model for key in queries]
+
+            moved = sharded.rebalance()
+            assert moved == (round == 0)  # After that, the shards are balanced already
+            assert len(sharded.shards) == 3
+            assert all(a < b for a, b in zip(sharded.boundaries, sharded.boundaries[1:]))
+            assert list(sharded) == model
+            assert len(sharded) == len(model)
+            assert list(sharded.irange(100, 2000)) == [key for key in model if 100 <= key <= 2000]
+            assert all(sharded.search(key) for key in model[::50])
+
+    # A shard whose keys are all equal cannot be split: nothing moves, and the boundaries stay increasing
+    with ShardedToDoList(shards=2, boundaries=[5]) as sharded:
+        sharded.insert_many([10] * 51)
+        assert not sharded.rebalance()
+        assert sharded.boundaries == [5] and sharded.shard_sizes() == [0, 51]
+        # With a single key below the median, the pivot is the next greater key
+        sharded.insert(6)
+        assert sharded.rebalance()
+        assert sharded.boundaries == [10] and sharded.shard_sizes() == [1, 51]
+        assert list(sharded) == [6] + [10] * 51
+
+
+def test_snapshots():
+    # save / load give back the same levels, and FrozenToDoList answers like the list it was saved from
+    rng = random.Random(0)
+    keys = sorted(rng.sample(range(-10**12, 10**12), 3000))
+    todolist = ToDoList.from_sorted(keys, 12, 0.2)
+    skiplist = SkipList.from_sorted(keys, max_level=12, p=0.5)
+    with tempfile.TemporaryDirectory() as directory:
+        todolist_path = os.path.join(directory, "todolist.tdls")
+        skiplist_path = os.path.join(directory, "skiplist.tdls")
+        todolist.save(todolist_path)
+        skiplist.save(skiplist_path)
+        assert str(ToDoList.load(todolist_path)) == str(todolist)
+        assert str(SkipList.load(skiplist_path)) == str(skiplist)
+
+        with FrozenToDoList.open(todolist_path) as frozen:
+            assert len(frozen) == len(keys) and list(frozen) == keys
+            assert frozen.h == todolist.h and frozen.epsilon == todolist.epsilon
+            for key in rng.sample(keys, 100) + [rng.randrange(-10**12, 10**12) for _ in range(100)]:
+                assert frozen.search(key) == todolist.search(key)
+                assert frozen.successor(key) == todolist.successor(key)
+                assert frozen.predecessor(key) == todolist.predecessor(key)
+                assert frozen.rank(key) == todolist.rank(key)
+            assert list(frozen.irange(keys[10], keys[20], (False, True))) == keys[11:21]
+            assert frozen.select(-1) == keys[-1] == frozen.max()
+
+        # Corrupted headers are ValueErrors, and leave no map (nor its file descriptor) open behind, even while the
+        # errors (and the frames their tracebacks hold) are kept
+        with open(todolist_path, "rb") as file:
+            data = file.read()
+        corruptions = {
+            "magic": b"XXXX" + data[4:],
+            "version": data[:4] + (99).to_bytes(2, "little") + data[6:],
+            "kind": data[:6] + bytes([7]) + data[7:],
+            "truncated": data[:HEADER.size + 100],
+            "short": data[:10],
+        }
+        descriptors = len(os.listdir("/proc/self/fd")) if os.path.isdir("/proc/self/fd") else None
+        errors = []
+        for corruption, content in corruptions.items():
+            path = os.path.join(directory, corruption + ".tdls")
+            with open(path, "wb") as file:
+                file.write(content)
+            for opener in (FrozenToDoList.open, ToDoList.load, SkipList.load):
+                try:
+                    opener(path)
+                    assert False, f"expected ValueError for {corruption}"
+                except ValueError as error:
+                    errors.append(error)
+        for opener in (FrozenToDoList.open, ToDoList.load):
+            try:
+                opener(skiplist_path)  # Right file, wrong kind
+                assert False, "expected ValueError"
+            except ValueError as error:
+                assert "SkipList" in str(error)
+        if descriptors is not None:
+            assert len(os.listdir("/proc/self/fd")) == descriptors
+
+
 if __name__ == "__main__":
     #test_skiplist()
     #test_todolist()